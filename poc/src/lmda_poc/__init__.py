@@ -3,7 +3,16 @@ __all__ = [
     "cli",
     "ingestion",
     "preprocessing",
+    "counts",
+    "features",
+    "keywords",
+    "keyword_corpus",
+    "efa",
+    "transform",
+    "annotation_cache",
+    "manifest",
     "io_artifacts",
+    "instrumentation",
     "logging_setup",
 ]
 
@@ -0,0 +1,142 @@
+# Python
+from __future__ import annotations
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Dict, Optional
+
+from .preprocessing import DocAnnotation
+
+CACHE_FORMAT_VERSION = 1
+
+
+class AnnotationCache:
+    """
+    On-disk cache of per-document lexical annotations (see DocAnnotation).
+
+    Entries are keyed by sha256(namespace, text), where the namespace names the
+    spaCy version, model and pipeline profile, so content-word filters can be
+    re-applied to cached annotations without running the model again. Entries
+    live in two-level sharded JSON files; once the total size exceeds max_bytes
+    the least recently used entries (by mtime, refreshed on every hit) are
+    evicted down to 80% of the limit.
+    """
+
+    def __init__(self, cache_dir: Path, namespace: str, max_bytes: int = 1024 * 1024 * 1024):
+        self.cache_dir = Path(cache_dir)
+        self.namespace = namespace
+        self.max_bytes = int(max_bytes)
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._size = sum(size for _, size, _ in self._scan())
+        logging.info("Annotation cache at %s (%d bytes, limit %d)", self.cache_dir, self._size, self.max_bytes)
+
+    def key(self, text: str) -> str:
+        h = hashlib.sha256()
+        h.update(f"v{CACHE_FORMAT_VERSION};{self.namespace}\n".encode("utf-8"))
+        h.update(text.encode("utf-8", errors="surrogatepass"))
+        return h.hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[DocAnnotation]:
+        path = self._path(key)
+        try:
+            with path.open("r", encoding="utf-8") as f:
+                raw = json.load(f)
+            ann = DocAnnotation(
+                n_sentences=int(raw["n_sentences"]),
+                n_tokens_raw=int(raw["n_tokens_raw"]),
+                entries=tuple((lemma, pos, bool(is_stop), int(n)) for lemma, pos, is_stop, n in raw["entries"]),
+            )
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logging.warning("Ignoring unreadable cache entry %s: %s", path, e)
+            self.misses += 1
+            return None
+        try:
+            os.utime(path)  # refresh LRU position
+        except OSError:
+            pass
+        self.hits += 1
+        return ann
+
+    def put(self, key: str, ann: DocAnnotation) -> None:
+        path = self._path(key)
+        payload = json.dumps(
+            {
+                "n_sentences": ann.n_sentences,
+                "n_tokens_raw": ann.n_tokens_raw,
+                "entries": [list(e) for e in ann.entries],
+            },
+            ensure_ascii=False,
+            separators=(",", ":"),
+        ).encode("utf-8")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".tmp{os.getpid()}")
+        try:
+            with tmp.open("wb") as f:
+                f.write(payload)
+            # Another run sharing the cache may have written this entry already: count only the difference
+            try:
+                old_size = path.stat().st_size
+            except FileNotFoundError:
+                old_size = 0
+            os.replace(tmp, path)
+        except OSError as e:
+            logging.warning("Could not write cache entry %s: %s", path, e)
+            tmp.unlink(missing_ok=True)
+            return
+        self.writes += 1
+        self._size += len(payload) - old_size
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def _scan(self):
+        for shard in os.scandir(self.cache_dir):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.is_file() and entry.name.endswith(".json"):
+                    st = entry.stat()
+                    yield entry.path, st.st_size, st.st_mtime_ns
+
+    def evict(self) -> None:
+        entries = sorted(self._scan(), key=lambda e: (e[2], e[0]))
+        total = sum(size for _, size, _ in entries)
+        target = int(self.max_bytes * 0.8)
+        removed = 0
+        for path, size, _ in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        self.evictions += removed
+        self._size = total
+        logging.info("Annotation cache eviction: %d entries removed, %d bytes kept", removed, total)
+
+    def stats(self) -> Dict[str, object]:
+        lookups = self.hits + self.misses
+        return {
+            "dir": str(self.cache_dir),
+            "namespace": self.namespace,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            "writes": self.writes,
+            "evictions": self.evictions,
+            "size_bytes": self._size,
+            "max_bytes": self.max_bytes,
+        }
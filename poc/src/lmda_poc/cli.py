@@ -1,14 +1,18 @@
 # Python
 from __future__ import annotations
 import argparse
+import contextlib
+import csv
+import hashlib
+import importlib.util
+import json
 import logging
 import platform
 import sys
 import time
-from collections import defaultdict
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Tuple
 
 
 def _str2bool(v: str) -> bool:
@@ -21,16 +25,64 @@ def _str2bool(v: str) -> bool:
         return False
     raise argparse.ArgumentTypeError(f"Expected boolean value, got: {v}")
 
+
+def _positive_int(v: str) -> int:
+    try:
+        val = int(v)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Expected integer value, got: {v}")
+    if val < 1:
+        raise argparse.ArgumentTypeError(f"Expected integer >= 1, got: {v}")
+    return val
+
+
+def _non_negative_int(v: str) -> int:
+    try:
+        val = int(v)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Expected integer value, got: {v}")
+    if val < 0:
+        raise argparse.ArgumentTypeError(f"Expected integer >= 0, got: {v}")
+    return val
+
 from .logging_setup import setup_logging
-from .ingestion import ingest_corpus
-from .preprocessing import build_pipeline, preflight_spacy, content_counts_for_doc
+from .ingestion import DEFAULT_READ_WORKERS, IngestionStats, iter_corpus, scan_candidate_files
+from .manifest import (
+    ManifestEntry,
+    ManifestMismatch,
+    load_manifest,
+    merge_incremental,
+    plan_incremental,
+    track_manifest,
+    write_manifest,
+)
+from .annotation_cache import AnnotationCache
+from .instrumentation import TRACE_NAME, Instrumentation
+from .counts import LemmaPosInterner
+from .preprocessing import (
+    DEFAULT_CHUNK_CHARS,
+    PIPELINE_PROFILES,
+    annotation_namespace,
+    get_pipeline,
+    preflight_spacy,
+    iter_content_counts,
+    iter_content_counts_parallel,
+)
 from .io_artifacts import (
-    write_docs_csv,
-    write_tokens_csv,
+    TOKENS_PARQUET_ROW_GROUP,
+    DocsCsvWriter,
+    TokensCsvWriter,
+    add_artifact_digests,
+    artifact_digest,
+    TokensParquetWriter,
+    update_run_poc_json,
     write_errors_csv,
     write_run_poc_json,
 )
 
+# counts_norm.npz is per thousand content tokens (features.per_thousand); part of the EFA cache key
+EFA_WEIGHTING = "per_thousand"
+
 
 def parse_args(argv: List[str]) -> argparse.Namespace:
     ap = argparse.ArgumentParser(
@@ -43,110 +95,506 @@ def parse_args(argv: List[str]) -> argparse.Namespace:
             "  python -m lmda_poc.cli --input data/fixture_corpus --output artefacts_poc\n"
         ),
     )
-    ap.add_argument("--input", required=True, help="Input directory (corpus root)")
+    ap.add_argument("--input", help="Input directory (corpus root); not needed with --refit")
     ap.add_argument("--output", required=True, help="Output directory for PoC artifacts")
     ap.add_argument("--encoding", default="utf-8", help="Default file encoding (default: utf-8)")
+    ap.add_argument("--read-workers", type=_non_negative_int, default=DEFAULT_READ_WORKERS,
+                    help="Threads reading and decoding files ahead of preprocessing (0 reads sequentially)")
     ap.add_argument("--include-patterns", default="*.txt", help="Comma-separated glob patterns to include")
     ap.add_argument("--exclude-patterns", default="", help="Comma-separated glob patterns to exclude")
     ap.add_argument("--keep-stopwords", type=_str2bool, default=False, help="Keep stopwords (true/false)")
     ap.add_argument("--content-pos", default="NOUN,VERB,ADJ,ADV", help="Comma-separated POS tags to keep as content words")
     ap.add_argument("--lowercase", type=_str2bool, default=True, help="Lowercase lemmas (true/false)")
-    ap.add_argument("--batch-size", type=int, default=64, help="spaCy nlp.pipe batch size (default: 64)")
+    ap.add_argument("--batch-size", type=_positive_int, default=64, help="spaCy nlp.pipe batch size (default: 64)")
+    ap.add_argument("--pipeline-profile", default="full", choices=list(PIPELINE_PROFILES),
+                    help="spaCy pipeline profile; lexical-fast drops the parser and NER")
+    ap.add_argument("--chunk-chars", type=_non_negative_int, default=DEFAULT_CHUNK_CHARS,
+                    help="Split texts longer than this many characters into chunks at paragraph/sentence boundaries "
+                         "before tagging (0 disables chunking)")
+    ap.add_argument("--n-process", "--workers", dest="n_process", type=_positive_int, default=1,
+                    help="Worker processes for spaCy preprocessing; output is identical to a single-process run")
+    ap.add_argument("--cache-dir", default=None,
+                    help="Directory for cached per-document annotations, reused across runs (disabled if omitted)")
+    ap.add_argument("--cache-max-mb", type=_positive_int, default=1024,
+                    help="Size limit of --cache-dir in MiB; least recently used entries are evicted")
+    ap.add_argument("--incremental", action="store_true",
+                    help="Only process files added or changed since the last run in --output (uses its manifest.json)")
+    ap.add_argument("--tokens-parquet", action="store_true",
+                    help="Also write tokens.parquet (integer doc_index, dictionary-encoded lemma/pos; needs pyarrow)")
+    ap.add_argument("--parquet-row-group", type=_positive_int, default=TOKENS_PARQUET_ROW_GROUP,
+                    help="Rows per tokens.parquet row group")
+    ap.add_argument("--features", action="store_true",
+                    help="Build vocabulary.csv, counts_raw.npz and counts_norm.npz (docs x K lemmas; needs numpy/scipy)")
+    ap.add_argument("--k", type=_positive_int, default=1000, help="Number of lemma/POS features to select")
+    # Mirrors features.SELECTIONS (not imported here to keep numpy/scipy out of --help)
+    ap.add_argument("--selection", default="topk_loglik_v0", choices=["topk_loglik_v0", "topk_freq"],
+                    help="Feature selection: log-likelihood keyness across categories, or corpus frequency")
+    ap.add_argument("--frozen-vocab", default=None, metavar="PATH",
+                    help="Reuse the columns of an earlier vocabulary.csv instead of selecting K (implies --features); "
+                         "other lemmas are dropped while counting, so tokens.csv only lists vocabulary lemmas")
+    ap.add_argument("--efa", action="store_true",
+                    help="Fit EFA on counts_norm (implies --features): factors_loadings.csv, factors_scores.csv, "
+                         "explained_variance.csv and a scree plot")
+    ap.add_argument("--n-factors", "--factors", dest="n_factors", type=_positive_int, default=6,
+                    help="Number of factors to extract")
+    ap.add_argument("--rotation", default="varimax", choices=["varimax", "none"], help="Factor rotation")
+    ap.add_argument("--plot-format", default="png", choices=["png", "svg"], help="Scree plot format")
+    ap.add_argument("--refit", action="store_true",
+                    help="Only redo EFA (e.g. a new --n-factors/--rotation) on the artefacts already in --output, "
+                         "reusing the cached correlation matrix and eigenvalues")
+    ap.add_argument("--trace", action="store_true",
+                    help="Also write trace.json (Chrome trace event format; open in ui.perfetto.dev) with every stage "
+                         "and batch of --batch-size documents")
     ap.add_argument("--dry-run", action="store_true", help="List what would be processed; do not write artifacts")
     ap.add_argument("--log-level", default="INFO", help="Logging level (DEBUG, INFO, WARN, ERROR)")
     ap.add_argument("--fail-on-decode-error", action="store_true", help="Exit non-zero on decoding error")
-    return ap.parse_args(argv)
+    args = ap.parse_args(argv)
+    if args.input is None and not args.refit:
+        ap.error("the following arguments are required: --input")
+    return args
+
+
+def _decode_error_exit(e: UnicodeDecodeError) -> int:
+    logging.error("Decoding error with --fail-on-decode-error: %s", e)
+    print("ERROR: Decoding failed. Try --encoding utf-8 or --fail-on-decode-error=false to skip bad files.", file=sys.stderr)
+    return 2
+
+
+MODELING_OUTPUTS = ("factors_loadings.csv", "factors_scores.csv", "explained_variance.csv",
+                    "scree_plot.png", "scree_plot.svg", "efa_model.npz")
+
+
+def _run_efa(
+        args: argparse.Namespace,
+        output_dir: Path,
+        X,
+        features: List[Tuple[str, str]],
+        doc_ids: List[str],
+        preprocessing: Dict[str, object],
+):
+    """
+    Fit EFA and write its artefacts: (EfaResult, paths, scree path, run_poc.json modeling section).
+
+    The N-independent inputs (correlation matrix, inverse, eigenvalues) are
+    cached in efa_cache.npz, keyed by the vocabulary, the weighting and the matrix.
+    efa_model.npz keeps what lmda_poc.transform needs to score new documents;
+    preprocessing holds the settings those documents must be processed with.
+    """
+    from .efa import (
+        EFA_CACHE_NAME,
+        EFA_MODEL_NAME,
+        efa_cache_key,
+        fit_efa,
+        load_efa_cache,
+        model_from_result,
+        prepare_efa,
+        save_efa_cache,
+        save_efa_model,
+        write_efa_artifacts,
+        write_scree_plot,
+    )
+
+    for name in MODELING_OUTPUTS:
+        # Outputs of an earlier fit would no longer match docs.csv/vocabulary.csv or the new settings
+        (output_dir / name).unlink(missing_ok=True)
+    cache_path = output_dir / EFA_CACHE_NAME
+    key = efa_cache_key(X, features, EFA_WEIGHTING)
+    inputs = load_efa_cache(cache_path, key)
+    cache_hit = inputs is not None
+    if inputs is None:
+        inputs = prepare_efa(X, key)
+        save_efa_cache(cache_path, inputs)
+    logging.info("EFA cache %s (%s)", "hit" if cache_hit else "miss", cache_path)
+    efa = fit_efa(X, n_factors=args.n_factors, rotation=args.rotation, inputs=inputs)
+    paths = write_efa_artifacts(output_dir, efa, features, doc_ids)
+    model = model_from_result(efa, features, {"weighting": EFA_WEIGHTING, "preprocessing": preprocessing, "cache_key": key})
+    paths = (*paths, save_efa_model(output_dir / EFA_MODEL_NAME, model))
+    scree_path = None
+    if importlib.util.find_spec("matplotlib") is not None:
+        scree_path = write_scree_plot(output_dir / f"scree_plot.{args.plot_format}", efa.eigenvalues, args.n_factors)
+    else:
+        logging.warning("matplotlib is not installed; scree plot skipped")
+    modeling = {
+        "eigenvalues": [round(float(x), 6) for x in efa.eigenvalues],
+        "ss_loadings": [round(float(x), 6) for x in efa.ss_loadings],
+        "cumulative_var": [round(float(x), 6) for x in efa.cumulative_var],
+        "extraction": {"iterations": efa.extraction_iterations, "converged": efa.extraction_converged},
+        "rotation": {"iterations": efa.rotation_iterations, "converged": efa.rotation_converged},
+        "cache": {"path": str(cache_path), "hit": cache_hit, "key": key},
+    }
+    return efa, paths, scree_path, modeling
+
+
+def _preprocessing_config(args: argparse.Namespace, content_pos: List[str]) -> Dict[str, object]:
+    return {
+        "language": "en",
+        "spacy_model": "en_core_web_sm",
+        "keep_stopwords": bool(args.keep_stopwords),
+        "content_pos": content_pos,
+        "lowercase": bool(args.lowercase),
+        "batch_size": int(args.batch_size),
+        "n_process": int(args.n_process),
+        "pipeline_profile": args.pipeline_profile,
+        "chunk_chars": int(args.chunk_chars),
+        "cache_dir": args.cache_dir,
+    }
+
+
+def _modeling_config(args: argparse.Namespace) -> Dict[str, object]:
+    return {
+        "method": "efa",
+        "extraction": "principal_axis",
+        "rotation": args.rotation,
+        "n_factors": int(args.n_factors),
+        "weighting": EFA_WEIGHTING,
+    }
+
+
+def _modeling_artifacts(efa, paths, scree_path) -> Dict[str, Dict[str, object]]:
+    loadings_csv, scores_csv, explained_csv, model_npz = paths
+    return {
+        "efa_model": {"path": str(model_npz), "format": "npz"},
+        "factors_loadings_csv": {"path": str(loadings_csv), "shape": list(efa.loadings.shape)},
+        "factors_scores_csv": {"path": str(scores_csv), "shape": list(efa.scores.shape)},
+        "explained_variance_csv": {"path": str(explained_csv)},
+        "scree_plot": {"path": str(scree_path) if scree_path else None},
+    }
+
+
+def _refit(args: argparse.Namespace, output_dir: Path) -> int:
+    """--refit: EFA only, from counts_norm.npz, vocabulary.csv and docs.csv of an earlier --features run."""
+    needed = [output_dir / n for n in ("counts_norm.npz", "vocabulary.csv", "docs.csv", "run_poc.json")]
+    missing = [str(p) for p in needed if not p.exists()]
+    if missing:
+        logging.error("Refit needs an earlier --features run in %s; missing %s", output_dir, ", ".join(missing))
+        print(f"ERROR: --refit needs the artefacts of a --features run in {output_dir} (missing: {', '.join(missing)}).",
+              file=sys.stderr)
+        return 1
+    if any(importlib.util.find_spec(m) is None for m in ("numpy", "scipy")):
+        logging.error("Preflight failed: numpy/scipy not installed")
+        print("ERROR: --refit requires numpy and scipy.", file=sys.stderr)
+        return 3
+    import scipy.sparse as sp
+
+    t0, cpu0 = time.perf_counter(), time.process_time()
+    X = sp.load_npz(output_dir / "counts_norm.npz").tocsr()
+    with (output_dir / "vocabulary.csv").open("r", encoding="utf-8", newline="") as f:
+        features = [(r["lemma"], r["pos"]) for r in csv.DictReader(f)]
+    with (output_dir / "docs.csv").open("r", encoding="utf-8", newline="") as f:
+        doc_ids = [r["doc_id"] for r in csv.DictReader(f)]
+    with (output_dir / "run_poc.json").open("r", encoding="utf-8") as f:
+        preprocessing = json.load(f).get("config_snapshot", {}).get("preprocessing", {})
+    if X.shape != (len(doc_ids), len(features)):
+        logging.error("counts_norm.npz is %dx%d but docs.csv/vocabulary.csv have %d/%d rows",
+                      X.shape[0], X.shape[1], len(doc_ids), len(features))
+        print("ERROR: counts_norm.npz does not match docs.csv/vocabulary.csv; re-run with --features.", file=sys.stderr)
+        return 1
+    try:
+        efa, paths, scree_path, modeling = _run_efa(args, output_dir, X, features, doc_ids, preprocessing)
+    except ValueError as e:
+        logging.error("EFA failed: %s", e)
+        print(f"ERROR: EFA failed: {e}", file=sys.stderr)
+        return 3
+    t_model = time.perf_counter() - t0
+    artifacts = _modeling_artifacts(efa, paths, scree_path)
+    add_artifact_digests(artifacts)
+    instr = Instrumentation()
+    instr.record("modeling", t_model, time.process_time() - cpu0, docs=X.shape[0])
+    instr.cache("efa", int(modeling["cache"]["hit"]), int(not modeling["cache"]["hit"]))
+    run_json = update_run_poc_json(output_dir, {
+        "config_snapshot": {"modeling": _modeling_config(args)},
+        "artifacts": artifacts,
+        "timings_sec": {"modeling": round(t_model, 3)},
+        "modeling": modeling,
+        # Kept apart from the stages of the run that produced the matrices
+        "instrumentation": {"refit": instr.summary()},
+    })
+    print(f"Refit {args.n_factors} factors ({args.rotation}) on {X.shape[0]} docs x {X.shape[1]} features "
+          f"in {t_model:.2f}s (EFA cache {'hit' if modeling['cache']['hit'] else 'miss'}). Updated {run_json}.")
+    return 0
 
 
 def main(argv: List[str] | None = None) -> int:
-    args = parse_args(argv or sys.argv[1:])
-    input_dir = Path(args.input)
+    return _run(parse_args(argv or sys.argv[1:]))
+
+
+def _run(args: argparse.Namespace) -> int:
+    if args.efa or args.frozen_vocab:
+        args.features = True
     output_dir = Path(args.output)
     log_path = setup_logging(output_dir, level=args.log_level)
+    if args.refit:
+        return _refit(args, output_dir)
+    input_dir = Path(args.input)
 
     started_at = datetime.utcnow().isoformat(timespec="seconds") + "Z"
     logging.info("PoC run started at %s", started_at)
+    instr = Instrumentation(trace=args.trace)
 
     include_patterns = [p.strip() for p in args.include_patterns.split(",") if p.strip()]
     exclude_patterns = [p.strip() for p in args.exclude_patterns.split(",") if p.strip()]
     content_pos = [p.strip().upper() for p in args.content_pos.split(",") if p.strip()]
 
-    # Preflight: spaCy + model
-    try:
-        spacy_version, model_name = preflight_spacy("en_core_web_sm")
-    except Exception as e:
-        logging.error("Preflight failed: %s", e)
-        print("ERROR: spaCy model 'en_core_web_sm' not available. Please enable it in your environment.", file=sys.stderr)
-        return 3
+    # Preflight: spaCy + model (not needed for --dry-run, which never tags text)
+    if not args.dry_run:
+        try:
+            with instr.stage("preflight"):
+                spacy_version, model_name = preflight_spacy("en_core_web_sm", args.pipeline_profile)
+        except Exception as e:
+            logging.error("Preflight failed: %s", e)
+            print("ERROR: spaCy model 'en_core_web_sm' not available. Please enable it in your environment.", file=sys.stderr)
+            return 3
+        missing = [m for m in ("numpy", "scipy") if args.features and importlib.util.find_spec(m) is None]
+        if missing:
+            logging.error("Preflight failed: %s not installed", ", ".join(missing))
+            print(f"ERROR: --features/--efa require {' and '.join(missing)}.", file=sys.stderr)
+            return 3
+        if args.tokens_parquet and importlib.util.find_spec("pyarrow") is None:
+            logging.error("Preflight failed: pyarrow is not installed")
+            print("ERROR: --tokens-parquet requires pyarrow. Install it or drop the flag.", file=sys.stderr)
+            return 3
+        frozen = None
+        if args.frozen_vocab:
+            from .features import load_frozen_vocabulary
 
-    # Ingestion
-    t0 = time.perf_counter()
-    try:
-        docs, errors = ingest_corpus(
-            input_dir=input_dir,
-            encoding=args.encoding,
-            include_patterns=include_patterns,
-            exclude_patterns=exclude_patterns,
-            fail_on_decode_error=args.fail_on_decode_error,
-        )
-    except UnicodeDecodeError as e:
-        logging.error("Decoding error with --fail-on-decode-error: %s", e)
-        print("ERROR: Decoding failed. Try --encoding utf-8 or --fail-on-decode-error=false to skip bad files.", file=sys.stderr)
-        return 2
-    t_ing = time.perf_counter() - t0
+            try:
+                frozen = load_frozen_vocabulary(Path(args.frozen_vocab))
+                frozen_sha256 = hashlib.sha256(Path(args.frozen_vocab).read_bytes()).hexdigest()
+            except (OSError, KeyError, ValueError) as e:
+                logging.error("Cannot load frozen vocabulary %s: %s", args.frozen_vocab, e)
+                print(f"ERROR: Cannot load --frozen-vocab {args.frozen_vocab}: {e}", file=sys.stderr)
+                return 1
+        # Anything that changes per-document rows invalidates the manifest for incremental runs
+        manifest_settings = {
+            "corpus_dir": str(input_dir),
+            "encoding": args.encoding,
+            "content_pos": content_pos,
+            "lowercase": bool(args.lowercase),
+            "keep_stopwords": bool(args.keep_stopwords),
+            "annotator": annotation_namespace("en_core_web_sm", args.pipeline_profile, args.chunk_chars),
+        }
+        if frozen is not None:
+            # tokens.csv only holds the frozen columns, so its rows depend on the vocabulary file
+            manifest_settings["frozen_vocabulary"] = frozen_sha256
+
+    # Incremental planning: unchanged files (same size + mtime) are not even read
+    previous: Dict[str, ManifestEntry] = {}
+    scanned = None
+    plan = None
+    if args.incremental and not args.dry_run:
+        previous = load_manifest(output_dir, manifest_settings) or {}
+        if previous:
+            scanned = scan_candidate_files(input_dir, include_patterns, exclude_patterns)
+            logging.info("Discovered %d candidate files", len(scanned))
+            plan = plan_incremental(scanned, previous)
+            logging.info(
+                "Incremental run: unchanged=%d, to_read=%d, removed=%d",
+                len(plan.unchanged), len(plan.to_read), len(plan.removed),
+            )
+        else:
+            logging.warning("No usable manifest in %s; running a full pass", output_dir)
+
+    # Ingestion (streamed: files are read lazily as preprocessing consumes them)
+    ingest = IngestionStats()
+    docs = iter_corpus(
+        input_dir=input_dir,
+        encoding=args.encoding,
+        include_patterns=include_patterns,
+        exclude_patterns=exclude_patterns,
+        fail_on_decode_error=args.fail_on_decode_error,
+        stats=ingest,
+        paths=plan.to_read if plan is not None else None,
+        read_workers=args.read_workers,
+    )
     if args.dry_run:
-        for d in docs[:10]:
-            logging.info("DRY-RUN doc: %s (%s)", d.doc_id, d.category)
-        cat_counts = defaultdict(int)
-        for d in docs:
-            cat_counts[d.category] += 1
-        for cat in sorted(cat_counts):
-            logging.info("DRY-RUN category: %s = %d", cat, cat_counts[cat])
-        logging.info("DRY-RUN: scanned=%d processed=%d errors=%d", len(docs) + len(errors), len(docs), len(errors))
+        try:
+            for i, d in enumerate(docs):
+                if i < 10:
+                    logging.info("DRY-RUN doc: %s (%s)", d.doc_id, d.category)
+        except UnicodeDecodeError as e:
+            return _decode_error_exit(e)
+        for cat in sorted(ingest.categories):
+            logging.info("DRY-RUN category: %s = %d", cat, ingest.categories[cat])
+        logging.info("DRY-RUN: scanned=%d processed=%d errors=%d", ingest.scanned, ingest.processed, len(ingest.errors))
         print("Dry run complete. No artifacts written.")
         return 0
 
-    # Preprocessing
-    t1 = time.perf_counter()
-    nlp = build_pipeline("en_core_web_sm", add_sentencizer=True)
-
-    docs_rows: List[Dict[str, object]] = []
-    tokens_rows: List[Dict[str, object]] = []
+    # Documents whose text hash matches the manifest are reused rather than processed
+    manifest_entries: Dict[str, ManifestEntry] = dict(plan.unchanged) if plan is not None else {}
+    reused: Dict[str, ManifestEntry] = {}
+    docs = track_manifest(docs, previous, manifest_entries, reused)
 
-    for d in docs:
-        n_sentences, n_tokens_raw, n_tokens_content, counts, n_types_content = content_counts_for_doc(
+    # Preprocessing: counts carry interned (lemma, pos) ids; strings are looked up only by the writers.
+    # With --frozen-vocab the ids are the frozen columns and other lemmas are dropped per token.
+    t1 = time.perf_counter()
+    cpu1 = time.process_time()
+    interner = frozen[0] if frozen is not None else LemmaPosInterner()
+    cache = None
+    if args.cache_dir:
+        cache = AnnotationCache(
+            Path(args.cache_dir),
+            namespace=annotation_namespace("en_core_web_sm", args.pipeline_profile, args.chunk_chars),
+            max_bytes=args.cache_max_mb * 1024 * 1024,
+        )
+    if args.n_process > 1:
+        results = iter_content_counts_parallel(
+            docs=docs,
+            content_pos=content_pos,
+            lowercase=args.lowercase,
+            keep_stopwords=args.keep_stopwords,
+            batch_size=args.batch_size,
+            n_process=args.n_process,
+            profile=args.pipeline_profile,
+            cache=cache,
+            chunk_chars=args.chunk_chars,
+            interner=interner,
+        )
+    else:
+        nlp = get_pipeline("en_core_web_sm", args.pipeline_profile)
+        results = iter_content_counts(
             nlp=nlp,
-            text=d.text,
+            docs=docs,
             content_pos=content_pos,
             lowercase=args.lowercase,
             keep_stopwords=args.keep_stopwords,
+            batch_size=args.batch_size,
+            cache=cache,
+            chunk_chars=args.chunk_chars,
+            interner=interner,
         )
-        docs_rows.append(
-            {
+
+    def doc_rows():
+        for d, counts in results:
+            row = {
                 "doc_id": d.doc_id,
                 "category": d.category,
                 "path": str(d.path),
                 "n_chars": d.n_chars,
-                "n_sentences": n_sentences,
-                "n_tokens_raw": n_tokens_raw,
-                "n_tokens_content": n_tokens_content,
-                "n_types_content": n_types_content,
+                "n_sentences": counts.n_sentences,
+                "n_tokens_raw": counts.n_tokens_raw,
+                "n_tokens_content": counts.n_tokens_content,
+                "n_types_content": counts.n_types_content,
                 "encoding_used": d.encoding_used,
                 "warnings": "",
             }
-        )
-        for (lemma, pos), count in counts.items():
-            tokens_rows.append({"doc_id": d.doc_id, "lemma": lemma, "pos": pos, "count": int(count)})
+            yield row, counts
+
+    rows = doc_rows()
+    if plan is not None:
+        # Unchanged documents are copied from the previous docs.csv/tokens.csv while the new ones are written
+        rows = merge_incremental(output_dir, rows, manifest_entries, required=plan.unchanged, interner=interner)
 
-    t_pre = time.perf_counter() - t1
+    # Artifacts are streamed: each document's rows go to disk as soon as it is processed
+    categories = set()
+    dfm = None
+    if args.features:
+        from .features import DfmBuilder  # numpy/scipy only when the feature stage runs
 
-    # Artifacts
-    docs_csv = write_docs_csv(output_dir, docs_rows)
-    tokens_csv = write_tokens_csv(output_dir, tokens_rows)
+        dfm = DfmBuilder()
+    t_exp = 0.0
+    cpu_exp = 0.0
+    n_tokens = 0
+    instr.stream_started()
+    try:
+        with contextlib.ExitStack() as stack:
+            docs_w = stack.enter_context(DocsCsvWriter(output_dir))
+            tokens_w = stack.enter_context(TokensCsvWriter(output_dir))
+            parquet_w = None
+            if args.tokens_parquet:
+                parquet_w = stack.enter_context(TokensParquetWriter(output_dir, row_group_size=args.parquet_row_group))
+            elif (output_dir / "tokens.parquet").exists():
+                # A tokens.parquet left by an earlier run would no longer match tokens.csv
+                (output_dir / "tokens.parquet").unlink()
+            for doc_row, counts in rows:
+                t2, c2 = time.perf_counter(), time.process_time()
+                docs_w.write_row(doc_row)
+                tokens_w.write_counts(str(doc_row["doc_id"]), counts, interner)
+                if parquet_w is not None:
+                    parquet_w.write_counts(docs_w.rows - 1, counts, interner)
+                categories.add(str(doc_row["category"]))
+                if dfm is not None:
+                    dfm.add(counts, str(doc_row["category"]), str(doc_row["doc_id"]))
+                t_exp += time.perf_counter() - t2
+                cpu_exp += time.process_time() - c2
+                n_tokens += counts.n_tokens_raw
+                instr.batch_done(docs_w.rows, n_tokens, args.batch_size, ingest.seconds, t_exp)
+            t2, c2 = time.perf_counter(), time.process_time()
+    except UnicodeDecodeError as e:
+        return _decode_error_exit(e)
+    except ManifestMismatch as e:
+        # The writers were aborted, so the previous artefacts are intact; redo everything from the corpus
+        logging.warning("Incremental merge failed (%s); running a full pass", e)
+        args.incremental = False
+        return _run(args)
+    t_exp += time.perf_counter() - t2
+    cpu_exp += time.process_time() - c2
+    instr.stream_finished(docs_w.rows, n_tokens, ingest.seconds, t_exp)
+    docs_csv, tokens_csv = docs_w.path, tokens_w.path
+    tokens_parquet = parquet_w.path if parquet_w is not None else None
+
+    # Reading and writing are interleaved with tagging; split the wall time using their own clocks.
+    t_ing = ingest.seconds
+    t_pre = max(time.perf_counter() - t1 - t_ing - t_exp, 0.0)
+    instr.record("stream", time.perf_counter() - t1, time.process_time() - cpu1, docs_w.rows, n_tokens, start=t1)
+    instr.record("ingestion", t_ing, docs=ingest.processed)
+    instr.record("preprocessing", t_pre, docs=ingest.processed, tokens=n_tokens)
+    errors = ingest.errors
+
+    if plan is not None:
+        n_new = ingest.processed - len(reused)
+        logging.info(
+            "Incremental merge: processed=%d, reused=%d, removed=%d",
+            n_new, docs_w.rows - n_new, len(plan.removed),
+        )
+
+    t2, c2 = time.perf_counter(), time.process_time()
     errors_csv = write_errors_csv(output_dir, [
         {"path": str(p), "stage": stg, "error_type": "UnicodeDecodeError", "message": msg}
         for (p, stg, msg) in [(e[0], e[1], e[2]) if len(e) == 3 else (e[0], "ingestion", str(e[1])) for e in errors]
     ])
+    instr.span("export", t2, time.perf_counter(), file="errors.csv")
+    t_exp += time.perf_counter() - t2
+    cpu_exp += time.process_time() - c2
+    instr.record("export", t_exp, cpu_exp, docs=docs_w.rows)
+
+    # Features: select K columns from the streamed full-vocabulary CSR and normalise per thousand tokens
+    feature_paths = None
+    with instr.stage("features") as stage:
+        if dfm is not None:
+            from .features import build_features, frozen_features, write_feature_artifacts
+            from .keywords import DEFAULT_TIE_BREAK
+
+            if frozen is not None:
+                features = frozen_features(dfm, interner, frozen[1])
+            else:
+                features = build_features(dfm, interner, k=args.k, selection=args.selection)
+            feature_paths = write_feature_artifacts(output_dir, features, interner)
+            stage["docs"] = features.counts_raw.shape[0]
+        else:
+            # Matrices left by an earlier run would no longer match docs.csv
+            for name in ("vocabulary.csv", "counts_raw.npz", "counts_norm.npz"):
+                (output_dir / name).unlink(missing_ok=True)
+
+    # Modelling: EFA on the per-thousand matrix; rows follow docs.csv, loadings follow vocabulary.csv
+    efa = None
+    modeling = None
+    with instr.stage("modeling") as stage:
+        if args.efa:
+            try:
+                efa, efa_paths, scree_path, modeling = _run_efa(
+                    args, output_dir, features.counts_norm,
+                    [interner.key(int(i)) for i in features.vocab_ids], dfm.doc_ids,
+                    _preprocessing_config(args, content_pos),
+                )
+            except ValueError as e:
+                logging.error("EFA failed: %s", e)
+                print(f"ERROR: EFA failed: {e}", file=sys.stderr)
+                return 3
+            stage["docs"] = efa.scores.shape[0]
+        else:
+            for name in MODELING_OUTPUTS:
+                # Outputs of an earlier run would no longer match docs.csv/vocabulary.csv
+                (output_dir / name).unlink(missing_ok=True)
 
     # Environment + Provenance
     environment = {
@@ -163,40 +611,97 @@ def main(argv: List[str] | None = None) -> int:
             "encoding": args.encoding,
             "include_patterns": include_patterns,
             "exclude_patterns": exclude_patterns,
+            "read_workers": int(args.read_workers),
         },
-        "preprocessing": {
-            "language": "en",
-            "keep_stopwords": bool(args.keep_stopwords),
-            "content_pos": content_pos,
-            "lowercase": bool(args.lowercase),
-            "batch_size": int(args.batch_size),
-        },
+        "preprocessing": _preprocessing_config(args, content_pos),
+        "features": {
+            "selection": features.selection,
+            "k": int(features.counts_raw.shape[1]) if frozen is not None else int(args.k),
+            "tie_break": list(DEFAULT_TIE_BREAK),
+            "frozen_vocabulary": args.frozen_vocab,
+        } if dfm is not None else {},
+        "modeling": _modeling_config(args) if efa is not None else {},
         "output": {"output_dir": str(output_dir)},
     }
     inputs = {
-        "documents_scanned": len(docs) + len(errors),
-        "documents_processed": len(docs),
-        "categories": sorted({d.category for d in docs}),
+        "documents_scanned": len(scanned) if scanned is not None else ingest.scanned,
+        "documents_processed": docs_w.rows,
+        "categories": sorted(categories),
+        "bytes_read": ingest.bytes_read,
+        "encodings": dict(sorted(ingest.encodings.items())),
     }
+    if plan is not None:
+        inputs["incremental"] = {
+            "unchanged": docs_w.rows - (ingest.processed - len(reused)),
+            "processed": ingest.processed - len(reused),
+            "removed": len(plan.removed),
+        }
     artifacts = {
         "docs_csv": {"path": str(docs_csv)},
         "tokens_table": {"path": str(tokens_csv)},
         "errors_csv": {"path": str(errors_csv) if errors_csv else None},
         "log_file": {"path": str(log_path)},
+        "manifest": {"path": str(output_dir / "manifest.json")},
     }
+    if feature_paths is not None:
+        vocab_csv, raw_npz, norm_npz = feature_paths
+        artifacts["vocabulary_csv"] = {"path": str(vocab_csv), "k": int(features.counts_raw.shape[1])}
+        artifacts["counts_raw_npz"] = {"path": str(raw_npz)}
+        artifacts["counts_norm_npz"] = {"path": str(norm_npz)}
+    if efa is not None:
+        artifacts.update(_modeling_artifacts(efa, efa_paths, scree_path))
+    if tokens_parquet is not None:
+        artifacts["tokens_parquet"] = {
+            "path": str(tokens_parquet),
+            "format": "parquet",
+            "row_groups": parquet_w.row_groups,
+            "doc_index": "0-based row of docs.csv",
+        }
     timings_sec = {
         "ingestion": round(t_ing, 3),
         "preprocessing": round(t_pre, 3),
-        "export": 0.0,
+        "features": instr.stages["features"]["wall_sec"],
+        "modeling": instr.stages["modeling"]["wall_sec"],
+        "export": round(t_exp, 3),
     }
-    run_json = write_run_poc_json(output_dir, environment, config_snapshot, inputs, artifacts, timings_sec)
+    # Digests of the tables as streamed, so a later --incremental run can tell if they were rewritten
+    write_manifest(output_dir, manifest_settings, manifest_entries.values(),
+                   {"docs.csv": artifact_digest(docs_csv), "tokens.csv": artifact_digest(tokens_csv)})
+    cache_stats: Dict[str, object] = {"enabled": False}
+    if cache is not None:
+        cache_stats = {"enabled": True, **cache.stats()}
+        logging.info("Annotation cache: hits=%d misses=%d writes=%d evictions=%d",
+                     cache.hits, cache.misses, cache.writes, cache.evictions)
+    if cache is not None:
+        instr.cache("annotation", cache.hits, cache.misses, writes=cache.writes, evictions=cache.evictions)
+    if plan is not None:
+        # Documents taken from the previous run (unchanged files or same text hash) vs processed again
+        n_new = ingest.processed - len(reused)
+        instr.cache("incremental", docs_w.rows - n_new, n_new)
+    if modeling is not None:
+        hit = bool(modeling["cache"]["hit"])
+        instr.cache("efa", int(hit), int(not hit))
+    trace_path = None
+    if args.trace:
+        trace_path = instr.write_chrome_trace(output_dir / TRACE_NAME)
+        artifacts["trace_json"] = {"path": str(trace_path), "format": "chrome_trace"}
+    else:
+        # A trace left by an earlier run would describe that run
+        (output_dir / TRACE_NAME).unlink(missing_ok=True)
+    # Digests recorded while the writers streamed their bytes; other files are hashed here.
+    # The log is still being appended to, so it gets no digest.
+    add_artifact_digests(artifacts, skip=("log_file",))
+    run_json = write_run_poc_json(
+        output_dir, environment, config_snapshot, inputs, artifacts, timings_sec,
+        cache=cache_stats, modeling=modeling, instrumentation=instr.summary(trace_path),
+    )
 
     total = timings_sec["ingestion"] + timings_sec["preprocessing"]
     # Final Action Items in log
     logging.info("Action Items:\n- Review %s\n- Inspect %s and %s\n- Check log at %s",
                  run_json, docs_csv, tokens_csv, log_path)
     print(
-        f"Processed {len(docs)} docs across {len(inputs['categories'])} categories in {total:.2f}s. "
+        f"Processed {docs_w.rows} docs across {len(inputs['categories'])} categories in {total:.2f}s. "
         f"Artifacts at {output_dir}. See logs/poc_run.log."
     )
     return 0
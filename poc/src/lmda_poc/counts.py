@@ -0,0 +1,117 @@
+# Python
+from __future__ import annotations
+import heapq
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+class LemmaPosInterner:
+    """
+    Corpus-wide (lemma, pos) <-> integer id table.
+
+    Ids are dense and assigned in first-seen order. Per-document counts only
+    hold ids; strings are looked up again when artefacts are written. A
+    frozen interner (e.g. a frozen vocabulary) is not extended by counting:
+    pairs it does not know are dropped.
+    """
+
+    __slots__ = ("_ids", "lemmas", "pos", "frozen")
+
+    def __init__(self):
+        self._ids: Dict[Tuple[str, str], int] = {}
+        self.lemmas: List[str] = []
+        self.pos: List[str] = []
+        self.frozen = False
+
+    def __len__(self) -> int:
+        return len(self.lemmas)
+
+    def intern(self, lemma: str, pos: str) -> int:
+        key = (lemma, pos)
+        i = self._ids.get(key)
+        if i is None:
+            i = len(self.lemmas)
+            self._ids[key] = i
+            self.lemmas.append(lemma)
+            self.pos.append(pos)
+        return i
+
+    def get(self, lemma: str, pos: str) -> Optional[int]:
+        return self._ids.get((lemma, pos))
+
+    def key(self, i: int) -> Tuple[str, str]:
+        return self.lemmas[i], self.pos[i]
+
+    def freeze(self) -> "LemmaPosInterner":
+        self.frozen = True
+        return self
+
+
+class DocCounts:
+    """
+    Content-word counts of one document as parallel array('I') id/count columns.
+
+    ids index a LemmaPosInterner and are kept in first-occurrence order,
+    which is the row order of tokens.csv.
+    """
+
+    __slots__ = ("n_sentences", "n_tokens_raw", "n_tokens_content", "n_types_content", "ids", "counts")
+
+    def __init__(
+            self,
+            n_sentences: int,
+            n_tokens_raw: int,
+            n_tokens_content: int,
+            ids: array,
+            counts: array,
+    ):
+        self.n_sentences = n_sentences
+        self.n_tokens_raw = n_tokens_raw
+        self.n_tokens_content = n_tokens_content
+        self.n_types_content = len(ids)
+        self.ids = ids
+        self.counts = counts
+
+    @classmethod
+    def from_items(
+            cls,
+            items: Iterable[Tuple[str, str, object]],
+            interner: LemmaPosInterner,
+            n_sentences: int = 0,
+            n_tokens_raw: int = 0,
+            n_tokens_content: Optional[int] = None,
+    ) -> "DocCounts":
+        """Build from (lemma, pos, count) rows, e.g. rows of an existing tokens.csv."""
+        ids = array("I")
+        counts = array("I")
+        for lemma, pos, count in items:
+            ids.append(interner.intern(lemma, pos))
+            counts.append(int(count))
+        if n_tokens_content is None:
+            n_tokens_content = sum(counts)
+        return cls(n_sentences, n_tokens_raw, n_tokens_content, ids, counts)
+
+    def items(self, interner: LemmaPosInterner) -> Iterator[Tuple[str, str, int]]:
+        """(lemma, pos, count) rows; the only place ids are turned back into strings."""
+        lemmas, pos = interner.lemmas, interner.pos
+        for i, c in zip(self.ids, self.counts):
+            yield lemmas[i], pos[i], c
+
+    def to_dict(self, interner: LemmaPosInterner) -> Dict[Tuple[str, str], int]:
+        return {(lemma, pos): c for lemma, pos, c in self.items(interner)}
+
+
+def add_counts(totals: array, counts: DocCounts) -> None:
+    """Accumulate a document into corpus totals indexed by interner id (grown as needed)."""
+    if counts.ids:
+        need = max(counts.ids) + 1 - len(totals)
+        if need > 0:
+            totals.extend([0] * need)
+    for i, c in zip(counts.ids, counts.counts):
+        totals[i] += c
+
+
+def top_counts(totals: array, interner: LemmaPosInterner, n: int) -> List[Tuple[Tuple[str, str], int]]:
+    """The n largest totals as ((lemma, pos), count), ties broken by id (first seen)."""
+    top = heapq.nlargest(n, range(len(totals)), key=totals.__getitem__)
+    return [(interner.key(i), totals[i]) for i in top if totals[i] > 0]
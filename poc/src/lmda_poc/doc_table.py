@@ -0,0 +1,80 @@
+# Python
+from __future__ import annotations
+from array import array
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .counts import DocCounts
+
+DOC_TABLE_COLUMNS = ["doc_id", "category", "n_sentences", "n_tokens_raw", "n_tokens_content", "n_types_content"]
+COUNT_COLUMNS = DOC_TABLE_COLUMNS[2:]
+
+
+class DocTable:
+    """
+    Per-document summary for the GUI results table, held as columns instead of row dicts.
+
+    doc_id strings sit in one list, categories are integer codes into
+    categories and the counts are array('q') columns, so 100k documents cost
+    a few MB. Sorting and category filtering (view) produce an index array of
+    rows with NumPy; a Qt model then formats only the cells it paints.
+    """
+
+    __slots__ = ("doc_ids", "categories", "_codes_by_name", "_codes", "_counts", "_doc_rank")
+
+    def __init__(self):
+        self.doc_ids: List[str] = []
+        self.categories: List[str] = []
+        self._codes_by_name: Dict[str, int] = {}
+        self._codes = array("I")
+        self._counts = {name: array("q") for name in COUNT_COLUMNS}
+        self._doc_rank: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.doc_ids)
+
+    def append(self, doc_id: str, category: str, counts: DocCounts) -> None:
+        code = self._codes_by_name.get(category)
+        if code is None:
+            code = self._codes_by_name[category] = len(self.categories)
+            self.categories.append(category)
+        self.doc_ids.append(doc_id)
+        self._codes.append(code)
+        for name in COUNT_COLUMNS:
+            self._counts[name].append(getattr(counts, name))
+        self._doc_rank = None
+
+    def value(self, row: int, column: str) -> object:
+        if column == "doc_id":
+            return self.doc_ids[row]
+        if column == "category":
+            return self.categories[self._codes[row]]
+        return self._counts[column][row]
+
+    def _sort_key(self, column: str) -> np.ndarray:
+        # Integer keys for every column, so descending order is a negation and ties keep document order
+        if column == "doc_id":
+            if self._doc_rank is None:
+                self._doc_rank = np.empty(len(self), dtype=np.int64)
+                self._doc_rank[np.argsort(np.array(self.doc_ids), kind="stable")] = np.arange(len(self))
+            return self._doc_rank
+        if column == "category":
+            label_rank = np.empty(len(self.categories), dtype=np.int64)
+            label_rank[np.argsort(np.array(self.categories), kind="stable")] = np.arange(len(self.categories))
+            return label_rank[np.frombuffer(self._codes, dtype=np.uint32)] if len(self) else np.zeros(0, np.int64)
+        return np.frombuffer(self._counts[column], dtype=np.int64)
+
+    def view(self, sort_column: Optional[str] = None, descending: bool = False,
+             category: Optional[str] = None) -> np.ndarray:
+        """Row indices of the documents in category (all if None), ordered by sort_column (document order if None)."""
+        if category is None:
+            rows = np.arange(len(self))
+        elif category in self._codes_by_name:
+            rows = np.flatnonzero(np.frombuffer(self._codes, dtype=np.uint32) == self._codes_by_name[category])
+        else:
+            rows = np.zeros(0, dtype=np.int64)
+        if sort_column is not None and len(rows):
+            keys = self._sort_key(sort_column)[rows]
+            rows = rows[np.argsort(-keys if descending else keys, kind="stable")]
+        return rows
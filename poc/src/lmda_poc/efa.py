@@ -0,0 +1,500 @@
+# Python
+from __future__ import annotations
+import csv
+import hashlib
+import json
+import logging
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import scipy.linalg as la
+import scipy.sparse as sp
+from scipy.sparse.linalg import ArpackNoConvergence, eigsh
+
+from .io_artifacts import atomic_output
+
+# modeling.* in config.example.yaml (method: efa, rotation: varimax, n_factors: 6)
+DEFAULT_N_FACTORS = 6
+ROTATIONS = ("varimax", "none")
+PAF_TOL = 1e-6             # max change in communalities between principal axis iterations
+PAF_MAX_ITER = 200
+VARIMAX_TOL = 1e-8         # relative change of the varimax criterion
+VARIMAX_MAX_ITER = 500
+CORR_CHUNK_ROWS = 50_000   # documents per X^T X block when building the correlation matrix
+GRAM_DENSE_DENSITY = 0.1   # above this block density X_b^T X_b is cheaper with BLAS on small dense slices
+GRAM_DENSE_ROWS = 2048     # rows per dense slice in that case
+SCREE_EIGENVALUES = 30     # leading eigenvalues of the correlation matrix kept for the scree plot
+LANCZOS_MAX_FRACTION = 0.25  # eigsh for N < K / 4 leading eigenpairs, else a subset of a dense eigh
+R_COND_MAX = 1e10          # correlation matrices worse conditioned than this get the pseudo-inverse
+EFA_CACHE_FORMAT = 2       # part of the cache key: bump when the cached arrays are computed differently
+EFA_CACHE_NAME = "efa_cache.npz"
+EFA_MODEL_NAME = "efa_model.npz"
+EFA_MODEL_FORMAT = 2  # 2: feature means instead of the precomputed offset
+EXPLAINED_VARIANCE_FIELDS = ["factor", "ss_loadings", "proportion_var", "cumulative_var"]
+
+
+@dataclass
+class EfaResult:
+    loadings: np.ndarray          # K x N rotated loadings (columns factor_1..factor_N)
+    communalities: np.ndarray     # K
+    scores: np.ndarray            # docs x N regression (Thurstone) scores
+    score_weights: np.ndarray     # K x N, applied to standardised features
+    mean: np.ndarray              # K feature means used for standardising
+    std: np.ndarray               # K feature standard deviations (ddof=1)
+    ss_loadings: np.ndarray       # N
+    proportion_var: np.ndarray    # N
+    cumulative_var: np.ndarray    # N
+    eigenvalues: np.ndarray       # leading eigenvalues of the correlation matrix (scree)
+    rotation: str
+    extraction_iterations: int
+    extraction_converged: bool
+    rotation_iterations: int
+    rotation_converged: bool
+
+
+@dataclass
+class EfaInputs:
+    """
+    Everything that does not depend on N or the rotation: the correlation
+    matrix, its inverse (SMC start and score weights), feature means and
+    standard deviations, and all eigenvalues of the correlation matrix.
+    """
+    correlation: np.ndarray
+    r_inv: np.ndarray
+    mean: np.ndarray
+    std: np.ndarray
+    eigenvalues: np.ndarray       # all K, descending
+    key: str = ""
+
+
+def _gram(block: sp.csr_matrix) -> np.ndarray:
+    """Dense K x K X_b^T X_b of a CSR block."""
+    n, k = block.shape
+    if block.nnz <= GRAM_DENSE_DENSITY * n * k:
+        return (block.T @ block).toarray()
+    # Sparse-sparse products grow with nnz per row squared; fairly dense blocks go through BLAS a few rows at a time
+    g = np.zeros((k, k))
+    for start in range(0, n, GRAM_DENSE_ROWS):
+        dense = block[start:start + GRAM_DENSE_ROWS].toarray()
+        g += dense.T @ dense
+    return g
+
+
+def covariance_matrix(X: sp.spmatrix, chunk_rows: Optional[int] = CORR_CHUNK_ROWS) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (K x K sample covariance, K means) of the columns of a sparse docs x K matrix, without densifying it.
+
+    Each block of chunk_rows documents contributes its sparse Gram matrix
+    X_b^T X_b, corrected analytically for the block mean; blocks are then
+    merged with Chan's pairwise update, which avoids the cancellation of a
+    single X^T X - n mean mean^T on large corpora. Apart from K x K arrays,
+    at most GRAM_DENSE_ROWS x K values are ever dense.
+    """
+    X = sp.csr_matrix(X, dtype=np.float64)
+    n_docs, k = X.shape
+    if n_docs < 2:
+        raise ValueError("At least two documents are needed for a covariance matrix")
+    step = n_docs if not chunk_rows else chunk_rows
+    n = 0
+    mean = np.zeros(k)
+    m2 = np.zeros((k, k))
+    for start in range(0, n_docs, step):
+        block = X[start:start + step]
+        nb = block.shape[0]
+        mean_b = np.asarray(block.sum(axis=0)).ravel() / nb
+        m2_b = _gram(block)
+        m2_b -= nb * np.outer(mean_b, mean_b)
+        delta = mean_b - mean
+        total = n + nb
+        m2 += m2_b + np.outer(delta, delta) * (n * nb / total)
+        mean += delta * (nb / total)
+        n = total
+    return m2 / (n - 1), mean
+
+
+def correlation_matrix(
+        X: sp.spmatrix,
+        chunk_rows: Optional[int] = CORR_CHUNK_ROWS,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(K x K correlation, means, standard deviations) of the columns of a sparse docs x K matrix."""
+    cov, mean = covariance_matrix(X, chunk_rows)
+    std = np.sqrt(np.clip(np.diag(cov), 0.0, None))
+    constant = np.flatnonzero(std <= 1e-12 * np.maximum(np.abs(mean), 1.0))
+    if len(constant):
+        raise ValueError(f"{len(constant)} feature column(s) have zero variance across documents: {constant[:10].tolist()}")
+    R = cov / np.outer(std, std)
+    np.fill_diagonal(R, 1.0)
+    return R, mean, std
+
+
+def _inverse(R: np.ndarray, eigenvalues: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    R^-1, or the pseudo-inverse (eigenvalues below max / R_COND_MAX dropped) when R is near-singular.
+
+    la.inv does not fail on a numerically singular R; it returns entries of
+    1e10 and more that ruin the SMCs and score weights, so the condition
+    number is checked from the eigenvalues instead.
+    """
+    if eigenvalues is None:
+        eigenvalues = la.eigvalsh(R, check_finite=False)
+    lo, hi = float(np.min(eigenvalues)), float(np.max(eigenvalues))
+    if lo > hi / R_COND_MAX:
+        return la.inv(R, check_finite=False)
+    logging.warning(
+        "Correlation matrix is near-singular (smallest/largest eigenvalue %.1e / %.1e); using the pseudo-inverse. "
+        "The features are linearly dependent: e.g. when --k keeps every content type each per-thousand row sums "
+        "to 1000. A smaller --k avoids this.", lo, hi,
+    )
+    return np.linalg.pinv(R, rcond=1.0 / R_COND_MAX, hermitian=True)
+
+
+def _centred_product(X: sp.spmatrix, mean: np.ndarray, M: np.ndarray, chunk_rows: int = GRAM_DENSE_ROWS) -> np.ndarray:
+    """
+    (X - mean) @ M for a sparse docs x K matrix, centring chunk_rows dense rows at a time.
+
+    X @ M - mean @ M would keep X sparse, but both terms can be orders of
+    magnitude larger than their difference, which then loses most digits.
+    """
+    X = sp.csr_matrix(X)
+    out = np.empty((X.shape[0], M.shape[1]))
+    for start in range(0, X.shape[0], chunk_rows):
+        out[start:start + chunk_rows] = (X[start:start + chunk_rows].toarray() - mean) @ M
+    return out
+
+
+def _leading_eigh(A: np.ndarray, n: int, v0: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """The n largest eigenpairs of a symmetric matrix, descending."""
+    k = A.shape[0]
+    if n < LANCZOS_MAX_FRACTION * k:
+        # Lanczos needs only matrix-vector products; v0 makes it deterministic and warm-starts PAF iterations
+        try:
+            w, V = eigsh(A, k=n, which="LA", v0=np.ones(k) if v0 is None else v0)
+            order = np.argsort(w)[::-1]
+            return w[order], V[:, order]
+        except ArpackNoConvergence:
+            logging.debug("eigsh did not converge; using a dense eigensolver")
+    w, V = la.eigh(A, subset_by_index=[k - n, k - 1], check_finite=False)
+    return w[::-1], V[:, ::-1]
+
+
+def principal_axis(
+        R: np.ndarray,
+        n_factors: int,
+        r_inv: Optional[np.ndarray] = None,
+        tol: float = PAF_TOL,
+        max_iter: int = PAF_MAX_ITER,
+) -> Tuple[np.ndarray, np.ndarray, int, bool]:
+    """
+    Iterated principal axis factoring: (K x N unrotated loadings, communalities, iterations, converged).
+
+    Communalities start at the squared multiple correlations (1 - 1/diag(R^-1)).
+    Each iteration only needs the N leading eigenpairs of the reduced
+    correlation matrix: Lanczos (eigsh) started from the previous iteration's
+    leading subspace, or a subset of a dense eigh when N is a large part of K.
+    """
+    if r_inv is None:
+        r_inv = _inverse(R)
+    # A pseudo-inverse (singular R) can put the SMCs outside [0, 1]
+    h = np.clip(1.0 - 1.0 / np.diag(r_inv), 0.0, 1.0)
+    reduced = R.copy()
+    converged = False
+    it = 0
+    v0 = None
+    for it in range(1, max_iter + 1):
+        np.fill_diagonal(reduced, h)
+        w, V = _leading_eigh(reduced, n_factors, v0)
+        v0 = V.sum(axis=1)
+        L = V * np.sqrt(np.clip(w, 0.0, None))
+        h_new = np.einsum("ij,ij->i", L, L)
+        delta = np.abs(h_new - h).max()
+        h = h_new
+        if delta < tol:
+            converged = True
+            break
+    if not converged:
+        logging.warning("Principal axis factoring did not converge in %d iterations (last change %.2e)", max_iter, delta)
+    if (h > 1.0).any():
+        logging.warning("Heywood case: %d communalities exceed 1", int((h > 1.0).sum()))
+    return L, h, it, converged
+
+
+def varimax(
+        L: np.ndarray,
+        normalize: bool = True,
+        tol: float = VARIMAX_TOL,
+        max_iter: int = VARIMAX_MAX_ITER,
+) -> Tuple[np.ndarray, np.ndarray, int, bool]:
+    """
+    Varimax rotation: (rotated loadings, N x N rotation matrix, iterations, converged).
+
+    All factor pairs are updated at once through the SVD of the criterion
+    gradient, instead of Kaiser's pairwise planar rotations. With normalize,
+    rows are scaled to unit communality while rotating (Kaiser normalisation).
+    """
+    p, n = L.shape
+    if n < 2:
+        return L.copy(), np.eye(n), 0, True
+    if normalize:
+        norms = np.sqrt(np.einsum("ij,ij->i", L, L))
+        norms[norms == 0] = 1.0
+        A = L / norms[:, None]
+    else:
+        A = L
+    T = np.eye(n)
+    d = 0.0
+    converged = False
+    it = 0
+    for it in range(1, max_iter + 1):
+        B = A @ T
+        G = A.T @ (B ** 3 - B * (np.einsum("ij,ij->j", B, B) / p))
+        u, s, vt = np.linalg.svd(G)
+        T = u @ vt
+        d_old, d = d, s.sum()
+        if d_old and d < d_old * (1 + tol):
+            converged = True
+            break
+    if not converged:
+        logging.warning("Varimax did not converge in %d iterations", max_iter)
+    rotated = A @ T
+    if normalize:
+        rotated *= norms[:, None]
+    return rotated, T, it, converged
+
+
+def _order_and_sign(L: np.ndarray) -> np.ndarray:
+    # Deterministic output: factors by explained variance descending, each with a positive loading sum
+    order = np.argsort(-np.einsum("ij,ij->j", L, L), kind="stable")
+    L = L[:, order]
+    signs = np.where(L.sum(axis=0) < 0, -1.0, 1.0)
+    return L * signs
+
+
+def prepare_efa(X: sp.spmatrix, key: str = "") -> EfaInputs:
+    """The N-independent part of fit_efa, worth caching between refits."""
+    R, mean, std = correlation_matrix(X)
+    eigenvalues = la.eigvalsh(R, check_finite=False)[::-1]
+    return EfaInputs(R, _inverse(R, eigenvalues), mean, std, eigenvalues, key)
+
+
+def efa_cache_key(X: sp.spmatrix, features: Sequence[Tuple[str, str]], weighting: str) -> str:
+    """sha256 of the cache format, the weighting, the vocabulary (lemma/POS in column order) and the matrix itself."""
+    X = sp.csr_matrix(X)
+    h = hashlib.sha256()
+    h.update(f"{EFA_CACHE_FORMAT}\n{weighting}\n{X.shape[0]}x{X.shape[1]}\n".encode("utf-8"))
+    for lemma, pos in features:
+        h.update(f"{lemma}\t{pos}\n".encode("utf-8"))
+    for a in (X.indptr, X.indices, X.data):
+        h.update(np.ascontiguousarray(a).tobytes())
+    return h.hexdigest()
+
+
+def save_efa_cache(path: Path, inputs: EfaInputs) -> Path:
+    with atomic_output(path, binary=True) as f:
+        np.savez(f, key=np.array(inputs.key), correlation=inputs.correlation, r_inv=inputs.r_inv,
+                 mean=inputs.mean, std=inputs.std, eigenvalues=inputs.eigenvalues)
+    logging.info("Wrote %s", path)
+    return path
+
+
+def load_efa_cache(path: Path, key: str) -> Optional[EfaInputs]:
+    """Cached EfaInputs if path exists and was written for key, else None."""
+    if not path.exists():
+        return None
+    try:
+        with np.load(path) as z:
+            if str(z["key"]) != key:
+                logging.info("EFA cache %s is for a different matrix/vocabulary; recomputing", path)
+                return None
+            return EfaInputs(z["correlation"], z["r_inv"], z["mean"], z["std"], z["eigenvalues"], key)
+    except (OSError, KeyError, ValueError) as e:
+        logging.warning("Ignoring unreadable EFA cache %s: %s", path, e)
+        return None
+
+
+def fit_efa(
+        X: sp.spmatrix,
+        n_factors: int = DEFAULT_N_FACTORS,
+        rotation: str = "varimax",
+        inputs: Optional[EfaInputs] = None,
+) -> EfaResult:
+    """
+    EFA on the columns of a docs x K matrix (counts_norm): principal axis
+    extraction, optional varimax, regression factor scores. Pass inputs
+    from prepare_efa (or load_efa_cache) to skip the correlation step.
+    """
+    n_docs, k = X.shape
+    if rotation not in ROTATIONS:
+        raise ValueError(f"Unknown rotation {rotation!r}; expected one of {', '.join(ROTATIONS)}")
+    if not 1 <= n_factors <= k or n_factors > n_docs - 1:
+        raise ValueError(f"n_factors={n_factors} needs 1 <= N <= K ({k}) and N <= docs - 1 ({n_docs - 1})")
+    if inputs is None:
+        inputs = prepare_efa(X)
+    R, r_inv, mean, std = inputs.correlation, inputs.r_inv, inputs.mean, inputs.std
+    eigenvalues = inputs.eigenvalues[:max(SCREE_EIGENVALUES, n_factors)]
+
+    L, h, paf_it, paf_ok = principal_axis(R, n_factors, r_inv)
+    if rotation == "varimax":
+        L, _, rot_it, rot_ok = varimax(L)
+    else:
+        rot_it, rot_ok = 0, True
+    L = _order_and_sign(L)
+
+    # Regression scores F = Z R^-1 L with Z = (X - mean) / std, centred block by block
+    W = r_inv @ L
+    scores = _centred_product(X, mean, W / std[:, None])
+
+    ss = np.einsum("ij,ij->j", L, L)
+    prop = ss / k
+    if not (np.isfinite(L).all() and np.isfinite(scores).all()):
+        raise ValueError("EFA produced non-finite loadings or scores")
+    logging.info(
+        "EFA: %d docs x %d features, %d factors (%s); PAF %d it%s, rotation %d it; cumulative variance %.3f",
+        n_docs, k, n_factors, rotation, paf_it, "" if paf_ok else " (not converged)", rot_it, prop.sum(),
+    )
+    logging.info("Leading eigenvalues: %s", ", ".join(f"{x:.3f}" for x in eigenvalues[:n_factors + 4]))
+    return EfaResult(
+        loadings=L,
+        communalities=h,
+        scores=scores,
+        score_weights=W,
+        mean=mean,
+        std=std,
+        ss_loadings=ss,
+        proportion_var=prop,
+        cumulative_var=np.cumsum(prop),
+        eigenvalues=eigenvalues,
+        rotation=rotation,
+        extraction_iterations=paf_it,
+        extraction_converged=paf_ok,
+        rotation_iterations=rot_it,
+        rotation_converged=rot_ok,
+    )
+
+
+def factor_columns(n_factors: int) -> List[str]:
+    return [f"factor_{i + 1}" for i in range(n_factors)]
+
+
+def _write_csv_atomic(path: Path, header: List[str], rows) -> Path:
+    n = 0
+    with atomic_output(path) as f:
+        w = csv.writer(f)
+        w.writerow(header)
+        for row in rows:
+            w.writerow(row)
+            n += 1
+    logging.info("Wrote %s (%d rows)", path, n)
+    return path
+
+
+def write_efa_artifacts(
+        output_dir: Path,
+        result: EfaResult,
+        features: Sequence[Tuple[str, str]],
+        doc_ids: Sequence[str],
+) -> Tuple[Path, Path, Path]:
+    """
+    Write factors_loadings.csv (K x N, vocabulary.csv order), factors_scores.csv
+    (docs x N, docs.csv order) and explained_variance.csv (one row per factor).
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    cols = factor_columns(result.loadings.shape[1])
+    loadings = _write_csv_atomic(
+        output_dir / "factors_loadings.csv",
+        ["lemma", "pos", *cols, "communality"],
+        ([lemma, pos, *map(repr, row), repr(h)]
+         for (lemma, pos), row, h in zip(features, result.loadings.tolist(), result.communalities.tolist())),
+    )
+    scores = _write_csv_atomic(
+        output_dir / "factors_scores.csv",
+        ["doc_id", *cols],
+        ([doc_id, *map(repr, row)] for doc_id, row in zip(doc_ids, result.scores.tolist())),
+    )
+    explained = _write_csv_atomic(
+        output_dir / "explained_variance.csv",
+        EXPLAINED_VARIANCE_FIELDS,
+        ([c, repr(a), repr(b), repr(d)] for c, a, b, d in zip(
+            cols, result.ss_loadings.tolist(), result.proportion_var.tolist(), result.cumulative_var.tolist())),
+    )
+    return loadings, scores, explained
+
+
+def write_scree_plot(path: Path, eigenvalues: np.ndarray, n_factors: int) -> Path:
+    """Scree plot of the leading correlation eigenvalues; the format follows the path suffix (png/svg)."""
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    x = np.arange(1, len(eigenvalues) + 1)
+    fig, ax = plt.subplots(figsize=(6, 4))
+    ax.plot(x, eigenvalues, marker="o")
+    ax.axvline(n_factors, color="grey", linestyle="--", linewidth=1)
+    ax.axhline(1.0, color="grey", linestyle=":", linewidth=1)
+    ax.set_xlabel("Factor")
+    ax.set_ylabel("Eigenvalue")
+    ax.set_title(f"Scree plot (N = {n_factors})")
+    fig.tight_layout()
+    tmp = path.with_name(path.stem + ".tmp" + path.suffix)
+    fig.savefig(tmp)
+    plt.close(fig)
+    os.replace(tmp, path)
+    logging.info("Wrote %s", path)
+    return path
+
+
+@dataclass
+class EfaModel:
+    """
+    A fitted EFA that can score new documents: the vocabulary (column order),
+    the per-thousand weighting and preprocessing settings it expects, the
+    rotated loadings and the linear score map scores = (X - mean) @ coefficients.
+    """
+    lemmas: List[str]
+    pos: List[str]
+    loadings: np.ndarray          # K x N
+    coefficients: np.ndarray      # K x N, R^-1 L divided by the feature standard deviations
+    mean: np.ndarray              # K feature means of the training matrix
+    meta: Dict[str, object]
+
+    @property
+    def n_factors(self) -> int:
+        return self.loadings.shape[1]
+
+    def transform(self, X: sp.spmatrix) -> np.ndarray:
+        """Factor scores (docs x N) of a docs x K per-thousand matrix in this model's column order."""
+        # Centred before projecting, as in fit_efa: mean @ coefficients can dwarf the scores
+        return _centred_product(X, self.mean, self.coefficients)
+
+
+def model_from_result(result: EfaResult, features: Sequence[Tuple[str, str]], meta: Dict[str, object]) -> EfaModel:
+    coefficients = result.score_weights / result.std[:, None]
+    return EfaModel(
+        lemmas=[lemma for lemma, _ in features],
+        pos=[pos for _, pos in features],
+        loadings=result.loadings,
+        coefficients=coefficients,
+        mean=result.mean,
+        meta={"format": EFA_MODEL_FORMAT, "rotation": result.rotation, "n_factors": result.loadings.shape[1], **meta},
+    )
+
+
+def save_efa_model(path: Path, model: EfaModel) -> Path:
+    with atomic_output(path, binary=True) as f:
+        np.savez(f, lemmas=np.array(model.lemmas, dtype=str), pos=np.array(model.pos, dtype=str),
+                 loadings=model.loadings, coefficients=model.coefficients, mean=model.mean,
+                 meta=np.array(json.dumps(model.meta, sort_keys=True)))
+    logging.info("Wrote %s (%d features x %d factors)", path, len(model.lemmas), model.n_factors)
+    return path
+
+
+def load_efa_model(path: Path) -> EfaModel:
+    with np.load(path) as z:
+        meta = json.loads(str(z["meta"]))
+        if meta.get("format") != EFA_MODEL_FORMAT:
+            raise ValueError(f"{path}: unsupported model format {meta.get('format')!r} (expected {EFA_MODEL_FORMAT}; "
+                             "rewrite it with lmda_poc --refit)")
+        return EfaModel(z["lemmas"].tolist(), z["pos"].tolist(), z["loadings"], z["coefficients"], z["mean"], meta)
@@ -0,0 +1,245 @@
+# Python
+from __future__ import annotations
+import csv
+import logging
+from array import array
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+
+from .counts import DocCounts, LemmaPosInterner
+from .io_artifacts import atomic_output
+from .keywords import DEFAULT_TIE_BREAK, select_topk_loglik, top_k
+
+# features.selection values: log-likelihood keyness across categories (Slice v0), or plain corpus frequency
+SELECTION_LOGLIK = "topk_loglik_v0"
+SELECTION_FREQ = "topk_freq"
+SELECTIONS = (SELECTION_LOGLIK, SELECTION_FREQ)
+# Columns taken as-is from an earlier vocabulary.csv (--frozen-vocab) instead of being selected
+SELECTION_FROZEN = "frozen_vocabulary"
+DEFAULT_K = 1000
+VOCABULARY_FIELDS = ["column", "lemma", "pos", "score", "total_count", "doc_freq"]
+
+
+class DfmBuilder:
+    """
+    Streaming document-feature matrix over the full interned vocabulary.
+
+    Each add() appends a document's id/count arrays to growing CSR buffers
+    (indptr/indices/data), so no dense docs x vocabulary array is ever built.
+    Rows follow the order of add() calls, i.e. the docs.csv row order.
+    """
+
+    __slots__ = ("indptr", "indices", "data", "n_tokens_content", "categories", "doc_ids")
+
+    def __init__(self):
+        self.indptr = array("q", [0])
+        self.indices = array("I")
+        self.data = array("I")
+        self.n_tokens_content = array("q")
+        self.categories: List[str] = []
+        self.doc_ids: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self.n_tokens_content)
+
+    def add(self, counts: DocCounts, category: str = "", doc_id: str = "") -> None:
+        self.indices.extend(counts.ids)
+        self.data.extend(counts.counts)
+        self.indptr.append(len(self.indices))
+        self.n_tokens_content.append(counts.n_tokens_content)
+        self.categories.append(category)
+        self.doc_ids.append(doc_id)
+
+    def to_csr(self, n_cols: int) -> sp.csr_matrix:
+        # np.frombuffer views the array buffers without copying; only the dtype conversions copy
+        indptr = np.frombuffer(self.indptr, dtype=np.int64)
+        indices = np.frombuffer(self.indices, dtype=np.uint32).astype(np.int32)
+        data = np.frombuffer(self.data, dtype=np.uint32).astype(np.int64)
+        return sp.csr_matrix((data, indices, indptr), shape=(len(self), n_cols))
+
+
+@dataclass
+class FeatureResult:
+    vocab_ids: np.ndarray          # interner id of each selected column
+    scores: np.ndarray             # selection score per column
+    total_count: np.ndarray        # corpus frequency per column
+    doc_freq: np.ndarray           # documents containing the column
+    counts_raw: sp.csr_matrix      # docs x K raw counts
+    counts_norm: sp.csr_matrix     # docs x K per-thousand content tokens
+    selection: str
+
+
+def column_stats(X: sp.csr_matrix) -> Tuple[np.ndarray, np.ndarray]:
+    """(total_count, doc_freq) per column of a CSR count matrix."""
+    n_cols = X.shape[1]
+    total = np.bincount(X.indices, weights=X.data, minlength=n_cols).astype(np.int64)
+    doc_freq = np.bincount(X.indices, minlength=n_cols).astype(np.int64)
+    return total, doc_freq
+
+
+def select_columns(X: sp.csr_matrix, cols: np.ndarray) -> sp.csr_matrix:
+    """
+    Keep only cols (in that order) by remapping CSR indices; no dense intermediate.
+
+    Equivalent to X[:, cols] for distinct cols, with sorted indices in each row.
+    """
+    remap = np.full(X.shape[1], -1, dtype=np.int64)
+    remap[cols] = np.arange(len(cols))
+    new_idx = remap[X.indices]
+    keep = new_idx >= 0
+    rows = np.repeat(np.arange(X.shape[0]), np.diff(X.indptr))
+    row_nnz = np.bincount(rows[keep], minlength=X.shape[0])
+    indptr = np.concatenate(([0], np.cumsum(row_nnz)))
+    out = sp.csr_matrix((X.data[keep], new_idx[keep].astype(np.int32), indptr), shape=(X.shape[0], len(cols)))
+    out.sort_indices()
+    return out
+
+
+def per_thousand(X: sp.csr_matrix, n_tokens: np.ndarray) -> sp.csr_matrix:
+    """FR-12 normalisation: scale each row by 1000 / n_tokens (rows with no tokens stay zero)."""
+    n_tokens = np.asarray(n_tokens, dtype=np.float64)
+    scale = np.divide(1000.0, n_tokens, out=np.zeros_like(n_tokens), where=n_tokens > 0)
+    data = X.data.astype(np.float64) * np.repeat(scale, np.diff(X.indptr))
+    return sp.csr_matrix((data, X.indices.copy(), X.indptr.copy()), shape=X.shape)
+
+
+def category_counts(
+        X: sp.csr_matrix,
+        categories: List[str],
+        n_tokens: np.ndarray,
+) -> Tuple[List[str], np.ndarray, np.ndarray]:
+    """Sum document rows per category: (labels, categories x columns counts, tokens per category)."""
+    labels, inv = np.unique(np.asarray(categories, dtype=object), return_inverse=True)
+    n_docs = X.shape[0]
+    G = sp.csr_matrix((np.ones(n_docs), (inv, np.arange(n_docs))), shape=(len(labels), n_docs))
+    counts = np.asarray((G @ X).todense())
+    tokens = np.bincount(inv, weights=np.asarray(n_tokens, dtype=np.float64), minlength=len(labels))
+    return [str(x) for x in labels], counts, tokens
+
+
+def build_features(
+        dfm: DfmBuilder,
+        interner: LemmaPosInterner,
+        k: int = DEFAULT_K,
+        selection: str = SELECTION_LOGLIK,
+        tie_break=DEFAULT_TIE_BREAK,
+) -> FeatureResult:
+    if selection not in SELECTIONS:
+        raise ValueError(f"Unknown feature selection {selection!r}; expected one of {', '.join(SELECTIONS)}")
+    X = dfm.to_csr(len(interner))
+    n_tokens = np.frombuffer(dfm.n_tokens_content, dtype=np.int64)
+    total, doc_freq = column_stats(X)
+    present = np.flatnonzero(total > 0)
+    lemmas = [interner.lemmas[i] for i in present]
+    pos = [interner.pos[i] for i in present]
+
+    if selection == SELECTION_LOGLIK and len(set(dfm.categories)) < 2:
+        logging.warning("topk_loglik_v0 needs at least two categories; falling back to %s", SELECTION_FREQ)
+        selection = SELECTION_FREQ
+    if selection == SELECTION_LOGLIK:
+        _, cat_counts, cat_tokens = category_counts(select_columns(X, present), dfm.categories, n_tokens)
+        picked, scores, _ = select_topk_loglik(cat_counts, cat_tokens, lemmas, pos, k, tie_break)
+    else:
+        picked = top_k(total[present], lemmas, pos, k, tie_break)
+        scores = total[present][picked].astype(np.float64)
+    cols = present[picked]
+    if len(cols) < k:
+        logging.warning("Only %d content lemma/POS types available; selected %d of K=%d", len(cols), len(cols), k)
+
+    counts_raw = select_columns(X, cols)
+    counts_norm = per_thousand(counts_raw, n_tokens)
+    logging.info(
+        "Features: %d docs x %d columns (%s, vocabulary %d), nnz=%d",
+        counts_raw.shape[0], counts_raw.shape[1], selection, len(interner), counts_raw.nnz,
+    )
+    return FeatureResult(
+        vocab_ids=cols,
+        scores=np.asarray(scores, dtype=np.float64),
+        total_count=total[cols],
+        doc_freq=doc_freq[cols],
+        counts_raw=counts_raw,
+        counts_norm=counts_norm,
+        selection=selection,
+    )
+
+
+def load_frozen_vocabulary(path: Path) -> Tuple[LemmaPosInterner, np.ndarray]:
+    """
+    Read a vocabulary.csv into a frozen interner whose ids are its columns, plus the per-column scores.
+
+    Counting with this interner drops out-of-vocabulary lemmas per token, so
+    the streamed DFM already has the K frozen columns (see frozen_features).
+    """
+    with path.open("r", encoding="utf-8", newline="") as f:
+        rows = sorted(csv.DictReader(f), key=lambda r: int(r["column"]))
+    if [int(r["column"]) for r in rows] != list(range(len(rows))):
+        raise ValueError(f"{path}: columns must be 0..{len(rows) - 1}")
+    interner = LemmaPosInterner()
+    for r in rows:
+        if interner.get(r["lemma"], r["pos"]) is not None:
+            raise ValueError(f"{path}: duplicate lemma/POS {r['lemma']}/{r['pos']}")
+        interner.intern(r["lemma"], r["pos"])
+    scores = np.array([float(r["score"] or 0.0) for r in rows], dtype=np.float64)
+    logging.info("Frozen vocabulary %s: %d columns", path, len(rows))
+    return interner.freeze(), scores
+
+
+def frozen_features(dfm: DfmBuilder, interner: LemmaPosInterner, scores: np.ndarray) -> FeatureResult:
+    """FeatureResult for a DFM counted with a load_frozen_vocabulary interner: no selection, no column remap."""
+    k = len(interner)
+    counts_raw = dfm.to_csr(k)
+    counts_raw.sort_indices()
+    counts_norm = per_thousand(counts_raw, np.frombuffer(dfm.n_tokens_content, dtype=np.int64))
+    total, doc_freq = column_stats(counts_raw)
+    logging.info(
+        "Features: %d docs x %d columns (%s), nnz=%d; %d columns unseen in this corpus",
+        counts_raw.shape[0], k, SELECTION_FROZEN, counts_raw.nnz, int((total == 0).sum()),
+    )
+    return FeatureResult(
+        vocab_ids=np.arange(k),
+        scores=np.asarray(scores, dtype=np.float64),
+        total_count=total,
+        doc_freq=doc_freq,
+        counts_raw=counts_raw,
+        counts_norm=counts_norm,
+        selection=SELECTION_FROZEN,
+    )
+
+
+def _save_npz_atomic(path: Path, matrix: sp.spmatrix) -> Path:
+    with atomic_output(path, binary=True) as f:
+        sp.save_npz(f, matrix, compressed=True)
+    logging.info("Wrote %s (%d x %d, nnz=%d)", path, matrix.shape[0], matrix.shape[1], matrix.nnz)
+    return path
+
+
+def write_vocabulary_csv(output_dir: Path, result: FeatureResult, interner: LemmaPosInterner) -> Path:
+    output_dir.mkdir(parents=True, exist_ok=True)
+    path = output_dir / "vocabulary.csv"
+    with atomic_output(path) as f:
+        w = csv.writer(f)
+        w.writerow(VOCABULARY_FIELDS)
+        for col, i in enumerate(result.vocab_ids):
+            lemma, pos = interner.key(int(i))
+            w.writerow([col, lemma, pos, repr(float(result.scores[col])),
+                        int(result.total_count[col]), int(result.doc_freq[col])])
+    logging.info("Wrote %s (%d rows)", path, len(result.vocab_ids))
+    return path
+
+
+def write_feature_artifacts(
+        output_dir: Path,
+        result: FeatureResult,
+        interner: LemmaPosInterner,
+        save_raw: bool = True,
+        save_norm: bool = True,
+) -> Tuple[Path, Optional[Path], Optional[Path]]:
+    """Write vocabulary.csv, counts_raw.npz and counts_norm.npz; rows match docs.csv, columns match vocabulary.csv."""
+    vocab = write_vocabulary_csv(output_dir, result, interner)
+    raw = _save_npz_atomic(output_dir / "counts_raw.npz", result.counts_raw) if save_raw else None
+    norm = _save_npz_atomic(output_dir / "counts_norm.npz", result.counts_norm) if save_norm else None
+    return vocab, raw, norm
@@ -2,25 +2,36 @@
 from __future__ import annotations
 import sys
 import threading
+import time
 import traceback
+from array import array
 from dataclasses import dataclass
+from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 
 # Import core logic (no Qt dependencies here)
-from .ingestion import ingest_corpus
-from .preprocessing import build_pipeline, preflight_spacy, content_counts_for_doc
-from .io_artifacts import write_docs_csv, write_tokens_csv, write_errors_csv, write_run_poc_json
+from .ingestion import IngestionStats, iter_corpus
+from .annotation_cache import AnnotationCache
+from .counts import LemmaPosInterner, add_counts, top_counts
+from .doc_table import DOC_TABLE_COLUMNS, DocTable
+from .preprocessing import (
+    DEFAULT_CHUNK_CHARS,
+    annotation_namespace,
+    get_pipeline,
+    preflight_spacy,
+    iter_content_counts,
+    iter_content_counts_parallel,
+)
+from .instrumentation import Instrumentation
+from .io_artifacts import DocsCsvWriter, TokensCsvWriter, write_errors_csv, write_run_poc_json
+from .manifest import MANIFEST_NAME
 from .logging_setup import setup_logging
 
 # Qt imports used only in this GUI module
 from PySide6 import QtCore, QtWidgets, QtGui
 from PySide6.QtCore import Qt, Signal, QThread
 
-# Matplotlib with Qt backend
-from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
-from matplotlib.figure import Figure
-
 
 @dataclass
 class GuiParams:
@@ -33,6 +44,11 @@ class GuiParams:
     content_pos: List[str] = None
     lowercase: bool = True
     batch_size: int = 64
+    n_process: int = 1
+    pipeline_profile: str = "full"
+    cache_dir: Optional[Path] = None
+    cache_max_mb: int = 1024
+    chunk_chars: int = DEFAULT_CHUNK_CHARS
     log_level: str = "INFO"
 
     def __post_init__(self):
@@ -47,7 +63,7 @@ class GuiParams:
 class PocWorker(QThread):
     progress = Signal(str)
     error = Signal(str)
-    finished_with_results = Signal(list, list, dict)  # docs_rows, tokens_rows, meta
+    finished_with_results = Signal(object, list, dict)  # DocTable, top tokens [((lemma, pos), count)], meta
 
     def __init__(self, params: GuiParams, parent=None):
         super().__init__(parent)
@@ -63,11 +79,13 @@ class PocWorker(QThread):
             # Logging
             log_path = setup_logging(p.output_dir, level=p.log_level)
             self.progress.emit(f"Logging to {log_path}")
+            started_at = datetime.utcnow().isoformat(timespec="seconds") + "Z"
+            instr = Instrumentation()
 
             # Preflight spaCy
             self.progress.emit("Preflighting spaCy model…")
             try:
-                spacy_version, model_name = preflight_spacy("en_core_web_sm")
+                spacy_version, model_name = preflight_spacy("en_core_web_sm", p.pipeline_profile)
             except Exception as e:
                 self.error.emit("spaCy model not available: en_core_web_sm")
                 return
@@ -76,69 +94,119 @@ class PocWorker(QThread):
                 self.progress.emit("Cancelled before ingestion")
                 return
 
-            # Ingestion
+            # Ingestion (streamed: files are read as preprocessing consumes them)
             self.progress.emit("Discovering and reading documents…")
-            try:
-                docs, errors = ingest_corpus(
-                    input_dir=p.input_dir,
-                    encoding=p.encoding,
-                    include_patterns=p.include_patterns,
-                    exclude_patterns=p.exclude_patterns,
-                    fail_on_decode_error=False,
-                )
-            except Exception as e:
-                self.error.emit(f"Ingestion failed: {e}")
-                return
+            ingest = IngestionStats()
+            docs = iter_corpus(
+                input_dir=p.input_dir,
+                encoding=p.encoding,
+                include_patterns=p.include_patterns,
+                exclude_patterns=p.exclude_patterns,
+                fail_on_decode_error=False,
+                stats=ingest,
+            )
+            errors = ingest.errors
 
             if self._cancel.is_set():
                 self.progress.emit("Cancelled before preprocessing")
                 return
 
             # Preprocessing
-            self.progress.emit("Building NLP pipeline…")
-            nlp = build_pipeline("en_core_web_sm", add_sentencizer=True)
-
-            docs_rows: List[Dict[str, object]] = []
-            tokens_rows: List[Dict[str, object]] = []
-
-            for i, d in enumerate(docs):
-                if self._cancel.is_set():
-                    self.progress.emit("Cancellation requested; stopping…")
-                    break
-                n_sentences, n_tokens_raw, n_tokens_content, counts, n_types_content = content_counts_for_doc(
+            t1, cpu1 = time.perf_counter(), time.process_time()
+            interner = LemmaPosInterner()
+            cache = None
+            if p.cache_dir:
+                cache = AnnotationCache(
+                    Path(p.cache_dir),
+                    namespace=annotation_namespace("en_core_web_sm", p.pipeline_profile, p.chunk_chars),
+                    max_bytes=p.cache_max_mb * 1024 * 1024,
+                )
+            if p.n_process > 1:
+                self.progress.emit(f"Starting {p.n_process} preprocessing workers…")
+                results = iter_content_counts_parallel(
+                    docs=docs,
+                    content_pos=p.content_pos,
+                    lowercase=p.lowercase,
+                    keep_stopwords=p.keep_stopwords,
+                    batch_size=p.batch_size,
+                    n_process=p.n_process,
+                    profile=p.pipeline_profile,
+                    cache=cache,
+                    chunk_chars=p.chunk_chars,
+                    interner=interner,
+                )
+            else:
+                self.progress.emit("Building NLP pipeline…")
+                nlp = get_pipeline("en_core_web_sm", p.pipeline_profile)
+                results = iter_content_counts(
                     nlp=nlp,
-                    text=d.text,
+                    docs=docs,
                     content_pos=p.content_pos,
                     lowercase=p.lowercase,
                     keep_stopwords=p.keep_stopwords,
+                    batch_size=p.batch_size,
+                    cache=cache,
+                    chunk_chars=p.chunk_chars,
+                    interner=interner,
                 )
-                docs_rows.append(
-                    {
+
+            table = DocTable()  # columnar summary for the results view
+            token_totals = array("Q")  # corpus count per interned (lemma, pos) id
+            t_exp = 0.0
+            n_tokens = 0
+            instr.stream_started()
+
+            # Rows are streamed to disk per document; only the table columns and the per-id totals for the plot
+            # stay in memory.
+            # A cancelled run still finalises the rows written so far (partial artefacts, for demo).
+            # The GUI keeps no manifest, so a CLI one would describe tables about to be replaced: drop it
+            # and a later --incremental run does a full pass.
+            (p.output_dir / MANIFEST_NAME).unlink(missing_ok=True)
+            with DocsCsvWriter(p.output_dir) as docs_w, TokensCsvWriter(p.output_dir) as tokens_w:
+                for i, (d, counts) in enumerate(results):
+                    if self._cancel.is_set():
+                        self.progress.emit("Cancellation requested; stopping…")
+                        results.close()
+                        break
+                    row = {
                         "doc_id": d.doc_id,
                         "category": d.category,
                         "path": str(d.path),
                         "n_chars": d.n_chars,
-                        "n_sentences": n_sentences,
-                        "n_tokens_raw": n_tokens_raw,
-                        "n_tokens_content": n_tokens_content,
-                        "n_types_content": n_types_content,
+                        "n_sentences": counts.n_sentences,
+                        "n_tokens_raw": counts.n_tokens_raw,
+                        "n_tokens_content": counts.n_tokens_content,
+                        "n_types_content": counts.n_types_content,
                         "encoding_used": d.encoding_used,
                         "warnings": "",
                     }
-                )
-                for (lemma, pos), count in counts.items():
-                    tokens_rows.append({"doc_id": d.doc_id, "lemma": lemma, "pos": pos, "count": int(count)})
-                if i % 5 == 0:
-                    self.progress.emit(f"Processed {i+1}/{len(docs)} docs…")
-
-            # Artifacts (best-effort; even if cancelled midway, we may write partial for demo)
+                    t2 = time.perf_counter()
+                    table.append(d.doc_id, d.category, counts)
+                    docs_w.write_row(row)
+                    tokens_w.write_counts(d.doc_id, counts, interner)
+                    add_counts(token_totals, counts)
+                    t_exp += time.perf_counter() - t2
+                    n_tokens += counts.n_tokens_raw
+                    instr.batch_done(len(table), n_tokens, p.batch_size, ingest.seconds, t_exp)
+                    if i % 5 == 0:
+                        self.progress.emit(f"Processed {i+1}/{ingest.scanned} docs…")
+            docs_csv, tokens_csv = docs_w.path, tokens_w.path
+            instr.stream_finished(len(table), n_tokens, ingest.seconds, t_exp)
+            # Reading and writing are interleaved with tagging, as in the CLI: preprocessing is the remainder
+            t_pre = max(time.perf_counter() - t1 - ingest.seconds - t_exp, 0.0)
+            instr.record("stream", time.perf_counter() - t1, time.process_time() - cpu1, len(table), n_tokens, start=t1)
+            instr.record("ingestion", ingest.seconds, docs=ingest.processed)
+            instr.record("preprocessing", t_pre, docs=len(table), tokens=n_tokens)
+            instr.record("export", t_exp, docs=len(table))
+            if cache is not None:
+                instr.cache("annotation", cache.hits, cache.misses, writes=cache.writes, evictions=cache.evictions)
+
+            # Remaining artifacts (best-effort)
             try:
-                docs_csv = write_docs_csv(p.output_dir, docs_rows)
-                tokens_csv = write_tokens_csv(p.output_dir, tokens_rows)
                 errors_csv = write_errors_csv(p.output_dir, [
                     {"path": str(ep), "stage": stg, "error_type": "UnicodeDecodeError", "message": msg}
                     for (ep, stg, msg) in errors
-                ]) if 'errors' in locals() else None
+                ])
                 meta = {
                     "docs_csv": str(docs_csv),
                     "tokens_csv": str(tokens_csv),
@@ -151,7 +219,7 @@ class PocWorker(QThread):
                 write_run_poc_json(
                     p.output_dir,
                     environment={
-                        "started_at": None,
+                        "started_at": started_at,
                         "python": sys.version.split()[0],
                         "packages": {"spacy": spacy_version, "model": model_name},
                     },
@@ -168,23 +236,33 @@ class PocWorker(QThread):
                             "content_pos": p.content_pos,
                             "lowercase": bool(p.lowercase),
                             "batch_size": int(p.batch_size),
+                            "n_process": int(p.n_process),
+                            "pipeline_profile": p.pipeline_profile,
+                            "chunk_chars": int(p.chunk_chars),
+                            "cache_dir": str(p.cache_dir) if p.cache_dir else None,
                         },
                         "output": {"output_dir": str(p.output_dir)},
                     },
-                    inputs={"documents_processed": len(docs_rows)},
+                    inputs={"documents_processed": len(table)},
                     artifacts={
                         "docs_csv": {"path": meta["docs_csv"]},
                         "tokens_table": {"path": meta["tokens_csv"]},
                         "errors_csv": {"path": meta["errors_csv"]},
                         "log_file": {"path": meta["log_file"]},
                     },
-                    timings_sec={"ingestion": 0.0, "preprocessing": 0.0, "export": 0.0},
+                    timings_sec={
+                        "ingestion": round(ingest.seconds, 3),
+                        "preprocessing": round(t_pre, 3),
+                        "export": round(t_exp, 3),
+                    },
+                    cache={"enabled": True, **cache.stats()} if cache is not None else {"enabled": False},
+                    instrumentation=instr.summary(),
                 )
             except Exception:
                 # Non-fatal for GUI display
                 pass
 
-            self.finished_with_results.emit(docs_rows, tokens_rows, meta)
+            self.finished_with_results.emit(table, top_counts(token_totals, interner, 10), meta)
         except Exception as e:
             tb = traceback.format_exc()
             self.error.emit(f"Unexpected error: {e}\n{tb}")
@@ -193,20 +271,20 @@ class PocWorker(QThread):
 class MatplotlibWidget(QtWidgets.QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
+        # Matplotlib with Qt backend; imported here so it only loads when the window is built
+        from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
+        from matplotlib.figure import Figure
+
         self.figure = Figure(figsize=(5, 3))
         self.canvas = FigureCanvas(self.figure)
         layout = QtWidgets.QVBoxLayout(self)
         layout.addWidget(self.canvas)
 
-    def plot_top_tokens(self, tokens_rows: List[Dict[str, object]], top_n: int = 10):
+    def plot_top_tokens(self, top_tokens: List[Tuple[Tuple[str, str], int]], top_n: int = 10):
         self.figure.clear()
         ax = self.figure.add_subplot(111)
-        # Aggregate by lemma
-        from collections import Counter
-        c = Counter()
-        for r in tokens_rows:
-            c[(r["lemma"], r["pos"]) ] += int(r["count"])  # type: ignore
-        top = c.most_common(top_n)
+        # Totals are aggregated by the worker as documents stream past
+        top = top_tokens[:top_n]
         labels = [f"{lem} ({pos})" for (lem, pos), _ in top]
         values = [val for _, val in top]
 
@@ -225,6 +303,65 @@ class MatplotlibWidget(QtWidgets.QWidget):
         self.canvas.draw_idle()
 
 
+class DocTableModel(QtCore.QAbstractTableModel):
+    """
+    Read-only Qt model over a DocTable. The view asks only for the cells it paints,
+    and each is formatted from the columns on demand. Sorting and the category filter
+    rebuild an array of row indices and do not touch any widgets.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._table = DocTable()
+        self._rows = self._table.view()
+        self._sort_column: Optional[str] = None
+        self._descending = False
+        self._category: Optional[str] = None
+
+    def set_table(self, table: DocTable):
+        self.beginResetModel()
+        self._table = table
+        self._category = None
+        self._rows = table.view(self._sort_column, self._descending)
+        self.endResetModel()
+
+    def set_category(self, category: Optional[str]):
+        self.beginResetModel()
+        self._category = category
+        self._rows = self._table.view(self._sort_column, self._descending, category)
+        self.endResetModel()
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(DOC_TABLE_COLUMNS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.DisplayRole:
+            return str(self._table.value(int(self._rows[index.row()]), DOC_TABLE_COLUMNS[index.column()]))
+        if role == Qt.TextAlignmentRole and index.column() >= 2:
+            return Qt.AlignRight | Qt.AlignVCenter
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return DOC_TABLE_COLUMNS[section]
+        return str(section + 1)
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        # Called by the view when a header is clicked (setSortingEnabled); column -1 is document order
+        self.layoutAboutToBeChanged.emit()
+        self._sort_column = DOC_TABLE_COLUMNS[column] if column >= 0 else None
+        self._descending = order == Qt.DescendingOrder
+        self._rows = self._table.view(self._sort_column, self._descending, self._category)
+        self.layoutChanged.emit()
+
+
 class MainWindow(QtWidgets.QMainWindow):
     def __init__(self):
         super().__init__()
@@ -256,13 +393,23 @@ class MainWindow(QtWidgets.QMainWindow):
 
         # Plot + Table
         self.plot = MatplotlibWidget()
-        self.table = QtWidgets.QTableWidget(0, 6)
-        self.table.setHorizontalHeaderLabels(["doc_id", "category", "n_sentences", "n_tokens_raw", "n_tokens_content", "n_types_content"])
+        self.table_model = DocTableModel(self)
+        self.table = QtWidgets.QTableView()
+        self.table.setModel(self.table_model)
+        self.table.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)  # document order until a header is clicked
+        self.table.setSortingEnabled(True)
         self.table.horizontalHeader().setStretchLastSection(True)
+        # Fixed row heights: the view lays out only the visible rows instead of measuring every one
+        self.table.verticalHeader().setSectionResizeMode(QtWidgets.QHeaderView.Fixed)
+        self.category_combo = QtWidgets.QComboBox()
+        self.category_combo.addItem("All categories")
+        table_box = QtWidgets.QWidget()
+        vb = QtWidgets.QVBoxLayout(table_box); vb.setContentsMargins(0, 0, 0, 0)
+        vb.addWidget(self.category_combo); vb.addWidget(self.table)
 
         split = QtWidgets.QSplitter(Qt.Horizontal)
         split.addWidget(self.plot)
-        split.addWidget(self.table)
+        split.addWidget(table_box)
         split.setSizes([600, 300])
         layout.addWidget(split)
 
@@ -279,6 +426,7 @@ class MainWindow(QtWidgets.QMainWindow):
         browse_out.clicked.connect(self._choose_output)
         self.run_btn.clicked.connect(self._on_run)
         self.cancel_btn.clicked.connect(self._on_cancel)
+        self.category_combo.currentIndexChanged.connect(self._on_category)
 
         self.worker: PocWorker | None = None
 
@@ -341,23 +489,22 @@ class MainWindow(QtWidgets.QMainWindow):
             self.worker.wait(2000)
         return super().closeEvent(e)
 
-    def _on_finished(self, docs_rows: List[Dict[str, object]], tokens_rows: List[Dict[str, object]], meta: Dict[str, str]):
+    def _on_category(self, index: int):
+        self.table_model.set_category(self.category_combo.itemText(index) if index > 0 else None)
+
+    def _on_finished(self, table: DocTable, top_tokens: List[Tuple[Tuple[str, str], int]], meta: Dict[str, str]):
         self.log("Finished.")
         self.run_btn.setEnabled(True)
         self.cancel_btn.setEnabled(False)
-        # Update table
-        self.table.setRowCount(0)
-        for r in docs_rows:
-            row = self.table.rowCount()
-            self.table.insertRow(row)
-            vals = [r.get("doc_id", ""), r.get("category", ""), r.get("n_sentences", 0), r.get("n_tokens_raw", 0), r.get("n_tokens_content", 0), r.get("n_types_content", 0)]
-            for col, v in enumerate(vals):
-                item = QtWidgets.QTableWidgetItem(str(v))
-                if isinstance(v, int):
-                    item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-                self.table.setItem(row, col, item)
+        # Update table: one model reset, no per-cell items
+        self.category_combo.blockSignals(True)
+        self.category_combo.clear()
+        self.category_combo.addItem("All categories")
+        self.category_combo.addItems(sorted(table.categories))
+        self.category_combo.blockSignals(False)
+        self.table_model.set_table(table)
         # Plot
-        self.plot.plot_top_tokens(tokens_rows, top_n=10)
+        self.plot.plot_top_tokens(top_tokens, top_n=10)
 
 
 def launch_gui():
@@ -1,9 +1,31 @@
 # Python
 from __future__ import annotations
+import fnmatch
 import logging
-from dataclasses import dataclass
-from pathlib import Path
-from typing import Iterable, List, Optional, Tuple
+import os
+import re
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path, PurePath
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# pathlib matches case-insensitively on Windows; mirror that in the scanner
+_casefold: Callable[[str], str] = str.lower if os.name == "nt" else str
+
+# Tried in order after the requested encoding when strict decoding fails
+FALLBACK_ENCODINGS: Tuple[str, ...] = ("utf-8-sig",)
+DEFAULT_READ_WORKERS = 4
+
+# Longest first: the UTF-32-LE BOM starts with the UTF-16-LE one
+_BOMS: Tuple[Tuple[bytes, str], ...] = (
+    (b"\xff\xfe\x00\x00", "utf-32"),
+    (b"\x00\x00\xfe\xff", "utf-32"),
+    (b"\xef\xbb\xbf", "utf-8-sig"),
+    (b"\xff\xfe", "utf-16"),
+    (b"\xfe\xff", "utf-16"),
+)
 
 
 @dataclass(frozen=True)
@@ -16,85 +38,287 @@ class DocRecord:
     n_chars: int
 
 
+@dataclass
+class IngestionStats:
+    """Side channel filled in by iter_corpus while documents are consumed."""
+    scanned: int = 0
+    processed: int = 0
+    errors: List[Tuple[Path, str, str]] = field(default_factory=list)
+    categories: Dict[str, int] = field(default_factory=dict)
+    seconds: float = 0.0  # time spent discovering and reading files
+    bytes_read: int = 0
+    encodings: Dict[str, int] = field(default_factory=dict)  # encoding_used -> documents
+
+
 def _derive_category(rel_path: Path) -> str:
     parts = rel_path.parts
     return parts[0] if len(parts) > 1 else "uncategorized"
 
 
+class _PathPattern:
+    """
+    Precompiled glob pattern matched component-wise against path parts.
+
+    recursive=True reproduces Path.rglob(pattern): the pattern must match the
+    trailing parts of the relative path and "**" spans any number of parts.
+    recursive=False reproduces Path.match(pattern): relative patterns match the
+    trailing parts, absolute ones the whole path, and "**" acts like "*".
+    """
+
+    __slots__ = ("anchor", "parts", "simple")
+
+    def __init__(self, pattern: str, recursive: bool):
+        pure = PurePath(_casefold(pattern))
+        if not pure.parts:
+            raise ValueError(f"Empty glob pattern: {pattern!r}")
+        self.anchor = pure.anchor or None
+        raw = pure.parts[1:] if self.anchor else pure.parts
+        if recursive:
+            raw = ("**",) + raw
+        self.parts = tuple(
+            None if (recursive and p == "**") else re.compile(fnmatch.translate(p)).match
+            for p in raw
+        )
+        # Single-component rglob patterns (e.g. "*.txt") only need the file name
+        self.simple = recursive and len(self.parts) == 2
+
+    def match_name(self, name: str) -> bool:
+        return self.parts[1](_casefold(name)) is not None
+
+    def match(self, parts: Tuple[str, ...]) -> bool:
+        parts = tuple(_casefold(p) for p in parts)
+        if self.anchor is not None:
+            if not parts or parts[0] != self.anchor or len(parts) - 1 != len(self.parts):
+                return False
+            return all(m(p) is not None for m, p in zip(self.parts, parts[1:]))
+        if None not in self.parts:
+            if len(self.parts) > len(parts):
+                return False
+            return all(m(p) is not None for m, p in zip(reversed(self.parts), reversed(parts)))
+        return _match_recursive(self.parts, parts)
+
+
+def _match_recursive(pats: Tuple, parts: Tuple[str, ...]) -> bool:
+    # Full match where None ("**") consumes zero or more parts
+    if not pats:
+        return not parts
+    head = pats[0]
+    if head is None:
+        return any(_match_recursive(pats[1:], parts[i:]) for i in range(len(parts) + 1))
+    return bool(parts) and head(parts[0]) is not None and _match_recursive(pats[1:], parts[1:])
+
+
+def scan_candidate_files(
+        input_dir: Path,
+        include_patterns: Optional[List[str]] = None,
+        exclude_patterns: Optional[List[str]] = None,
+) -> List[Tuple[str, os.DirEntry]]:
+    """
+    Walk input_dir once with os.scandir and return (doc_id, DirEntry) pairs sorted by doc_id.
+
+    Selection is identical to list_candidate_files' historical rglob/Path.match
+    behaviour: a file is kept if any include pattern matches its path relative
+    to input_dir and no exclude pattern matches its full path; symlinked
+    directories are not descended into. The DirEntry objects carry the cached
+    stat information of the walk for callers that need size/mtime.
+    """
+    includes = [_PathPattern(p, recursive=True) for p in (include_patterns or ["*.txt"])]
+    excludes = [_PathPattern(p, recursive=False) for p in (exclude_patterns or [])]
+    name_only = [pat for pat in includes if pat.simple]
+    multi_part = [pat for pat in includes if not pat.simple]
+    base_parts = input_dir.parts
+
+    found: List[Tuple[str, os.DirEntry]] = []
+    stack: List[Tuple[str, Tuple[str, ...]]] = [(str(input_dir), ())]
+    while stack:
+        dir_path, rel_dir = stack.pop()
+        try:
+            it = os.scandir(dir_path)
+        except OSError as e:
+            logging.warning("Cannot scan directory %s: %s", dir_path, e)
+            continue
+        with it:
+            for entry in it:
+                try:
+                    if entry.is_dir() and not entry.is_symlink():
+                        stack.append((entry.path, rel_dir + (entry.name,)))
+                        continue
+                    if not entry.is_file():
+                        continue
+                except OSError:
+                    continue
+                name = entry.name
+                rel_parts = rel_dir + (name,)
+                if not (any(pat.match_name(name) for pat in name_only)
+                        or any(pat.match(rel_parts) for pat in multi_part)):
+                    continue
+                if excludes and any(pat.match(base_parts + rel_parts) for pat in excludes):
+                    continue
+                found.append(("/".join(rel_parts), entry))
+    found.sort(key=lambda item: item[0])
+    return found
+
+
 def list_candidate_files(
         input_dir: Path,
         include_patterns: Optional[List[str]] = None,
         exclude_patterns: Optional[List[str]] = None,
 ) -> List[Path]:
-    include_patterns = include_patterns or ["*.txt"]
-    exclude_patterns = exclude_patterns or []
-    files: set[Path] = set()
-    for pat in include_patterns:
-        files.update(input_dir.rglob(pat))
-    for pat in exclude_patterns:
-        for p in list(files):
-            if p.match(pat):
-                files.discard(p)
-    kept = [p for p in files if p.is_file()]
-    kept.sort(key=lambda p: p.relative_to(input_dir).as_posix())
+    kept = [Path(entry.path) for _, entry in scan_candidate_files(input_dir, include_patterns, exclude_patterns)]
     logging.info("Discovered %d candidate files", len(kept))
     return kept
 
 
+def decode_bytes(data: bytes, encoding: str = "utf-8", source: object = "<bytes>") -> Tuple[str, str]:
+    """
+    Decode an in-memory file body and return (text, encoding_used).
+
+    A byte order mark decides the encoding; otherwise the requested encoding
+    and then FALLBACK_ENCODINGS are tried strictly. Newlines are normalised
+    to "\\n" as text-mode reads do. The last UnicodeDecodeError is re-raised.
+    """
+    candidates: List[str] = []
+    for bom, bom_encoding in _BOMS:
+        if data.startswith(bom):
+            candidates.append(bom_encoding)
+            break
+    for enc in (encoding,) + FALLBACK_ENCODINGS:
+        if enc not in candidates:
+            candidates.append(enc)
+    last_error: Optional[UnicodeDecodeError] = None
+    for enc in candidates:
+        try:
+            text = data.decode(enc, errors="strict")
+        except UnicodeDecodeError as e:
+            last_error = e
+            continue
+        if "\r" in text:
+            text = text.replace("\r\n", "\n").replace("\r", "\n")
+        return text, enc
+    logging.error("Decoding failed for %s: %s", source, last_error)
+    raise last_error
+
+
 def read_text_with_encoding(path: Path, encoding: str = "utf-8") -> Tuple[str, str]:
-    # First attempt: provided encoding (default utf-8)
-    try:
-        text = path.read_text(encoding=encoding, errors="strict")
-        return text, encoding
-    except UnicodeDecodeError:
-        pass
-    # Retry UTF-8 with BOM handling
-    try:
-        text = path.read_text(encoding="utf-8-sig", errors="strict")
-        return text, "utf-8-sig"
-    except UnicodeDecodeError as e:
-        logging.error("Decoding failed for %s: %s", path, e)
-        raise
+    # Single read; BOM sniffing and fallbacks work on the in-memory buffer
+    text, enc_used, _ = _read_and_decode(path, encoding)
+    return text, enc_used
 
 
-def ingest_corpus(
+def _read_and_decode(path: Path, encoding: str) -> Tuple[str, str, int]:
+    data = path.read_bytes()
+    text, enc_used = decode_bytes(data, encoding, source=path)
+    return text, enc_used, len(data)
+
+
+def iter_corpus(
         input_dir: Path,
         encoding: str = "utf-8",
         include_patterns: Optional[List[str]] = None,
         exclude_patterns: Optional[List[str]] = None,
         fail_on_decode_error: bool = False,
-) -> Tuple[List[DocRecord], List[Tuple[Path, str, str]]]:
-    paths = list_candidate_files(input_dir, include_patterns, exclude_patterns)
-    docs: List[DocRecord] = []
-    errors: List[Tuple[Path, str, str]] = []
-
-    for path in paths:
-        rel = path.relative_to(input_dir)
-        doc_id = rel.as_posix()
-        category = _derive_category(rel)
-        try:
-            text, enc_used = read_text_with_encoding(path, encoding)
-        except UnicodeDecodeError as e:
-            msg = f"UnicodeDecodeError: {e}"
-            errors.append((path, "ingestion", msg))
-            if fail_on_decode_error:
-                raise
+        stats: Optional[IngestionStats] = None,
+        paths: Optional[List[Path]] = None,
+        read_workers: int = DEFAULT_READ_WORKERS,
+) -> Iterator[DocRecord]:
+    """
+    Lazily yield DocRecords in sorted doc_id order.
+
+    Files are read and decoded by a pool of read_workers threads so I/O
+    overlaps with the consumer; at most 4 * read_workers files are read ahead
+    and documents are still yielded in order (read_workers=0 reads in the
+    calling thread). Decoding errors are appended to stats.errors (or raised
+    when fail_on_decode_error is set); scanned/processed/category/encoding
+    tallies are kept in stats as documents are consumed. Pass paths (under
+    input_dir) to read a pre-selected list of files instead of discovering them.
+    """
+    stats = stats if stats is not None else IngestionStats()
+    t0 = time.perf_counter()
+    if paths is None:
+        paths = list_candidate_files(input_dir, include_patterns, exclude_patterns)
+    stats.scanned = len(paths)
+    stats.seconds += time.perf_counter() - t0
+
+    pool = ThreadPoolExecutor(max_workers=read_workers, thread_name_prefix="lmda-read") if read_workers > 0 else None
+    pending: deque[Tuple[Path, Future]] = deque()
+    path_iter = iter(paths)
+    try:
+        while True:
+            t0 = time.perf_counter()
+            if pool is not None:
+                while len(pending) < 4 * read_workers:
+                    path = next(path_iter, None)
+                    if path is None:
+                        break
+                    pending.append((path, pool.submit(_read_and_decode, path, encoding)))
+                if not pending:
+                    break
+                path, fut = pending.popleft()
             else:
-                continue
-        record = DocRecord(
-            doc_id=doc_id,
-            category=category,
-            path=path,
-            text=text,
-            encoding_used=enc_used,
-            n_chars=len(text),
-        )
-        docs.append(record)
+                path = next(path_iter, None)
+                if path is None:
+                    break
+                fut = None
+            rel = path.relative_to(input_dir)
+            doc_id = rel.as_posix()
+            category = _derive_category(rel)
+            try:
+                text, enc_used, n_bytes = fut.result() if fut is not None else _read_and_decode(path, encoding)
+            except UnicodeDecodeError as e:
+                msg = f"UnicodeDecodeError: {e}"
+                stats.errors.append((path, "ingestion", msg))
+                stats.bytes_read += len(e.object)
+                stats.seconds += time.perf_counter() - t0
+                if fail_on_decode_error:
+                    raise
+                else:
+                    continue
+            record = DocRecord(
+                doc_id=doc_id,
+                category=category,
+                path=path,
+                text=text,
+                encoding_used=enc_used,
+                n_chars=len(text),
+            )
+            stats.processed += 1
+            stats.bytes_read += n_bytes
+            stats.categories[category] = stats.categories.get(category, 0) + 1
+            stats.encodings[enc_used] = stats.encodings.get(enc_used, 0) + 1
+            stats.seconds += time.perf_counter() - t0
+            yield record
+    finally:
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
 
+    mb_per_sec = stats.bytes_read / stats.seconds / 1e6 if stats.seconds > 0 else 0.0
     logging.info(
-        "Ingestion summary: scanned=%d, processed=%d, errors=%d",
-        len(paths),
-        len(docs),
-        len(errors),
+        "Ingestion summary: scanned=%d, processed=%d, errors=%d, bytes=%d (%.1f MB/s), encodings=%s",
+        stats.scanned,
+        stats.processed,
+        len(stats.errors),
+        stats.bytes_read,
+        mb_per_sec,
+        ", ".join(f"{enc}={n}" for enc, n in sorted(stats.encodings.items())) or "none",
     )
-    return docs, errors
+
+
+def ingest_corpus(
+        input_dir: Path,
+        encoding: str = "utf-8",
+        include_patterns: Optional[List[str]] = None,
+        exclude_patterns: Optional[List[str]] = None,
+        fail_on_decode_error: bool = False,
+        read_workers: int = DEFAULT_READ_WORKERS,
+) -> Tuple[List[DocRecord], List[Tuple[Path, str, str]]]:
+    stats = IngestionStats()
+    docs = list(iter_corpus(
+        input_dir=input_dir,
+        encoding=encoding,
+        include_patterns=include_patterns,
+        exclude_patterns=exclude_patterns,
+        fail_on_decode_error=fail_on_decode_error,
+        stats=stats,
+        read_workers=read_workers,
+    ))
+    return docs, stats.errors
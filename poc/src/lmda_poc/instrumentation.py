@@ -0,0 +1,208 @@
+# Python
+from __future__ import annotations
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from .io_artifacts import atomic_output
+
+try:
+    import resource
+except ImportError:  # Windows: no peak RSS
+    resource = None
+
+TRACE_NAME = "trace.json"
+
+
+def peak_rss_mib() -> Optional[float]:
+    """High-water mark of this process's resident set size, or None where the resource module is missing."""
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(rss / (2 ** 20 if sys.platform == "darwin" else 2 ** 10), 1)
+
+
+def _rate(n: Optional[int], seconds: float) -> Optional[float]:
+    return round(n / seconds, 1) if n is not None and seconds > 0 else None
+
+
+class Instrumentation:
+    """
+    Per-stage and per-batch timings for one run: wall and CPU seconds, docs/s, tokens/s, peak RSS and cache hit rates.
+
+    Contiguous stages are measured with stage(); stages that are interleaved
+    in the streaming loop (ingestion, preprocessing, export) are measured by
+    the caller and recorded with record(). summary() goes into run_poc.json
+    under "instrumentation"; with trace=True every stage, batch and RSS sample
+    is also kept as a Chrome trace event for write_chrome_trace (open the file
+    in ui.perfetto.dev or chrome://tracing). Interleaved stages appear as
+    child spans of each batch: the batch's reading, tagging and writing time
+    laid end to end (their real slices alternate per document). CPU time is
+    that of this process (reader threads included, --n-process workers not).
+    """
+
+    def __init__(self, trace: bool = False):
+        self.trace = trace
+        self.stages: Dict[str, Dict[str, object]] = {}
+        self.caches: Dict[str, Dict[str, object]] = {}
+        self.events: List[Dict[str, object]] = []
+        self._t0 = time.perf_counter()
+        self._batch_wall: List[float] = []
+        self._batch_docs = 0
+        self._batch_start = self._batch_cpu = 0.0
+        self._batch_ingest = self._batch_export = 0.0  # cumulative clocks at the start of the batch
+
+    def _us(self, t: float) -> float:
+        return round((t - self._t0) * 1e6, 1)
+
+    def _event(self, name: str, start: float, end: float, cat: str, args: Dict[str, object]) -> None:
+        if self.trace:
+            self.events.append({"name": name, "cat": cat, "ph": "X", "ts": self._us(start),
+                                "dur": round((end - start) * 1e6, 1), "pid": os.getpid(),
+                                "tid": threading.get_ident(), "args": args})
+
+    def _counter(self, t: float) -> None:
+        rss = peak_rss_mib()
+        if self.trace and rss is not None:
+            self.events.append({"name": "peak_rss_mib", "ph": "C", "ts": self._us(t), "pid": os.getpid(),
+                                "args": {"MiB": rss}})
+
+    def record(
+            self,
+            name: str,
+            wall: float,
+            cpu: Optional[float] = None,
+            docs: Optional[int] = None,
+            tokens: Optional[int] = None,
+            start: Optional[float] = None,
+    ) -> Dict[str, object]:
+        """Store a stage measured by the caller (start is its perf_counter start, for the trace)."""
+        entry: Dict[str, object] = {"wall_sec": round(wall, 3)}
+        if cpu is not None:
+            entry["cpu_sec"] = round(cpu, 3)
+        if docs is not None:
+            entry["docs"] = docs
+            entry["docs_per_sec"] = _rate(docs, wall)
+        if tokens is not None:
+            entry["tokens"] = tokens
+            entry["tokens_per_sec"] = _rate(tokens, wall)
+        entry["peak_rss_mib"] = peak_rss_mib()
+        self.stages[name] = entry
+        if start is not None:
+            self._event(name, start, start + wall, "stage", entry)
+        return entry
+
+    @contextlib.contextmanager
+    def stage(self, name: str) -> Iterator[Dict[str, object]]:
+        """
+        Time a contiguous stage. The yielded dict takes optional "docs"/"tokens" counts
+        for the throughput figures.
+        """
+        counts: Dict[str, object] = {}
+        start, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield counts
+        finally:
+            end = time.perf_counter()
+            self.record(name, end - start, time.process_time() - cpu,
+                        counts.get("docs"), counts.get("tokens"), start=start)
+            self._counter(end)
+
+    def span(self, name: str, start: float, end: float, cat: str = "stage", **args) -> None:
+        """Trace-only span between two perf_counter readings (not added to the summary)."""
+        self._event(name, start, end, cat, args)
+
+    def batch_done(
+            self,
+            n_docs: int,
+            n_tokens: int,
+            batch_docs: int,
+            ingestion_sec: Optional[float] = None,
+            export_sec: Optional[float] = None,
+    ) -> None:
+        """
+        Call after each document of the streaming loop; every batch_docs documents a batch span is closed.
+        ingestion_sec/export_sec are the caller's cumulative reading and writing clocks; with them the
+        batch gets ingestion/preprocessing/export child spans (preprocessing is the remainder).
+        """
+        if n_docs - self._batch_docs >= batch_docs:
+            self._close_batch(time.perf_counter(), n_docs, n_tokens, ingestion_sec, export_sec)
+
+    def _close_batch(
+            self,
+            now: float,
+            n_docs: int,
+            n_tokens: int,
+            ingestion_sec: Optional[float],
+            export_sec: Optional[float],
+    ) -> None:
+        cpu = time.process_time()
+        wall = now - self._batch_start
+        self._batch_wall.append(wall)
+        self._event(f"batch {len(self._batch_wall)}", self._batch_start, now, "batch", {
+            "docs": n_docs - self._batch_docs,
+            "cpu_sec": round(cpu - self._batch_cpu, 4),
+            "docs_total": n_docs,
+            "tokens_total": n_tokens,
+        })
+        if ingestion_sec is not None and export_sec is not None:
+            ingest = min(max(ingestion_sec - self._batch_ingest, 0.0), wall)
+            export = min(max(export_sec - self._batch_export, 0.0), wall - ingest)
+            t = self._batch_start
+            for name, dur in (("ingestion", ingest), ("preprocessing", wall - ingest - export), ("export", export)):
+                self._event(name, t, t + dur, "stage", {"docs": n_docs - self._batch_docs})
+                t += dur
+            self._batch_ingest, self._batch_export = ingestion_sec, export_sec
+        self._counter(now)
+        self._batch_docs = n_docs
+        self._batch_start, self._batch_cpu = now, cpu
+
+    def stream_started(self) -> None:
+        """Mark the start of the streaming loop (reading, tagging and writing interleaved)."""
+        self._batch_start, self._batch_cpu = time.perf_counter(), time.process_time()
+
+    def stream_finished(
+            self,
+            n_docs: int,
+            n_tokens: int,
+            ingestion_sec: Optional[float] = None,
+            export_sec: Optional[float] = None,
+    ) -> None:
+        if n_docs > self._batch_docs:
+            self._close_batch(time.perf_counter(), n_docs, n_tokens, ingestion_sec, export_sec)
+
+    def cache(self, name: str, hits: int, misses: int, **extra) -> None:
+        lookups = hits + misses
+        self.caches[name] = {"hits": hits, "misses": misses,
+                             "hit_rate": round(hits / lookups, 4) if lookups else None, **extra}
+
+    def summary(self, trace_path: Optional[Path] = None) -> Dict[str, object]:
+        batches: Dict[str, object] = {"count": len(self._batch_wall)}
+        if self._batch_wall:
+            walls = sorted(self._batch_wall)
+            batches.update(
+                wall_sec_min=round(walls[0], 4),
+                wall_sec_median=round(walls[len(walls) // 2], 4),
+                wall_sec_max=round(walls[-1], 4),
+            )
+        return {
+            "stages": self.stages,
+            "batches": batches,
+            "caches": self.caches,
+            "peak_rss_mib": peak_rss_mib(),
+            "cpu_count": os.cpu_count(),
+            "trace": str(trace_path) if trace_path else None,
+        }
+
+    def write_chrome_trace(self, path: Path) -> Path:
+        """Chrome trace event format (JSON object form), readable by Perfetto and chrome://tracing."""
+        meta = [{"name": "process_name", "ph": "M", "pid": os.getpid(), "args": {"name": "lmda_poc"}}]
+        with atomic_output(path) as f:
+            json.dump({"traceEvents": meta + self.events, "displayTimeUnit": "ms"}, f)
+        return path
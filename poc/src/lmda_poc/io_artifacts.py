@@ -1,54 +1,351 @@
 # Python
 from __future__ import annotations
+import contextlib
 import csv
+import hashlib
+import io
 import json
 import logging
+import os
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Iterable, List, Optional, Tuple
+from typing import IO, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .counts import DocCounts, LemmaPosInterner
+
+TOKENS_PARQUET_ROW_GROUP = 1_000_000
+
+
+DOCS_FIELDS = [
+    "doc_id",
+    "category",
+    "path",
+    "n_chars",
+    "n_sentences",
+    "n_tokens_raw",
+    "n_tokens_content",
+    "n_types_content",
+    "encoding_used",
+    "warnings",
+]
+TOKENS_FIELDS = ["doc_id", "lemma", "pos", "count"]
+HASH_CHUNK_BYTES = 1024 * 1024
+
+# sha256 of files written through HashingFile, keyed by absolute path, with the size and mtime they were recorded at
+_DIGESTS: Dict[str, Tuple[int, int, str]] = {}
+
+
+class HashingFile(io.RawIOBase):
+    """
+    Write-only binary stream that feeds every byte to sha256 on its way to the underlying file.
+
+    Reports itself as not seekable, so zip writers (np.savez, sp.save_npz)
+    stream their members instead of patching headers that were already hashed.
+    """
+
+    def __init__(self, f):
+        self._f = f
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        n = self._f.write(b)
+        self.sha256.update(memoryview(b)[:n])
+        self.size += n
+        return n
+
+    def close(self) -> None:
+        if not self.closed:
+            self._f.close()
+        super().close()
+
+
+def record_digest(path: Path, sha256: str, size: int) -> None:
+    st = path.stat()
+    if st.st_size != size:
+        raise OSError(f"{path}: wrote {size} bytes but the file has {st.st_size}")
+    _DIGESTS[os.path.abspath(path)] = (st.st_size, st.st_mtime_ns, sha256)
+
+
+def sha256_file(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_BYTES), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def artifact_digest(path: Path) -> Dict[str, object]:
+    """
+    {"size", "mtime_ns", "sha256"} of a written artefact.
+
+    Files written through atomic_output/HashingFile were hashed while their
+    bytes went out; that digest is reused as long as size and mtime still
+    match. Other files (e.g. written by pyarrow or matplotlib) are hashed here.
+    """
+    st = path.stat()
+    known = _DIGESTS.get(os.path.abspath(path))
+    if known is not None and known[:2] == (st.st_size, st.st_mtime_ns):
+        sha256 = known[2]
+    else:
+        sha256 = sha256_file(path)
+        _DIGESTS[os.path.abspath(path)] = (st.st_size, st.st_mtime_ns, sha256)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": sha256}
+
+
+def add_artifact_digests(artifacts: Dict[str, Dict[str, object]], skip: Sequence[str] = ()) -> None:
+    """Add size, mtime_ns and sha256 to every artifacts entry whose path exists (except the keys in skip)."""
+    for name, entry in artifacts.items():
+        path = entry.get("path")
+        if name in skip or not path or not Path(path).is_file():
+            continue
+        entry.update(artifact_digest(Path(path)))
+
+
+@contextlib.contextmanager
+def atomic_output(path: Path, binary: bool = False) -> Iterator[IO]:
+    """
+    Open <name>.tmp for writing (UTF-8 text with newline="" unless binary) through a HashingFile.
+
+    On a clean exit the temp file is renamed over path and its digest is
+    recorded for artifact_digest; on an exception it is removed and any
+    previous artefact is left in place.
+    """
+    tmp = path.with_name(path.name + ".tmp")
+    raw = HashingFile(tmp.open("wb"))
+    buffered = io.BufferedWriter(raw, HASH_CHUNK_BYTES)
+    f = buffered if binary else io.TextIOWrapper(buffered, encoding="utf-8", newline="")
+    try:
+        yield f
+    except BaseException:
+        f.close()
+        tmp.unlink(missing_ok=True)
+        raise
+    f.close()
+    os.replace(tmp, path)
+    record_digest(path, raw.sha256.hexdigest(), raw.size)
+
+
+class _AtomicCsvWriter:
+    """
+    Stream CSV rows to <name>.tmp and rename it over the final path on close().
+
+    Rows are flushed to disk as they are written, so memory does not grow with
+    the table, and hashed on the way out (see artifact_digest). Readers never
+    see a half-written file; abort() (or leaving a with-block through an
+    exception) discards the temp file and leaves any previous artefact in place.
+    """
+
+    def __init__(self, path: Path, fields: List[str]):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.rows = 0
+        self._tmp = path.with_name(path.name + ".tmp")
+        self._raw = HashingFile(self._tmp.open("wb"))
+        self._f = io.TextIOWrapper(io.BufferedWriter(self._raw, HASH_CHUNK_BYTES), encoding="utf-8", newline="")
+        self._w = csv.writer(self._f)
+        self._w.writerow(fields)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def close(self) -> Path:
+        if not self._f.closed:
+            self._f.close()
+            os.replace(self._tmp, self.path)
+            record_digest(self.path, self._raw.sha256.hexdigest(), self._raw.size)
+            logging.info("Wrote %s (%d rows)", self.path, self.rows)
+        return self.path
+
+    def abort(self) -> None:
+        if not self._f.closed:
+            self._f.close()
+            self._tmp.unlink(missing_ok=True)
+
+
+class DocsCsvWriter(_AtomicCsvWriter):
+    def __init__(self, output_dir: Path):
+        super().__init__(output_dir / "docs.csv", DOCS_FIELDS)
+
+    def write_row(self, row: Dict[str, object]) -> None:
+        self._w.writerow([row.get(k, "") for k in DOCS_FIELDS])
+        self.rows += 1
+
+    def write_rows(self, rows: Iterable[Dict[str, object]]) -> None:
+        for r in rows:
+            self.write_row(r)
+
+
+class TokensCsvWriter(_AtomicCsvWriter):
+    def __init__(self, output_dir: Path):
+        super().__init__(output_dir / "tokens.csv", TOKENS_FIELDS)
+
+    def write_doc(self, doc_id: str, items: Iterable[Tuple[str, str, object]]) -> int:
+        """Write one document's (lemma, pos, count) rows."""
+        n_before = self.rows
+        for lemma, pos, count in items:
+            self._w.writerow((doc_id, lemma, pos, count))
+            self.rows += 1
+        return self.rows - n_before
+
+    def write_counts(self, doc_id: str, counts: DocCounts, interner: LemmaPosInterner) -> int:
+        """Write a DocCounts, resolving its ids to lemma/POS strings."""
+        return self.write_doc(doc_id, counts.items(interner))
+
+    def write_rows(self, rows: Iterable[Dict[str, object]]) -> None:
+        for r in rows:
+            self._w.writerow([r.get(k, "") for k in TOKENS_FIELDS])
+            self.rows += 1
 
 
 def write_docs_csv(
         output_dir: Path,
-        rows: List[Dict[str, object]],
+        rows: Iterable[Dict[str, object]],
 ) -> Path:
-    output_dir.mkdir(parents=True, exist_ok=True)
-    path = output_dir / "docs.csv"
-    fields = [
-        "doc_id",
-        "category",
-        "path",
-        "n_chars",
-        "n_sentences",
-        "n_tokens_raw",
-        "n_tokens_content",
-        "n_types_content",
-        "encoding_used",
-        "warnings",
-    ]
-    with path.open("w", encoding="utf-8", newline="") as f:
-        w = csv.DictWriter(f, fieldnames=fields)
-        w.writeheader()
-        for r in rows:
-            w.writerow(r)
-    logging.info("Wrote %s (%d rows)", path, len(rows))
-    return path
+    with DocsCsvWriter(output_dir) as w:
+        w.write_rows(rows)
+    return w.path
 
 
 def write_tokens_csv(
         output_dir: Path,
-        rows: List[Dict[str, object]],
+        rows: Iterable[Dict[str, object]],
 ) -> Path:
-    output_dir.mkdir(parents=True, exist_ok=True)
-    path = output_dir / "tokens.csv"
-    fields = ["doc_id", "lemma", "pos", "count"]
-    with path.open("w", encoding="utf-8", newline="") as f:
-        w = csv.DictWriter(f, fieldnames=fields)
-        w.writeheader()
+    with TokensCsvWriter(output_dir) as w:
+        w.write_rows(rows)
+    return w.path
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise RuntimeError("tokens.parquet requires pyarrow (pip install pyarrow)") from e
+    return pa, pq
+
+
+def tokens_parquet_schema():
+    """doc_index is the 0-based row of docs.csv; lemma/pos are dictionary-encoded."""
+    pa, _ = _require_pyarrow()
+    return pa.schema(
+        [
+            ("doc_index", pa.uint32()),
+            ("lemma", pa.dictionary(pa.int32(), pa.string())),
+            ("pos", pa.dictionary(pa.int8(), pa.string())),
+            ("count", pa.uint32()),
+        ],
+        metadata={b"lmda.doc_index": b"0-based row number in docs.csv"},
+    )
+
+
+class TokensParquetWriter:
+    """
+    Append (doc_index, lemma, pos, count) rows to tokens.parquet, one row group per row_group_size rows.
+
+    Lemma/POS dictionaries are built per row group, so memory stays bounded
+    by the row group size rather than the corpus size. Like the CSV writers it
+    writes to a temp file that close() renames into place.
+    """
+
+    def __init__(self, output_dir: Path, row_group_size: int = TOKENS_PARQUET_ROW_GROUP, compression: str = "zstd"):
+        self._pa, pq = _require_pyarrow()
+        output_dir.mkdir(parents=True, exist_ok=True)
+        self.path = output_dir / "tokens.parquet"
+        self.row_group_size = row_group_size
+        self.rows = 0
+        self.row_groups = 0
+        self._tmp = self.path.with_name(self.path.name + ".tmp")
+        self._schema = tokens_parquet_schema()
+        self._writer = pq.ParquetWriter(str(self._tmp), self._schema, compression=compression)
+        self._closed = False
+        self._doc_index: List[int] = []
+        self._lemma: List[str] = []
+        self._pos: List[str] = []
+        self._count: List[int] = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def write_doc(self, doc_index: int, items: Iterable[Tuple[str, str, object]]) -> None:
+        for lemma, pos, count in items:
+            self._doc_index.append(doc_index)
+            self._lemma.append(lemma)
+            self._pos.append(pos)
+            self._count.append(int(count))
+        self._flush()
+
+    def write_counts(self, doc_index: int, counts: DocCounts, interner: LemmaPosInterner) -> None:
+        self.write_doc(doc_index, counts.items(interner))
+
+    def _flush(self, final: bool = False) -> None:
+        # Emit full row groups; on close also the remainder
+        while len(self._count) >= self.row_group_size or (final and self._count):
+            n = min(len(self._count), self.row_group_size)
+            pa = self._pa
+            table = pa.Table.from_arrays(
+                [
+                    pa.array(self._doc_index[:n], type=pa.uint32()),
+                    pa.array(self._lemma[:n], type=pa.string()).dictionary_encode(),
+                    pa.array(self._pos[:n], type=pa.string()).dictionary_encode().cast(self._schema.field("pos").type),
+                    pa.array(self._count[:n], type=pa.uint32()),
+                ],
+                schema=self._schema,
+            )
+            self._writer.write_table(table, row_group_size=n)
+            self.rows += n
+            self.row_groups += 1
+            del self._doc_index[:n], self._lemma[:n], self._pos[:n], self._count[:n]
+
+    def close(self) -> Path:
+        if not self._closed:
+            self._flush(final=True)
+            self._writer.close()
+            self._closed = True
+            os.replace(self._tmp, self.path)
+            logging.info("Wrote %s (%d rows, %d row groups)", self.path, self.rows, self.row_groups)
+        return self.path
+
+    def abort(self) -> None:
+        if not self._closed:
+            self._writer.close()
+            self._closed = True
+            self._tmp.unlink(missing_ok=True)
+
+
+def write_tokens_parquet(
+        output_dir: Path,
+        docs_rows: List[Dict[str, object]],
+        rows: Iterable[Dict[str, object]],
+        row_group_size: int = TOKENS_PARQUET_ROW_GROUP,
+) -> Tuple[Path, int]:
+    """Write tokens.parquet; doc_id is replaced by the document's row index in docs_rows. Returns (path, row_groups)."""
+    doc_index = {str(r["doc_id"]): i for i, r in enumerate(docs_rows)}
+    with TokensParquetWriter(output_dir, row_group_size=row_group_size) as w:
         for r in rows:
-            w.writerow(r)
-    logging.info("Wrote %s (%d rows)", path, len(rows))
-    return path
+            w.write_doc(doc_index[str(r["doc_id"])], [(str(r["lemma"]), str(r["pos"]), r["count"])])
+    return w.path, w.row_groups
+
+
+def read_tokens_parquet(path: Path, columns: Optional[Sequence[str]] = None):
+    """Read tokens.parquet as a pyarrow Table, loading only the requested columns."""
+    _, pq = _require_pyarrow()
+    return pq.read_table(str(path), columns=list(columns) if columns is not None else None)
 
 
 def write_errors_csv(output_dir: Path, rows: List[Dict[str, object]]) -> Optional[Path]:
@@ -57,7 +354,7 @@ def write_errors_csv(output_dir: Path, rows: List[Dict[str, object]]) -> Optiona
     output_dir.mkdir(parents=True, exist_ok=True)
     path = output_dir / "errors.csv"
     fields = ["path", "stage", "error_type", "message"]
-    with path.open("w", encoding="utf-8", newline="") as f:
+    with atomic_output(path) as f:
         w = csv.DictWriter(f, fieldnames=fields)
         w.writeheader()
         for r in rows:
@@ -73,6 +370,9 @@ def write_run_poc_json(
         inputs: Dict[str, object],
         artifacts: Dict[str, Dict[str, str]],
         timings_sec: Dict[str, float],
+        cache: Optional[Dict[str, object]] = None,
+        modeling: Optional[Dict[str, object]] = None,
+        instrumentation: Optional[Dict[str, object]] = None,
 ) -> Path:
     path = output_dir / "run_poc.json"
     doc = {
@@ -88,7 +388,32 @@ def write_run_poc_json(
         "artifacts": artifacts,
         "timings_sec": timings_sec,
     }
+    if cache is not None:
+        doc["cache"] = cache
+    if modeling is not None:
+        doc["modeling"] = modeling
+    if instrumentation is not None:
+        doc["instrumentation"] = instrumentation
     with path.open("w", encoding="utf-8") as f:
         json.dump(doc, f, ensure_ascii=False, indent=2)
     logging.info("Wrote %s", path)
     return path
+
+
+def update_run_poc_json(output_dir: Path, sections: Dict[str, Dict[str, object]]) -> Path:
+    """Merge sections into the top-level objects of an existing run_poc.json (e.g. after --refit)."""
+    path = output_dir / "run_poc.json"
+    with path.open("r", encoding="utf-8") as f:
+        doc = json.load(f)
+    for name, values in sections.items():
+        if isinstance(doc.get(name), dict):
+            doc[name].update(values)
+        else:
+            doc[name] = values
+    doc.setdefault("run", {})["updated_at"] = datetime.utcnow().isoformat(timespec="seconds") + "Z"
+    tmp = path.with_name(path.name + ".tmp")
+    with tmp.open("w", encoding="utf-8") as f:
+        json.dump(doc, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+    logging.info("Updated %s", path)
+    return path
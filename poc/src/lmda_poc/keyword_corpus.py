@@ -0,0 +1,250 @@
+# Python
+from __future__ import annotations
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .keywords import LL_THRESHOLD, keyword_stats, label_rows
+
+# Layout of docs/design/hld/code/keywords_text_counts.py: <input>/human_<label>/*.txt, one lemma per line
+LABEL_PREFIX = "human_"
+TABLE_HEADER = "lemma target_count comparison_count target_per_1k comparison_per_1k expected LL %DIFF status\n"
+FILES_PER_TASK = 16
+
+
+def discover_label_files(input_base: Path, prefix: str = LABEL_PREFIX) -> List[Tuple[str, List[Path]]]:
+    """(label, sorted *.txt files) for every <prefix><label> folder, in folder name order."""
+    out = []
+    for d in sorted(p for p in input_base.iterdir() if p.is_dir() and p.name.startswith(prefix)):
+        out.append((d.name[len(prefix):], sorted(d.glob("*.txt"))))
+    return out
+
+
+def read_lemma_file(path: Path) -> Tuple[np.ndarray, int]:
+    """(stripped non-blank lines as a unicode array, lines read) for one file, like the reference loader's loop."""
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    lines = text.split("\n")
+    if lines[-1] == "":
+        lines.pop()  # text ends with a newline (or is empty)
+    lemmas = np.char.strip(np.array(lines, dtype=str))
+    return lemmas[lemmas != ""], len(lines)
+
+
+def count_lemma_files(paths: List[Path]) -> Tuple[np.ndarray, np.ndarray, int]:
+    """
+    Map step: (distinct lemmas in first-occurrence order, their counts, lines read) for a batch of files.
+
+    Lemmas are counted with np.unique on the batch's unicode array; only
+    these two arrays (one buffer each when pickled) cross the process boundary.
+    """
+    parts = []
+    n_lines = 0
+    for p in paths:
+        lemmas, n = read_lemma_file(p)
+        parts.append(lemmas)
+        n_lines += n
+    tokens = np.concatenate(parts) if parts else np.array([], dtype=str)
+    uniq, first, inverse = np.unique(tokens, return_index=True, return_inverse=True)
+    order = np.argsort(first, kind="stable")
+    return uniq[order], np.bincount(inverse, minlength=len(uniq)).astype(np.int64)[order], n_lines
+
+
+@dataclass
+class LoadStats:
+    files: int = 0
+    lines: int = 0
+    tokens: int = 0
+    seconds: float = 0.0
+
+    @property
+    def lines_per_sec(self) -> float:
+        return self.lines / self.seconds if self.seconds > 0 else 0.0
+
+
+@dataclass
+class LabelCounts:
+    """Reduced counts: labels x vocabulary matrix, tokens per label, lemma per column (global first-seen order)."""
+    labels: List[str]
+    vocab: List[str]
+    counts: np.ndarray
+    tokens: np.ndarray
+    stats: LoadStats
+
+
+def _batches(label_files: List[Tuple[str, List[Path]]]) -> Iterator[Tuple[int, List[Path]]]:
+    for j, (_, files) in enumerate(label_files):
+        for i in range(0, len(files), FILES_PER_TASK):
+            yield j, files[i:i + FILES_PER_TASK]
+
+
+def load_label_counts(label_files: List[Tuple[str, List[Path]]], workers: int = 0) -> LabelCounts:
+    """
+    Count every label's files and reduce into one vocabulary index and a labels x vocabulary count matrix.
+
+    Files are mapped to worker processes in batches (workers=0 counts in
+    this process). The batches' distinct lemmas are concatenated in file order
+    and given global ids with one np.unique; ranking each lemma by its first
+    position keeps the reference's first-seen vocabulary order, and np.add.at
+    sums the counts into the labels x vocabulary matrix. No per-lemma Python
+    loop runs in this process.
+    """
+    t0 = time.perf_counter()
+    stats = LoadStats()
+    batches = list(_batches(label_files))
+    lemma_parts: List[np.ndarray] = []
+    count_parts: List[np.ndarray] = []
+    label_parts: List[np.ndarray] = []
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 0 and len(batches) > 1 else None
+    try:
+        results = pool.map(count_lemma_files, [b for _, b in batches]) if pool else (
+            count_lemma_files(b) for _, b in batches)
+        for (j, files), (lemmas, counts, n_lines) in zip(batches, results):
+            stats.files += len(files)
+            stats.lines += n_lines
+            lemma_parts.append(lemmas)
+            count_parts.append(counts)
+            label_parts.append(np.full(len(lemmas), j, dtype=np.intp))
+    finally:
+        if pool:
+            pool.shutdown()
+
+    all_lemmas = np.concatenate(lemma_parts) if lemma_parts else np.array([], dtype=str)
+    all_counts = np.concatenate(count_parts) if count_parts else np.zeros(0, dtype=np.int64)
+    all_labels = np.concatenate(label_parts) if label_parts else np.zeros(0, dtype=np.intp)
+    uniq, first, inverse = np.unique(all_lemmas, return_index=True, return_inverse=True)
+    order = np.argsort(first, kind="stable")  # vocabulary ids in first-seen order
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    vocab = uniq[order].tolist()
+    matrix = np.zeros((len(label_files), len(vocab)), dtype=np.int64)
+    np.add.at(matrix, (all_labels, rank[inverse]), all_counts)
+    tokens = np.zeros(len(label_files), dtype=np.int64)
+    np.add.at(tokens, all_labels, all_counts)
+    stats.tokens = int(tokens.sum())
+    stats.seconds = time.perf_counter() - t0
+    logging.info(
+        "Loaded %d files, %d lines, %d tokens, %d lemmas in %.2fs (%.0f lines/s)",
+        stats.files, stats.lines, stats.tokens, len(vocab), stats.seconds, stats.lines_per_sec,
+    )
+    return LabelCounts([lab for lab, _ in label_files], vocab, matrix, tokens, stats)
+
+
+@dataclass(frozen=True)
+class CountsHandle:
+    """What a keyword worker receives: paths of the memory-mapped count matrix and vocabulary, not the data."""
+    counts_path: str
+    totals_path: str
+    vocab_path: str
+    tokens: Tuple[int, ...]
+
+
+def share_counts(lc: LabelCounts, folder: Path) -> CountsHandle:
+    """Write the count matrix and column totals as .npy (opened with mmap by workers) and the vocabulary as one lemma per line."""
+    counts_path = folder / "counts.npy"
+    mm = np.lib.format.open_memmap(counts_path, mode="w+", dtype=np.int64, shape=lc.counts.shape)
+    mm[:] = lc.counts
+    mm.flush()
+    del mm
+    totals_path = folder / "totals.npy"
+    np.save(totals_path, lc.counts.sum(axis=0))
+    vocab_path = folder / "vocab.txt"
+    vocab_path.write_text("".join(f"{lemma}\n" for lemma in lc.vocab), encoding="utf-8")
+    return CountsHandle(str(counts_path), str(totals_path), str(vocab_path), tuple(int(t) for t in lc.tokens))
+
+
+def write_label_table(
+        handle: CountsHandle,
+        label_index: int,
+        outpath: str,
+        threshold: float = LL_THRESHOLD,
+) -> str:
+    """
+    Keyword table for one label, in the reference human_<label>.txt format.
+
+    The label row and the column totals are read from the memory-mapped
+    matrix; keyness is computed on the 2 x vocabulary table (label, rest).
+    """
+    counts = np.load(handle.counts_path, mmap_mode="r")
+    a = np.asarray(counts[label_index])
+    b = np.load(handle.totals_path, mmap_mode="r") - a
+    tok = handle.tokens[label_index]
+    stats = keyword_stats(np.vstack((a, b)), np.array([tok, sum(handle.tokens) - tok]), threshold)
+    vocab = Path(handle.vocab_path).read_text(encoding="utf-8").split("\n")[:-1]
+    tmp = outpath + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as fout:
+        fout.write(TABLE_HEADER)
+        for r in label_rows(stats, 0, vocab):
+            fout.write(" ".join(map(str, r)) + "\n")
+    os.replace(tmp, outpath)
+    return outpath
+
+
+def write_keyword_tables(
+        lc: LabelCounts,
+        output_base: Path,
+        workers: int = 0,
+        threshold: float = LL_THRESHOLD,
+        prefix: str = LABEL_PREFIX,
+) -> List[Path]:
+    """Write <output_base>/<prefix><label>.txt for every label; workers only get a CountsHandle."""
+    output_base.mkdir(parents=True, exist_ok=True)
+    outputs = [output_base / f"{prefix}{label}.txt" for label in lc.labels]
+    with tempfile.TemporaryDirectory(prefix="lmda_kw_") as tmp:
+        handle = share_counts(lc, Path(tmp))
+        args = [(handle, j, str(p), threshold) for j, p in enumerate(outputs)]
+        if workers > 0 and len(args) > 1:
+            with ProcessPoolExecutor(max_workers=workers) as ex:
+                list(ex.map(write_label_table, *zip(*args)))
+        else:
+            for a in args:
+                write_label_table(*a)
+    for p in outputs:
+        logging.info("Keywords saved: %s", p)
+    return outputs
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(
+        prog="python -m lmda_poc.keyword_corpus",
+        description="Keyword tables (LL, %DIFF) per human_<label> folder of one-lemma-per-line files.",
+    )
+    ap.add_argument("--input", default="corpus/09_lemma_tokens", help="Folder with human_<label> subfolders")
+    ap.add_argument("--output", default="corpus/10_keywords", help="Folder for human_<label>.txt tables")
+    ap.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 1) - 1),
+                    help="Worker processes for counting and tables (0 = in-process)")
+    ap.add_argument("--threshold", type=float, default=LL_THRESHOLD, help="LL cut-off for POSKW/NEGKW")
+    args = ap.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s | %(levelname)s | %(message)s",
+                        datefmt="%Y-%m-%d %H:%M:%S")
+    input_base = Path(args.input)
+    if not input_base.is_dir():
+        print(f"ERROR: Input folder not found: {input_base}", file=sys.stderr)
+        return 1
+    label_files = discover_label_files(input_base)
+    if not label_files:
+        print(f"ERROR: No '{LABEL_PREFIX}*' subfolders found in {input_base}", file=sys.stderr)
+        return 1
+    workers = max(0, args.workers)
+
+    lc = load_label_counts(label_files, workers)
+    for label, tok in zip(lc.labels, lc.tokens):
+        logging.info("Loaded %d tokens for '%s'", tok, label)
+    t0 = time.perf_counter()
+    write_keyword_tables(lc, Path(args.output), workers, args.threshold)
+    logging.info("Keyword tables for %d labels in %.2fs", len(lc.labels), time.perf_counter() - t0)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
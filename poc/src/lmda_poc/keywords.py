@@ -0,0 +1,182 @@
+# Python
+from __future__ import annotations
+import logging
+from dataclasses import dataclass
+from typing import List, Sequence
+
+import numpy as np
+
+# chi-square critical value for p=0.05, df=1 (as in docs/design/hld/code/keywords_text_counts.py)
+LL_THRESHOLD = 3.84
+DEFAULT_TIE_BREAK = ("score_desc", "lemma_asc", "pos_asc")
+
+POSKW, NEGKW, NOTKW = 0, 1, 2
+STATUS_NAMES = ("POSKW", "NEGKW", "NOTKW")
+
+
+@dataclass
+class KeywordStats:
+    """
+    Keyness of every lemma (columns) for every category (rows) against the rest of the corpus.
+
+    Same quantities as process_label() in the reference script, computed for all
+    categories x lemmas at once: a = target count, b = comparison count,
+    per-thousand rates, expected target frequency, log-likelihood, %DIFF and
+    status (POSKW / NEGKW / NOTKW codes).
+    """
+    target_count: np.ndarray
+    comparison_count: np.ndarray
+    target_per_1k: np.ndarray
+    comparison_per_1k: np.ndarray
+    expected: np.ndarray
+    ll: np.ndarray
+    diff: np.ndarray
+    status: np.ndarray
+
+
+def keyword_stats(
+        counts: np.ndarray,
+        tokens: np.ndarray | None = None,
+        threshold: float = LL_THRESHOLD,
+) -> KeywordStats:
+    """
+    counts: categories x lemmas frequencies; tokens: total tokens per category
+    (defaults to the row sums, i.e. every token is one of the lemmas).
+    """
+    a = np.asarray(counts, dtype=np.float64)
+    c = a.sum(axis=1) if tokens is None else np.asarray(tokens, dtype=np.float64)
+    total = c.sum()
+    b = a.sum(axis=0)[None, :] - a
+    c = c[:, None]
+    d = total - c
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        per_a = np.where(c > 0, a / c * 1000, 0.0)
+        per_b = np.where(d > 0, b / d * 1000, 0.0)
+        e1 = c * (a + b) / total  # expected target frequency
+        e2 = d * (a + b) / total
+        expected = e1 if total else np.zeros_like(a)
+        # LL is 0 whenever a or b is 0 (the reference returns early), so the logs below are only used where finite
+        ok = (a > 0) & (b > 0)
+        ll = np.where(ok, 2 * (a * np.log(a / e1) + b * np.log(b / e2)), 0.0)
+        mean = (per_a + per_b) / 2
+        diff = np.where(mean != 0, 100 * (per_a - per_b) / mean, 0.0)
+
+    status = np.full(a.shape, NOTKW, dtype=np.int8)
+    sig = ll >= threshold
+    status[sig] = NEGKW
+    status[sig & (diff > 0)] = POSKW
+    return KeywordStats(a, b, per_a, per_b, expected, ll, diff, status)
+
+
+def _sort_keys(
+        tie_break: Sequence[str],
+        score: np.ndarray,
+        lemmas: np.ndarray,
+        pos: np.ndarray,
+) -> List[np.ndarray]:
+    # Translate tie_break entries into np.lexsort keys (most significant first); strings sort via their ranks
+    fields = {"score": score, "lemma": lemmas, "pos": pos}
+    keys = []
+    for rule in tie_break:
+        name, _, direction = rule.rpartition("_")
+        if name not in fields or direction not in ("asc", "desc"):
+            raise ValueError(f"Unknown tie_break rule: {rule!r}")
+        values = fields[name]
+        if values.dtype.kind not in "fiu":
+            values = np.unique(values, return_inverse=True)[1]
+        keys.append(-values if direction == "desc" else values)
+    return keys
+
+
+def top_k(
+        score: np.ndarray,
+        lemmas: Sequence[str],
+        pos: Sequence[str],
+        k: int,
+        tie_break: Sequence[str] = DEFAULT_TIE_BREAK,
+) -> np.ndarray:
+    """
+    Indices of the k best items under tie_break (e.g. score desc, then lemma asc, then POS asc).
+
+    np.argpartition narrows the candidates to the items scoring at least the
+    k-th best score (all ties at the boundary included); only those are
+    sorted, so the cost is O(n + m log m) for m candidates instead of a full sort.
+    """
+    score = np.asarray(score, dtype=np.float64)
+    n = len(score)
+    if k >= n:
+        cand = np.arange(n)
+    else:
+        kth = score[np.argpartition(-score, k - 1)[k - 1]]
+        cand = np.flatnonzero(score >= kth)
+    keys = _sort_keys(
+        tie_break,
+        score[cand],
+        np.asarray([lemmas[i] for i in cand], dtype=object),
+        np.asarray([pos[i] for i in cand], dtype=object),
+    )
+    order = np.lexsort(keys[::-1]) if keys else np.arange(len(cand))
+    return cand[order[:k]]
+
+
+def selection_scores(stats: KeywordStats) -> np.ndarray:
+    """
+    topk_loglik_v0 score per lemma: the highest LL over the categories where it is over-represented (%DIFF > 0).
+
+    Every positive keyword (POSKW) of any category therefore ranks by its
+    strongest keyness; lemmas that are not over-represented anywhere score 0.
+    """
+    if stats.ll.shape[0] == 0:
+        return np.zeros(stats.ll.shape[1])
+    return np.where(stats.diff > 0, stats.ll, 0.0).max(axis=0)
+
+
+def select_topk_loglik(
+        counts: np.ndarray,
+        tokens: np.ndarray,
+        lemmas: Sequence[str],
+        pos: Sequence[str],
+        k: int,
+        tie_break: Sequence[str] = DEFAULT_TIE_BREAK,
+        threshold: float = LL_THRESHOLD,
+):
+    """Return (column indices, scores, stats) for the topk_loglik_v0 selection over categories x lemmas counts."""
+    stats = keyword_stats(counts, tokens, threshold)
+    score = selection_scores(stats)
+    cols = top_k(score, lemmas, pos, k, tie_break)
+    n_pos = int((stats.status == POSKW).any(axis=0).sum())
+    logging.info(
+        "Keywords: %d categories x %d lemmas, %d positive keywords (LL >= %.2f); selected %d",
+        counts.shape[0], counts.shape[1], n_pos, threshold, len(cols),
+    )
+    return cols, score[cols], stats
+
+
+def label_rows(stats: KeywordStats, label: int, lemmas: Sequence[str]) -> List[tuple]:
+    """
+    One category's table in the reference layout and order: POSKW, NEGKW, NOTKW, each by LL (2 d.p.) descending.
+
+    Rows are (lemma, target_count, comparison_count, target_per_1k,
+    comparison_per_1k, expected, LL, %DIFF, status) rounded as in the
+    reference; ties keep the input lemma order like its stable sort.
+    """
+    # Python's round() on plain floats (via tolist) matches the reference exactly; np.round can differ in the last digit
+    ll = [round(x, 2) for x in stats.ll[label].tolist()]
+    order = np.lexsort((-np.asarray(ll), stats.status[label])).tolist()
+    a = stats.target_count[label].astype(np.int64).tolist()
+    b = stats.comparison_count[label].astype(np.int64).tolist()
+    per_a = stats.target_per_1k[label].tolist()
+    per_b = stats.comparison_per_1k[label].tolist()
+    expected = stats.expected[label].tolist()
+    diff = stats.diff[label].tolist()
+    status = stats.status[label].tolist()
+    return [
+        (
+            lemmas[j], a[j], b[j],
+            round(per_a[j], 2), round(per_b[j], 2), round(expected[j], 2),
+            ll[j], round(diff[j], 2),
+            STATUS_NAMES[status[j]],
+        )
+        for j in order
+    ]
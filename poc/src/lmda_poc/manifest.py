@@ -0,0 +1,223 @@
+# Python
+from __future__ import annotations
+import csv
+import hashlib
+import json
+import logging
+import os
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .counts import DocCounts, LemmaPosInterner
+from .ingestion import DocRecord
+from .io_artifacts import sha256_file
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 2
+MANIFEST_TABLES = ("docs.csv", "tokens.csv")  # the tables an incremental run merges from
+
+
+class ManifestMismatch(ValueError):
+    """The previous docs.csv does not hold every document the manifest lists as unchanged."""
+
+
+@dataclass(frozen=True)
+class ManifestEntry:
+    doc_id: str
+    path: str
+    size: int
+    mtime_ns: int
+    sha256: str  # of the decoded text
+
+
+@dataclass
+class IncrementalPlan:
+    """Partition of the current candidate files against the previous run's manifest."""
+    unchanged: Dict[str, ManifestEntry] = field(default_factory=dict)  # same size + mtime: not read at all
+    to_read: List[Path] = field(default_factory=list)  # added, or size/mtime changed
+    removed: List[str] = field(default_factory=list)
+
+
+def text_sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8", errors="surrogatepass")).hexdigest()
+
+
+def load_manifest(output_dir: Path, settings: Dict[str, object]) -> Optional[Dict[str, ManifestEntry]]:
+    """
+    Return the previous run's entries, or None if there is no usable manifest.
+
+    A manifest written under different settings (anything that changes per-document
+    rows), or whose docs.csv/tokens.csv are missing or were rewritten since (e.g. by
+    the GUI), is not usable for an incremental run.
+    """
+    path = output_dir / MANIFEST_NAME
+    if not path.is_file():
+        logging.info("No manifest at %s", path)
+        return None
+    if not (output_dir / "docs.csv").is_file() or not (output_dir / "tokens.csv").is_file():
+        logging.warning("Manifest found but docs.csv/tokens.csv are missing in %s", output_dir)
+        return None
+    try:
+        with path.open("r", encoding="utf-8") as f:
+            raw = json.load(f)
+        if raw.get("version") != MANIFEST_VERSION:
+            logging.warning("Manifest version %r not supported", raw.get("version"))
+            return None
+        if raw.get("settings") != settings:
+            logging.warning("Manifest settings differ from this run's settings")
+            return None
+        for name in MANIFEST_TABLES:
+            table = output_dir / name
+            recorded = raw["tables"][name]
+            st = table.stat()
+            if st.st_size != recorded["size"]:
+                logging.warning("%s no longer matches the manifest", table)
+                return None
+            # Same size and mtime as written: trust it rather than reading the largest output once more
+            if st.st_mtime_ns != recorded.get("mtime_ns") and sha256_file(table) != recorded["sha256"]:
+                logging.warning("%s no longer matches the manifest", table)
+                return None
+        return {e["doc_id"]: ManifestEntry(**e) for e in raw["documents"]}
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        logging.warning("Ignoring unreadable manifest %s: %s", path, e)
+        return None
+
+
+def write_manifest(
+        output_dir: Path,
+        settings: Dict[str, object],
+        entries: Iterable[ManifestEntry],
+        tables: Dict[str, Dict[str, object]],
+) -> Path:
+    """tables maps each MANIFEST_TABLES name to its {"size", "mtime_ns", "sha256"} as written by this run."""
+    output_dir.mkdir(parents=True, exist_ok=True)
+    path = output_dir / MANIFEST_NAME
+    tmp = output_dir / (MANIFEST_NAME + ".tmp")
+    docs = [asdict(e) for e in sorted(entries, key=lambda e: e.doc_id)]
+    with tmp.open("w", encoding="utf-8") as f:
+        json.dump({
+            "version": MANIFEST_VERSION,
+            "settings": settings,
+            "tables": {name: {key: tables[name][key] for key in ("size", "mtime_ns", "sha256")}
+                       for name in MANIFEST_TABLES},
+            "documents": docs,
+        }, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, path)
+    logging.info("Wrote %s (%d documents)", path, len(docs))
+    return path
+
+
+def plan_incremental(
+        scanned: List[Tuple[str, os.DirEntry]],
+        previous: Dict[str, ManifestEntry],
+) -> IncrementalPlan:
+    """Split scan_candidate_files() output using the stat info cached by the directory walk."""
+    plan = IncrementalPlan()
+    seen = set()
+    for doc_id, entry in scanned:
+        seen.add(doc_id)
+        prev = previous.get(doc_id)
+        if prev is not None:
+            st = entry.stat()
+            if st.st_size == prev.size and st.st_mtime_ns == prev.mtime_ns:
+                plan.unchanged[doc_id] = prev
+                continue
+        plan.to_read.append(Path(entry.path))
+    plan.removed = sorted(set(previous) - seen)
+    return plan
+
+
+def track_manifest(
+        docs: Iterable[DocRecord],
+        previous: Dict[str, ManifestEntry],
+        entries: Dict[str, ManifestEntry],
+        reused: Dict[str, ManifestEntry],
+) -> Iterator[DocRecord]:
+    """
+    Record a manifest entry for every document read and yield only those that need processing.
+
+    Documents whose text hash matches the previous manifest (e.g. touched but not
+    edited) go to reused instead of being yielded.
+    """
+    for d in docs:
+        st = d.path.stat()
+        entry = ManifestEntry(
+            doc_id=d.doc_id,
+            path=str(d.path),
+            size=st.st_size,
+            mtime_ns=st.st_mtime_ns,
+            sha256=text_sha256(d.text),
+        )
+        entries[d.doc_id] = entry
+        prev = previous.get(d.doc_id)
+        if prev is not None and prev.sha256 == entry.sha256:
+            reused[d.doc_id] = entry
+            continue
+        yield d
+
+
+def iter_previous_rows(output_dir: Path) -> Iterator[Tuple[Dict[str, str], List[Tuple[str, str, str]]]]:
+    """
+    Yield (docs.csv row, [(lemma, pos, count), ...]) per document of the previous run.
+
+    docs.csv and tokens.csv are read in step (both are in doc_id order), and
+    values stay the strings read from disk so rewriting them is byte-identical.
+    """
+    with (output_dir / "docs.csv").open("r", encoding="utf-8", newline="") as fd, \
+            (output_dir / "tokens.csv").open("r", encoding="utf-8", newline="") as ft:
+        tokens = csv.reader(ft)
+        next(tokens, None)  # header
+        pending = next(tokens, None)
+        for r in csv.DictReader(fd):
+            doc_id = r["doc_id"]
+            items: List[Tuple[str, str, str]] = []
+            while pending is not None and pending[0] == doc_id:
+                items.append((pending[1], pending[2], pending[3]))
+                pending = next(tokens, None)
+            yield r, items
+
+
+def merge_incremental(
+        output_dir: Path,
+        new_rows: Iterable[Tuple[Dict[str, object], DocCounts]],
+        keep: Dict[str, ManifestEntry],
+        required: Iterable[str],
+        interner: LemmaPosInterner,
+) -> Iterator[Tuple[Dict[str, object], DocCounts]]:
+    """
+    Merge freshly processed (docs row, counts) pairs with the previous run's rows, in doc_id order.
+
+    A previous document is carried over when it was not re-processed and is
+    still in keep (the manifest entries, filled while files are read). The
+    merge streams both sides, so the previous tables are never held in memory;
+    output_dir's docs.csv/tokens.csv must stay in place until it is exhausted.
+    Previous token rows are interned into interner like the new ones.
+    Raises ManifestMismatch (a ValueError) if any doc_id in required is missing from docs.csv.
+    """
+    new_iter = iter(new_rows)
+    head = next(new_iter, None)
+    carried = set()
+    for old_row, old_items in iter_previous_rows(output_dir):
+        doc_id = old_row["doc_id"]
+        while head is not None and str(head[0]["doc_id"]) < doc_id:
+            yield head
+            head = next(new_iter, None)
+        if head is not None and head[0]["doc_id"] == doc_id:
+            continue  # re-processed: the new row replaces it
+        # Files are read in doc_id order, so keep is settled for doc_id once a later document (or none) is pending
+        if doc_id in keep:
+            carried.add(doc_id)
+            yield old_row, DocCounts.from_items(
+                old_items,
+                interner,
+                n_sentences=int(old_row["n_sentences"]),
+                n_tokens_raw=int(old_row["n_tokens_raw"]),
+                n_tokens_content=int(old_row["n_tokens_content"]),
+            )
+    while head is not None:
+        yield head
+        head = next(new_iter, None)
+    missing = set(required) - carried
+    if missing:
+        raise ManifestMismatch(f"{len(missing)} documents listed in the manifest are missing from docs.csv")
@@ -1,11 +1,32 @@
 # Python
 from __future__ import annotations
 import logging
-from collections import Counter
+import multiprocessing
+import re
+import threading
+from array import array
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
-from typing import Dict, Iterable, List, Tuple
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
-import spacy  # runtime dependency for PoC
+from .counts import DocCounts, LemmaPosInterner
+from .ingestion import DocRecord
+
+# Texts longer than this are split into chunks before tagging (0 disables chunking).
+DEFAULT_CHUNK_CHARS = 100_000
+
+# Chunk boundaries, in order of preference: blank line, sentence end, any whitespace.
+_CHUNK_BREAKS = (
+    re.compile(r"\n[ \t]*\n\s*"),
+    re.compile(r"(?<=[.!?])\s+"),
+    re.compile(r"\s+"),
+)
+
+# Process-wide pipelines keyed by (model_name, profile); see get_pipeline.
+_PIPELINES: Dict[Tuple[str, str], object] = {}
+_PIPELINES_LOCK = threading.Lock()
 
 
 @dataclass(frozen=True)
@@ -15,61 +36,397 @@ class TokenCount:
     count: int
 
 
-def preflight_spacy(model_name: str = "en_core_web_sm") -> Tuple[str, str]:
-    # Returns (spacy_version, model_name_loaded)
-    try:
-        # Prefer package import + .load() for PyInstaller-friendly behavior
-        import en_core_web_sm  # type: ignore
-        _ = en_core_web_sm.load()
-        loaded = "en_core_web_sm"
-    except Exception as e:
-        logging.error("Failed to load spaCy model via package import: %s", e)
-        # Fallback to spacy.load (works in dev environments)
-        _ = spacy.load(model_name, disable=[])
-        loaded = model_name
+@dataclass(frozen=True)
+class PipelineProfile:
+    name: str
+    exclude: Tuple[str, ...] = ()  # components not loaded at all
+    enable: Tuple[str, ...] = ()  # components shipped disabled that the profile switches on
+    description: str = ""
+
+
+# Count extraction reads is_alpha, pos_, lemma_, is_stop and sentence boundaries only.
+# "lexical-fast" drops the dependency parser and NER and takes sentence boundaries
+# from the (much cheaper) senter component instead of the parser.
+PIPELINE_PROFILES: Dict[str, PipelineProfile] = {
+    "full": PipelineProfile(
+        name="full",
+        description="All model components; sentence boundaries from the parser",
+    ),
+    "lexical-fast": PipelineProfile(
+        name="lexical-fast",
+        exclude=("parser", "ner"),
+        enable=("senter",),
+        description="Tagger, attribute ruler and lemmatizer; sentence boundaries from senter",
+    ),
+}
+
+
+def preflight_spacy(model_name: str = "en_core_web_sm", profile: str = "full") -> Tuple[str, str]:
+    # Returns (spacy_version, model_name_loaded). The loaded pipeline stays in the
+    # registry, so the following get_pipeline() call does not load it again.
+    import spacy  # runtime dependency for PoC; imported lazily for fast --help/--dry-run
+
+    nlp = get_pipeline(model_name, profile)
+    meta = getattr(nlp, "meta", {}) or {}
+    loaded = f"{meta['lang']}_{meta['name']}" if meta.get("lang") and meta.get("name") else model_name
     spacy_version = spacy.__version__
     logging.info("spaCy preflight OK: spacy=%s, model=%s", spacy_version, loaded)
     return spacy_version, loaded
 
-def build_pipeline(model_name: str = "en_core_web_sm", add_sentencizer: bool = True):
+
+def build_pipeline(
+        model_name: str = "en_core_web_sm",
+        add_sentencizer: bool = True,
+        exclude: Iterable[str] = (),
+        enable: Iterable[str] = (),
+):
+    import spacy  # runtime dependency for PoC; imported lazily for fast --help/--dry-run
+
+    exclude = list(exclude)
     try:
+        # Prefer package import + .load() for PyInstaller-friendly behavior
         import en_core_web_sm  # type: ignore
-        nlp = en_core_web_sm.load()
-    except Exception:
-        nlp = spacy.load(model_name, disable=[])
+        nlp = en_core_web_sm.load(exclude=exclude)
+    except Exception as e:
+        logging.error("Failed to load spaCy model via package import: %s", e)
+        # Fallback to spacy.load (works in dev environments)
+        nlp = spacy.load(model_name, exclude=exclude)
+    for name in enable:
+        if name in nlp.component_names and name not in nlp.pipe_names:
+            nlp.enable_pipe(name)
     if add_sentencizer and "senter" not in nlp.pipe_names and "sentencizer" not in nlp.pipe_names:
         nlp.add_pipe("sentencizer")
     return nlp
 
 
+def get_pipeline(model_name: str = "en_core_web_sm", profile: str = "full"):
+    """
+    Return the process-wide pipeline for (model_name, profile), loading it on first use.
+
+    Preflight, CLI and GUI all share the returned instance; worker processes
+    each hold their own registry.
+    """
+    if profile not in PIPELINE_PROFILES:
+        raise ValueError(f"Unknown pipeline profile: {profile!r}. Available: {', '.join(PIPELINE_PROFILES)}")
+    key = (model_name, profile)
+    with _PIPELINES_LOCK:
+        nlp = _PIPELINES.get(key)
+        if nlp is None:
+            prof = PIPELINE_PROFILES[profile]
+            nlp = build_pipeline(model_name, add_sentencizer=True, exclude=prof.exclude, enable=prof.enable)
+            logging.info(
+                "Loaded spaCy pipeline: model=%s, profile=%s, components=%s",
+                model_name, profile, ",".join(nlp.pipe_names),
+            )
+            _PIPELINES[key] = nlp
+    return nlp
+
+
+def annotation_namespace(
+        model_name: str = "en_core_web_sm",
+        profile: str = "full",
+        chunk_chars: int = DEFAULT_CHUNK_CHARS,
+) -> str:
+    # Identifies what produced an annotation (spaCy + model version + profile + chunking); used in cache keys.
+    import spacy  # runtime dependency for PoC; imported lazily for fast --help/--dry-run
+
+    nlp = get_pipeline(model_name, profile)
+    model_version = (getattr(nlp, "meta", {}) or {}).get("version", "")
+    return (
+        f"spacy={spacy.__version__};model={model_name}@{model_version};profile={profile};"
+        f"chunk_chars={int(chunk_chars)}"
+    )
+
+
+@dataclass(frozen=True)
+class DocAnnotation:
+    """
+    Model output for one document, independent of the content-word filters.
+
+    entries holds (lemma_or_text, pos, is_stop, count) for alphabetic tokens in
+    first-occurrence order; content_pos, lowercase and keep_stopwords are applied
+    afterwards by counts_from_annotation, so annotations can be cached and reused.
+    """
+    n_sentences: int
+    n_tokens_raw: int
+    entries: Tuple[Tuple[str, str, bool, int], ...]
+
+
+def annotate_doc(doc) -> DocAnnotation:
+    n_sentences = sum(1 for _ in doc.sents)
+    n_tokens_raw = 0
+    counter: Counter = Counter()
+    for t in doc:
+        if not t.is_alpha:
+            continue
+        n_tokens_raw += 1
+        counter[(t.lemma_ or t.text, t.pos_, bool(t.is_stop))] += 1
+    entries = tuple((lemma, pos, is_stop, n) for (lemma, pos, is_stop), n in counter.items())
+    return DocAnnotation(n_sentences=n_sentences, n_tokens_raw=n_tokens_raw, entries=entries)
+
+
+def counts_from_annotation(
+        ann: DocAnnotation,
+        content_pos: Iterable[str],
+        lowercase: bool = True,
+        keep_stopwords: bool = False,
+        interner: Optional[LemmaPosInterner] = None,
+) -> DocCounts:
+    interner = interner if interner is not None else LemmaPosInterner()
+    # A frozen interner only looks pairs up: out-of-vocabulary tokens are dropped here but still
+    # count towards n_tokens_content, the per-thousand denominator
+    lookup = interner.get if interner.frozen else interner.intern
+    content_pos = set(content_pos)
+    counts: Dict[int, int] = {}
+    n_content = 0
+    for lemma, pos, is_stop, n in ann.entries:
+        if pos not in content_pos:
+            continue
+        if not keep_stopwords and is_stop:
+            continue
+        n_content += n
+        i = lookup(lemma.lower() if lowercase else lemma, pos)
+        if i is None:
+            continue
+        counts[i] = counts.get(i, 0) + n
+    return DocCounts(
+        ann.n_sentences,
+        ann.n_tokens_raw,
+        n_content,
+        array("I", counts.keys()),
+        array("I", counts.values()),
+    )
+
+
 def content_counts_for_doc(
         nlp,
         text: str,
         content_pos: List[str],
         lowercase: bool = True,
         keep_stopwords: bool = False,
-) -> Tuple[int, int, int, Dict[Tuple[str, str], int], int]:
+        interner: Optional[LemmaPosInterner] = None,
+) -> DocCounts:
     """
-    Returns:
-      n_sentences, n_tokens_raw, n_tokens_content, counts[(lemma,pos)], n_types_content
+    Returns a DocCounts whose ids refer to interner (a fresh one if omitted):
+      n_sentences, n_tokens_raw, n_tokens_content, n_types_content, ids/counts per (lemma, pos)
     """
-    doc = nlp(text)
-    n_sentences = sum(1 for _ in doc.sents)
-    tokens = [t for t in doc if t.is_alpha]
-    n_tokens_raw = len(tokens)
+    return counts_from_annotation(annotate_doc(nlp(text)), content_pos, lowercase, keep_stopwords, interner)
 
-    def norm_lemma(t):
-        return (t.lemma_ or t.text).lower() if lowercase else (t.lemma_ or t.text)
 
-    kept = []
-    for t in tokens:
-        if t.pos_ not in content_pos:
-            continue
-        if not keep_stopwords and t.is_stop:
-            continue
-        kept.append((norm_lemma(t), t.pos_))
+def split_text(text: str, max_chars: int) -> List[str]:
+    """
+    Split text into chunks of at most max_chars characters at the safest boundary available.
+
+    Each cut is placed at the last paragraph break in the second half of the
+    window, else the last sentence end, else the last whitespace, else at
+    max_chars exactly. Concatenating the chunks gives back the original text.
+    """
+    if max_chars <= 0 or len(text) <= max_chars:
+        return [text]
+    chunks: List[str] = []
+    start = 0
+    while len(text) - start > max_chars:
+        end = start + max_chars
+        cut = end
+        for pattern in _CHUNK_BREAKS:
+            last = None
+            for m in pattern.finditer(text, start + max_chars // 2, end):
+                last = m
+            if last is not None:
+                cut = last.end()
+                break
+        chunks.append(text[start:cut])
+        start = cut
+    chunks.append(text[start:])
+    return chunks
+
+
+def merge_annotations(parts: List[DocAnnotation]) -> DocAnnotation:
+    # Sentence and token totals add up; entries keep first-occurrence order across chunks.
+    if len(parts) == 1:
+        return parts[0]
+    merged: Dict[Tuple[str, str, bool], int] = {}
+    for part in parts:
+        for lemma, pos, is_stop, n in part.entries:
+            key = (lemma, pos, is_stop)
+            merged[key] = merged.get(key, 0) + n
+    return DocAnnotation(
+        n_sentences=sum(p.n_sentences for p in parts),
+        n_tokens_raw=sum(p.n_tokens_raw for p in parts),
+        entries=tuple((lemma, pos, is_stop, n) for (lemma, pos, is_stop), n in merged.items()),
+    )
+
+
+def _batched(items: Iterable, size: int) -> Iterator[List]:
+    it = iter(items)
+    while True:
+        batch = list(islice(it, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _plan_batch(
+        batch: List[DocRecord],
+        cache,
+        chunk_chars: int,
+) -> Tuple[List[Optional[str]], List[Optional[DocAnnotation]], List[Tuple[str, int]]]:
+    # Cache lookups for a batch plus the (chunk_text, batch_index) units still to be tagged.
+    if cache is not None:
+        keys = [cache.key(d.text) for d in batch]
+        found = [cache.get(k) for k in keys]
+    else:
+        keys = [None] * len(batch)
+        found = [None] * len(batch)
+    units: List[Tuple[str, int]] = []
+    for i, (d, ann) in enumerate(zip(batch, found)):
+        if ann is None:
+            chunks = split_text(d.text, chunk_chars)
+            if len(chunks) > 1:
+                logging.debug("Split %s (%d chars) into %d chunks", d.doc_id, d.n_chars, len(chunks))
+            units.extend((chunk, i) for chunk in chunks)
+    return keys, found, units
+
+
+def _finish_batch(
+        batch: List[DocRecord],
+        keys: List[Optional[str]],
+        found: List[Optional[DocAnnotation]],
+        pieces: List[List[DocAnnotation]],
+        cache,
+) -> Iterator[Tuple[DocRecord, DocAnnotation]]:
+    for d, k, ann, parts in zip(batch, keys, found, pieces):
+        if ann is None:
+            ann = merge_annotations(parts)
+            if cache is not None:
+                cache.put(k, ann)
+        yield d, ann
+
+
+def iter_annotations(
+        nlp,
+        docs: Iterable[DocRecord],
+        batch_size: int = 64,
+        cache=None,
+        chunk_chars: int = DEFAULT_CHUNK_CHARS,
+) -> Iterator[Tuple[DocRecord, DocAnnotation]]:
+    """
+    Yield (record, annotation) pairs in input order using nlp.pipe.
+
+    With an AnnotationCache, each batch is looked up first and only the
+    misses are sent through the model; fresh annotations are stored back.
+    Texts longer than chunk_chars are tagged as several chunks (see
+    split_text) and their annotations merged into one per document.
+    """
+    for batch in _batched(docs, batch_size):
+        keys, found, units = _plan_batch(batch, cache, chunk_chars)
+        pieces: List[List[DocAnnotation]] = [[] for _ in batch]
+        for doc, i in nlp.pipe(units, as_tuples=True, batch_size=batch_size):
+            pieces[i].append(annotate_doc(doc))
+        yield from _finish_batch(batch, keys, found, pieces, cache)
+
+
+def iter_content_counts(
+        nlp,
+        docs: Iterable[DocRecord],
+        content_pos: List[str],
+        lowercase: bool = True,
+        keep_stopwords: bool = False,
+        batch_size: int = 64,
+        cache=None,
+        chunk_chars: int = DEFAULT_CHUNK_CHARS,
+        interner: Optional[LemmaPosInterner] = None,
+) -> Iterator[Tuple[DocRecord, DocCounts]]:
+    """
+    Batched counterpart of content_counts_for_doc built on nlp.pipe.
+
+    Yields (record, counts) pairs in input order; for texts up to chunk_chars
+    characters, counts has the same values as
+    content_counts_for_doc(nlp, record.text, ...). Pass the interner that
+    will resolve the ids at export time.
+    """
+    interner = interner if interner is not None else LemmaPosInterner()
+    annotations = iter_annotations(nlp, docs, batch_size=batch_size, cache=cache, chunk_chars=chunk_chars)
+    for record, ann in annotations:
+        yield record, counts_from_annotation(ann, content_pos, lowercase, keep_stopwords, interner)
+
+
+# Per-process state for iter_content_counts_parallel workers (set by _init_worker).
+_WORKER_NLP = None
+_WORKER_BATCH_SIZE = 64
+
+
+def _init_worker(model_name: str, profile: str, batch_size: int) -> None:
+    global _WORKER_NLP, _WORKER_BATCH_SIZE
+    _WORKER_NLP = get_pipeline(model_name, profile)
+    _WORKER_BATCH_SIZE = batch_size
+
 
-    counter = Counter(kept)
-    n_tokens_content = sum(counter.values())
-    n_types_content = len(counter)
-    return n_sentences, n_tokens_raw, n_tokens_content, dict(counter), n_types_content
+def _annotate_texts(texts: List[str]) -> List[DocAnnotation]:
+    return [annotate_doc(doc) for doc in _WORKER_NLP.pipe(texts, batch_size=_WORKER_BATCH_SIZE)]
+
+
+def iter_content_counts_parallel(
+        docs: Iterable[DocRecord],
+        content_pos: List[str],
+        lowercase: bool = True,
+        keep_stopwords: bool = False,
+        batch_size: int = 64,
+        n_process: int = 2,
+        model_name: str = "en_core_web_sm",
+        profile: str = "full",
+        cache=None,
+        chunk_chars: int = DEFAULT_CHUNK_CHARS,
+        interner: Optional[LemmaPosInterner] = None,
+) -> Iterator[Tuple[DocRecord, DocCounts]]:
+    """
+    Multi-process counterpart of iter_content_counts.
+
+    Documents are read in batches of batch_size; the texts (or chunks of long
+    texts) that miss the cache are sent as tasks of up to batch_size units to
+    a pool of n_process workers, each of which loads the spaCy model once, so
+    the chunks of one long document are tagged on several cores. Only texts
+    travel to the workers and only annotations come back; cache lookups,
+    chunk merging, the content-word filters and id interning run in this
+    process. Results are yielded in input order, so artefacts are identical
+    to the serial path. Reading pauses while more than 2 * n_process tasks
+    are in flight.
+    """
+    interner = interner if interner is not None else LemmaPosInterner()
+    ctx = multiprocessing.get_context("spawn")
+    pool = ProcessPoolExecutor(
+        max_workers=n_process,
+        mp_context=ctx,
+        initializer=_init_worker,
+        initargs=(model_name, profile, batch_size),
+    )
+    logging.info("Preprocessing with %d worker processes (batch_size=%d)", n_process, batch_size)
+
+    def finish(entry) -> Iterator[Tuple[DocRecord, DocCounts]]:
+        batch, keys, found, owners, futures = entry
+        pieces: List[List[DocAnnotation]] = [[] for _ in batch]
+        results = (ann for fut in futures for ann in fut.result())
+        for i, ann in zip(owners, results):
+            pieces[i].append(ann)
+        for d, ann in _finish_batch(batch, keys, found, pieces, cache):
+            yield d, counts_from_annotation(ann, content_pos, lowercase, keep_stopwords, interner)
+
+    pending: deque = deque()
+    in_flight = 0
+    try:
+        for batch in _batched(docs, batch_size):
+            keys, found, units = _plan_batch(batch, cache, chunk_chars)
+            futures = [
+                pool.submit(_annotate_texts, [text for text, _ in units[j:j + batch_size]])
+                for j in range(0, len(units), batch_size)
+            ]
+            pending.append((batch, keys, found, [i for _, i in units], futures))
+            in_flight += len(futures)
+            while pending and in_flight > 2 * n_process:
+                entry = pending.popleft()
+                in_flight -= len(entry[4])
+                yield from finish(entry)
+        while pending:
+            yield from finish(pending.popleft())
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
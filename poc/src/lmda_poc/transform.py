@@ -0,0 +1,182 @@
+# Python
+from __future__ import annotations
+import argparse
+import csv
+import logging
+import sys
+import time
+from array import array
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+
+from .counts import DocCounts, LemmaPosInterner
+from .efa import EfaModel, factor_columns, load_efa_model
+from .ingestion import DEFAULT_READ_WORKERS, IngestionStats, DocRecord, iter_corpus
+from .io_artifacts import atomic_output
+from .preprocessing import (
+    DEFAULT_CHUNK_CHARS,
+    get_pipeline,
+    iter_content_counts,
+    iter_content_counts_parallel,
+    preflight_spacy,
+)
+
+DEFAULT_TRANSFORM_BATCH = 512
+TRANSFORM_FIELDS = ["doc_id", "category", "n_tokens_content", "n_tokens_in_vocab"]
+
+
+def model_interner(model: EfaModel) -> LemmaPosInterner:
+    """Frozen interner whose ids are the model columns; other lemmas are dropped while counting."""
+    interner = LemmaPosInterner()
+    for lemma, pos in zip(model.lemmas, model.pos):
+        interner.intern(lemma, pos)
+    return interner.freeze()
+
+
+def iter_score_batches(
+        model: EfaModel,
+        results: Iterable[Tuple[DocRecord, DocCounts]],
+        batch_docs: int = DEFAULT_TRANSFORM_BATCH,
+) -> Iterator[Tuple[List[Tuple[str, str]], np.ndarray, np.ndarray, np.ndarray]]:
+    """
+    Project documents onto the model factors batch_docs at a time.
+
+    Yields ([(doc_id, category)], n_tokens_content, n_tokens_in_vocab, scores) per batch.
+    With the frozen model_interner, counts only hold model columns, so
+    memory does not grow with the number of documents. Rows are per
+    thousand content tokens, like counts_norm.npz.
+    """
+    k = len(model.lemmas)
+    records: List[Tuple[str, str]] = []
+    indptr = array("q", [0])
+    indices = array("I")
+    data = array("d")
+    n_tokens = array("q")
+    in_vocab = array("q")
+
+    def flush():
+        # Copies, not frombuffer views: the arrays are cleared and refilled for the next batch
+        X = sp.csr_matrix(
+            (np.array(data, dtype=np.float64), np.array(indices, dtype=np.int32), np.array(indptr, dtype=np.int64)),
+            shape=(len(records), k),
+        )
+        out = (list(records), np.array(n_tokens), np.array(in_vocab), model.transform(X))
+        records.clear()
+        del indptr[1:], indices[:], data[:], n_tokens[:], in_vocab[:]
+        return out
+
+    for record, counts in results:
+        scale = 1000.0 / counts.n_tokens_content if counts.n_tokens_content else 0.0
+        indices.extend(counts.ids)
+        data.extend(c * scale for c in counts.counts)
+        indptr.append(len(indices))
+        n_tokens.append(counts.n_tokens_content)
+        in_vocab.append(sum(counts.counts))
+        records.append((record.doc_id, record.category))
+        if len(records) >= batch_docs:
+            yield flush()
+    if records:
+        yield flush()
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    ap = argparse.ArgumentParser(
+        prog="python -m lmda_poc.transform",
+        description="Score new .txt documents on the factors of a saved efa_model.npz.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    ap.add_argument("--model", required=True, help="efa_model.npz written by lmda_poc --efa")
+    ap.add_argument("--input", required=True, help="Input directory with the documents to score")
+    ap.add_argument("--output", required=True, help="CSV file for the factor scores")
+    ap.add_argument("--encoding", default="utf-8", help="Default file encoding")
+    ap.add_argument("--include-patterns", default="*.txt", help="Comma-separated glob patterns to include")
+    ap.add_argument("--exclude-patterns", default="", help="Comma-separated glob patterns to exclude")
+    ap.add_argument("--read-workers", type=int, default=DEFAULT_READ_WORKERS, help="Threads reading files ahead")
+    ap.add_argument("--batch-docs", type=int, default=DEFAULT_TRANSFORM_BATCH,
+                    help="Documents projected (and held in memory) at a time")
+    ap.add_argument("--batch-size", type=int, default=64, help="spaCy nlp.pipe batch size")
+    ap.add_argument("--n-process", type=int, default=1, help="Worker processes for spaCy preprocessing")
+    ap.add_argument("--log-level", default="INFO", help="Logging level (DEBUG, INFO, WARN, ERROR)")
+    ap.add_argument("--fail-on-decode-error", action="store_true", help="Exit non-zero on decoding error")
+    args = ap.parse_args(argv)
+    for name in ("read_workers", "batch_docs", "batch_size", "n_process"):
+        if getattr(args, name) < (0 if name == "read_workers" else 1):
+            ap.error(f"--{name.replace('_', '-')} is out of range: {getattr(args, name)}")
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv if argv is not None else sys.argv[1:])
+    logging.basicConfig(level=getattr(logging, args.log_level.upper(), logging.INFO),
+                        format="%(asctime)s | %(levelname)s | %(message)s", datefmt="%Y-%m-%d %H:%M:%S")
+    try:
+        model = load_efa_model(Path(args.model))
+    except (OSError, KeyError, ValueError) as e:
+        print(f"ERROR: Cannot load model {args.model}: {e}", file=sys.stderr)
+        return 1
+    prep = model.meta.get("preprocessing", {})
+    spacy_model = prep.get("spacy_model", "en_core_web_sm")
+    profile = prep.get("pipeline_profile", "full")
+    try:
+        preflight_spacy(spacy_model, profile)
+    except Exception as e:
+        logging.error("Preflight failed: %s", e)
+        print(f"ERROR: spaCy model '{spacy_model}' not available. Please enable it in your environment.", file=sys.stderr)
+        return 3
+
+    # Documents must go through the preprocessing the model was fitted on
+    settings = dict(
+        content_pos=list(prep.get("content_pos", ["NOUN", "VERB", "ADJ", "ADV"])),
+        lowercase=bool(prep.get("lowercase", True)),
+        keep_stopwords=bool(prep.get("keep_stopwords", False)),
+        batch_size=args.batch_size,
+        chunk_chars=int(prep.get("chunk_chars", DEFAULT_CHUNK_CHARS)),
+    )
+    logging.info("Model %s: %d features x %d factors; preprocessing %s, profile=%s",
+                 args.model, len(model.lemmas), model.n_factors, settings, profile)
+    stats = IngestionStats()
+    docs = iter_corpus(
+        input_dir=Path(args.input),
+        encoding=args.encoding,
+        include_patterns=[p.strip() for p in args.include_patterns.split(",") if p.strip()],
+        exclude_patterns=[p.strip() for p in args.exclude_patterns.split(",") if p.strip()],
+        fail_on_decode_error=args.fail_on_decode_error,
+        stats=stats,
+        read_workers=args.read_workers,
+    )
+    interner = model_interner(model)
+    if args.n_process > 1:
+        results = iter_content_counts_parallel(docs=docs, n_process=args.n_process, model_name=spacy_model,
+                                               profile=profile, interner=interner, **settings)
+    else:
+        results = iter_content_counts(get_pipeline(spacy_model, profile), docs, interner=interner, **settings)
+
+    out_path = Path(args.output)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    t0 = time.perf_counter()
+    n_docs = 0
+    try:
+        with atomic_output(out_path) as f:
+            w = csv.writer(f)
+            w.writerow(TRANSFORM_FIELDS + factor_columns(model.n_factors))
+            for records, n_tokens, in_vocab, scores in iter_score_batches(model, results, args.batch_docs):
+                for (doc_id, category), nt, iv, row in zip(records, n_tokens.tolist(), in_vocab.tolist(), scores.tolist()):
+                    w.writerow([doc_id, category, nt, iv, *map(repr, row)])
+                n_docs += len(records)
+                logging.info("Scored %d documents", n_docs)
+    except UnicodeDecodeError as e:
+        logging.error("Decoding error with --fail-on-decode-error: %s", e)
+        print("ERROR: Decoding failed. Try --encoding utf-8 or drop --fail-on-decode-error to skip bad files.",
+              file=sys.stderr)
+        return 2
+    for e in stats.errors:
+        logging.warning("Skipped %s: %s", e[0], e[-1])
+    print(f"Scored {n_docs} docs on {model.n_factors} factors in {time.perf_counter() - t0:.2f}s. Wrote {out_path}.")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,5 +1,6 @@
 # Python
 # File: run_lmda_poc.py (repository root)
+import multiprocessing
 import sys
 from pathlib import Path
 
@@ -50,6 +51,8 @@ def _run_gui():
 
 
 if __name__ == "__main__":
+    # Required for --n-process worker pools in frozen (PyInstaller) builds
+    multiprocessing.freeze_support()
     import argparse
     parser = argparse.ArgumentParser()
     parser.add_argument("--gui", action="store_true", help="Launch the PySide6 GUI")
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Benchmark the feature correlation matrix for EFA: sparse X^T X with analytic
+mean/variance corrections (lmda_poc.efa.correlation_matrix) versus the naive
+np.corrcoef(X.toarray()).
+
+A synthetic per-thousand CSR matrix (docs x features, --density non-zeros) is
+generated; pass --counts-norm to use a counts_norm.npz from a run instead.
+Peak memory is measured with tracemalloc (NumPy and SciPy allocations are
+traced) and both results must agree within --tol, otherwise the script exits
+with status 1. --skip-dense times only the sparse path (for corpora whose
+dense matrix would not fit in memory).
+
+Usage:
+  python scripts/benchmarks/bench_correlation.py
+  python scripts/benchmarks/bench_correlation.py --docs 200000 --features 1000 --chunk-rows 20000 --skip-dense
+  python scripts/benchmarks/bench_correlation.py --counts-norm artefacts_poc/counts_norm.npz --json-out corr.json
+"""
+
+from __future__ import annotations
+import argparse
+import gc
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import scipy.sparse as sp
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(REPO_ROOT / "poc" / "src"))
+
+from lmda_poc.efa import CORR_CHUNK_ROWS, correlation_matrix  # noqa: E402
+
+
+def synthetic_counts_norm(n_docs: int, k: int, density: float, seed: int) -> sp.csr_matrix:
+    rng = np.random.default_rng(seed)
+    nnz_per_row = max(1, int(k * density))
+    # Zipf-like column popularity so a few features are dense and most are rare
+    p = 1.0 / np.arange(1, k + 1)
+    p /= p.sum()
+    indices = rng.choice(k, size=(n_docs, nnz_per_row), p=p)
+    rows = np.repeat(np.arange(n_docs), nnz_per_row)
+    data = rng.integers(1, 20, size=rows.size).astype(np.float64)
+    X = sp.csr_matrix((data, (rows, indices.ravel())), shape=(n_docs, k))
+    X.sum_duplicates()
+    lengths = rng.integers(200, 5000, size=n_docs)
+    return sp.diags(1000.0 / lengths) @ X
+
+
+def measure(fn):
+    gc.collect()
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    out = fn()
+    seconds = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return out, seconds, peak / 2 ** 20
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--counts-norm", default=None, help="counts_norm.npz written by lmda_poc --features")
+    ap.add_argument("--docs", type=int, default=20000)
+    ap.add_argument("--features", type=int, default=1000)
+    ap.add_argument("--density", type=float, default=0.05)
+    ap.add_argument("--chunk-rows", type=int, default=CORR_CHUNK_ROWS, help="0 = one block")
+    ap.add_argument("--skip-dense", action="store_true")
+    ap.add_argument("--tol", type=float, default=1e-10)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--json-out", default=None)
+    args = ap.parse_args()
+
+    if args.counts_norm:
+        X = sp.load_npz(args.counts_norm).tocsr()
+    else:
+        X = synthetic_counts_norm(args.docs, args.features, args.density, args.seed).tocsr()
+    print(f"Matrix: {X.shape[0]} docs x {X.shape[1]} features, nnz={X.nnz} "
+          f"({X.data.nbytes / 2 ** 20:.1f} MiB of values; dense would be {X.shape[0] * X.shape[1] * 8 / 2 ** 20:.1f} MiB)")
+
+    (R, _, _), t_sparse, mem_sparse = measure(lambda: correlation_matrix(X, args.chunk_rows or None))
+    report = {
+        "docs": X.shape[0],
+        "features": X.shape[1],
+        "nnz": int(X.nnz),
+        "chunk_rows": args.chunk_rows,
+        "sparse_sec": round(t_sparse, 3),
+        "sparse_peak_mib": round(mem_sparse, 1),
+    }
+    print(f"sparse X^T X: {t_sparse:.2f}s, peak {mem_sparse:.1f} MiB")
+
+    status = 0
+    if not args.skip_dense:
+        R_dense, t_dense, mem_dense = measure(lambda: np.corrcoef(X.toarray(), rowvar=False))
+        diff = float(np.abs(R - R_dense).max())
+        report.update({
+            "dense_sec": round(t_dense, 3),
+            "dense_peak_mib": round(mem_dense, 1),
+            "max_abs_diff": diff,
+        })
+        print(f"dense corrcoef: {t_dense:.2f}s, peak {mem_dense:.1f} MiB | max |diff| {diff:.2e}")
+        if not diff <= args.tol:
+            print(f"ERROR: results differ by more than {args.tol}", file=sys.stderr)
+            status = 1
+    if args.json_out:
+        Path(args.json_out).write_text(json.dumps(report, indent=2), encoding="utf-8")
+    return status
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Benchmark keyword-corpus loading and table writing: the reference
+keywords_text_counts.py (serial Counter loading, pickled Counters per task)
+versus lmda_poc.keyword_corpus (files mapped to worker processes, counts
+reduced into one vocabulary index, workers given memory-mapped arrays).
+
+By default a synthetic corpus of human_<label> folders with one lemma per line
+is generated in a temporary directory; pass --input to use a real
+corpus/09_lemma_tokens folder. The reference file order is sorted like the
+new loader's, and every human_<label>.txt table must be byte-identical,
+otherwise the script exits with status 1. Needs numpy and tqdm.
+
+Usage:
+  python scripts/benchmarks/bench_keyword_corpus.py
+  python scripts/benchmarks/bench_keyword_corpus.py --labels 10 --files 200 --lines 5000 --vocab 50000 --workers 4
+  python scripts/benchmarks/bench_keyword_corpus.py --input corpus/09_lemma_tokens --json-out kw_bench.json
+"""
+
+from __future__ import annotations
+import argparse
+import contextlib
+import glob
+import importlib.util
+import io
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(REPO_ROOT / "poc" / "src"))
+
+from lmda_poc.keyword_corpus import discover_label_files, load_label_counts, write_keyword_tables  # noqa: E402
+
+REFERENCE = REPO_ROOT / "docs" / "design" / "hld" / "code" / "keywords_text_counts.py"
+
+
+def load_reference():
+    spec = importlib.util.spec_from_file_location("keywords_text_counts", REFERENCE)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module  # so ProcessPoolExecutor can pickle process_label
+    spec.loader.exec_module(module)
+    # Deterministic file order (the reference uses unsorted glob)
+    module.glob.glob = lambda pattern, _glob=glob.glob: sorted(_glob(pattern))
+    return module
+
+
+def build_corpus(root: Path, labels: int, files: int, lines: int, vocab: int, seed: int) -> None:
+    rng = np.random.default_rng(seed)
+    for j in range(labels):
+        d = root / f"human_label{j:02d}"
+        d.mkdir(parents=True, exist_ok=True)
+        for i in range(files):
+            ids = (rng.zipf(1.2, lines) + 17 * j) % vocab
+            (d / f"doc_{i:05d}.txt").write_text("".join(f"lemma{k}\n" for k in ids), encoding="utf-8")
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--input", default=None, help="Existing folder with human_<label> subfolders")
+    ap.add_argument("--labels", type=int, default=6)
+    ap.add_argument("--files", type=int, default=100, help="Files per label")
+    ap.add_argument("--lines", type=int, default=2000, help="Lemmas per file")
+    ap.add_argument("--vocab", type=int, default=30000)
+    ap.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 1) - 1))
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--json-out", default=None)
+    args = ap.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    with tempfile.TemporaryDirectory(prefix="lmda_kw_bench_") as tmp:
+        tmp = Path(tmp)
+        if args.input:
+            input_base = Path(args.input).resolve()
+        else:
+            input_base = tmp / "in"
+            build_corpus(input_base, args.labels, args.files, args.lines, args.vocab, args.seed)
+
+        ref = load_reference()
+        ref.INPUT_BASE = str(input_base)
+        ref.OUTPUT_BASE = str(tmp / "ref")
+        t0 = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            ref.main()
+        t_ref = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        lc = load_label_counts(discover_label_files(input_base), args.workers)
+        t_load = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        outputs = write_keyword_tables(lc, tmp / "new", args.workers)
+        t_tables = time.perf_counter() - t0
+
+        mismatched = [p.name for p in outputs if p.read_bytes() != (tmp / "ref" / p.name).read_bytes()]
+
+    report = {
+        "labels": len(lc.labels),
+        "files": lc.stats.files,
+        "lines": lc.stats.lines,
+        "vocabulary": len(lc.vocab),
+        "workers": args.workers,
+        "reference_total_sec": round(t_ref, 3),
+        "load_sec": round(t_load, 3),
+        "load_lines_per_sec": round(lc.stats.lines_per_sec),
+        "tables_sec": round(t_tables, 3),
+        "speedup": round(t_ref / (t_load + t_tables), 2) if t_load + t_tables > 0 else None,
+        "mismatched_tables": mismatched,
+    }
+    print(f"{report['labels']} labels, {report['files']} files, {report['lines']} lines, "
+          f"vocabulary {report['vocabulary']}, workers {args.workers}")
+    print(f"reference: {t_ref:.2f}s | load: {t_load:.2f}s ({report['load_lines_per_sec']} lines/s) "
+          f"+ tables: {t_tables:.2f}s | speedup x{report['speedup']}")
+    if args.json_out:
+        Path(args.json_out).write_text(json.dumps(report, indent=2), encoding="utf-8")
+    if mismatched:
+        print(f"ERROR: tables differ from the reference: {', '.join(mismatched)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Benchmark spaCy pipeline profiles: throughput and count agreement.
+
+Each profile processes the same reference corpus through
+iter_content_counts. The script reports load time, docs/sec and tokens/sec,
+then compares every profile against the first one (the reference, "full" by
+default) on per-document lemma/POS counts, raw token totals and sentence
+counts.
+
+Usage:
+  python scripts/benchmarks/bench_pipeline_profiles.py --input data/fixture_corpus
+  python scripts/benchmarks/bench_pipeline_profiles.py --input corpus/ --profiles full,lexical-fast --json-out bench.json
+"""
+
+from __future__ import annotations
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(REPO_ROOT / "poc" / "src"))
+
+from lmda_poc.counts import LemmaPosInterner  # noqa: E402
+from lmda_poc.ingestion import ingest_corpus  # noqa: E402
+from lmda_poc.preprocessing import PIPELINE_PROFILES, get_pipeline, iter_content_counts  # noqa: E402
+
+
+def run_profile(profile: str, docs, content_pos: List[str], batch_size: int) -> Dict[str, object]:
+    t0 = time.perf_counter()
+    nlp = get_pipeline("en_core_web_sm", profile)
+    load_sec = time.perf_counter() - t0
+
+    interner = LemmaPosInterner()
+    t1 = time.perf_counter()
+    counts = [
+        c
+        for _, c in iter_content_counts(nlp, docs, content_pos, batch_size=batch_size, interner=interner)
+    ]
+    run_sec = time.perf_counter() - t1
+    # (n_sentences, n_tokens_raw, {(lemma, pos): count}) per document, comparable across profiles
+    results = [(c.n_sentences, c.n_tokens_raw, c.to_dict(interner)) for c in counts]
+    n_tokens = sum(r[1] for r in results)
+    return {
+        "profile": profile,
+        "components": list(nlp.pipe_names),
+        "load_sec": round(load_sec, 3),
+        "run_sec": round(run_sec, 3),
+        "docs_per_sec": round(len(results) / run_sec, 1) if run_sec else None,
+        "tokens_per_sec": round(n_tokens / run_sec, 1) if run_sec else None,
+        "_results": results,
+    }
+
+
+def agreement(reference: List[tuple], other: List[tuple]) -> Dict[str, float]:
+    n = len(reference) or 1
+    same_counts = sum(1 for a, b in zip(reference, other) if a[2] == b[2])
+    same_raw = sum(1 for a, b in zip(reference, other) if a[1] == b[1])
+    same_sents = sum(1 for a, b in zip(reference, other) if a[0] == b[0])
+    # Weighted Jaccard over (doc, lemma, pos) counts: 1.0 means identical tokens tables
+    inter = union = 0
+    for a, b in zip(reference, other):
+        for key in set(a[2]) | set(b[2]):
+            ca, cb = a[2].get(key, 0), b[2].get(key, 0)
+            inter += min(ca, cb)
+            union += max(ca, cb)
+    return {
+        "docs_identical_counts": round(same_counts / n, 4),
+        "docs_identical_n_tokens_raw": round(same_raw / n, 4),
+        "docs_identical_n_sentences": round(same_sents / n, 4),
+        "weighted_jaccard_counts": round(inter / union, 4) if union else 1.0,
+    }
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--input", default=str(REPO_ROOT / "data" / "fixture_corpus"), help="Reference corpus directory")
+    ap.add_argument("--profiles", default=",".join(PIPELINE_PROFILES), help="Comma-separated profiles; first is the reference")
+    ap.add_argument("--content-pos", default="NOUN,VERB,ADJ,ADV")
+    ap.add_argument("--batch-size", type=int, default=64)
+    ap.add_argument("--json-out", default=None, help="Optional path for a JSON report")
+    args = ap.parse_args()
+
+    profiles = [p.strip() for p in args.profiles.split(",") if p.strip()]
+    content_pos = [p.strip().upper() for p in args.content_pos.split(",") if p.strip()]
+    docs, _ = ingest_corpus(Path(args.input))
+    if not docs:
+        print(f"ERROR: no documents found under {args.input}", file=sys.stderr)
+        return 1
+
+    runs = [run_profile(p, docs, content_pos, args.batch_size) for p in profiles]
+    reference = runs[0]
+    for r in runs:
+        r["agreement_vs_" + reference["profile"]] = agreement(reference["_results"], r["_results"])
+
+    print(f"Corpus: {args.input} ({len(docs)} docs)")
+    for r in runs:
+        ag = r["agreement_vs_" + reference["profile"]]
+        print(
+            f"{r['profile']:>14}: load {r['load_sec']:.2f}s, run {r['run_sec']:.2f}s, "
+            f"{r['docs_per_sec']} docs/s, {r['tokens_per_sec']} tokens/s | "
+            f"counts {ag['docs_identical_counts']:.2%} docs identical "
+            f"(weighted Jaccard {ag['weighted_jaccard_counts']:.4f}), "
+            f"sentences {ag['docs_identical_n_sentences']:.2%}"
+        )
+
+    if args.json_out:
+        report = {
+            "corpus": args.input,
+            "documents": len(docs),
+            "batch_size": args.batch_size,
+            "runs": [{k: v for k, v in r.items() if not k.startswith("_")} for r in runs],
+        }
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {args.json_out}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Benchmark corpus file discovery: legacy rglob/Path.match versus the scandir walk.
+
+By default a synthetic deep tree (category folders with nested sub-folders and
+a mix of .txt/.md/.json files) is generated in a temporary directory; pass
+--input to time a real corpus instead. Both implementations must return the
+same file list in the same order, otherwise the script exits with status 1.
+
+Usage:
+  python scripts/benchmarks/bench_scan.py
+  python scripts/benchmarks/bench_scan.py --categories 20 --depth 4 --files-per-dir 50 --exclude "*/drafts/*"
+  python scripts/benchmarks/bench_scan.py --input corpus/ --include "*.txt,*.md" --json-out scan.json
+"""
+
+from __future__ import annotations
+import argparse
+import json
+import logging
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Optional
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(REPO_ROOT / "poc" / "src"))
+
+from lmda_poc.ingestion import list_candidate_files  # noqa: E402
+
+
+def legacy_list_candidate_files(
+        input_dir: Path,
+        include_patterns: Optional[List[str]] = None,
+        exclude_patterns: Optional[List[str]] = None,
+) -> List[Path]:
+    # Previous implementation, kept verbatim as the reference
+    include_patterns = include_patterns or ["*.txt"]
+    exclude_patterns = exclude_patterns or []
+    files: set[Path] = set()
+    for pat in include_patterns:
+        files.update(input_dir.rglob(pat))
+    for pat in exclude_patterns:
+        for p in list(files):
+            if p.match(pat):
+                files.discard(p)
+    kept = [p for p in files if p.is_file()]
+    kept.sort(key=lambda p: p.relative_to(input_dir).as_posix())
+    return kept
+
+
+def build_tree(root: Path, categories: int, depth: int, fanout: int, files_per_dir: int) -> int:
+    n = 0
+    suffixes = (".txt", ".txt", ".txt", ".md", ".json")
+
+    def fill(d: Path, level: int) -> None:
+        nonlocal n
+        d.mkdir(parents=True, exist_ok=True)
+        for i in range(files_per_dir):
+            (d / f"doc_{level}_{i:04d}{suffixes[i % len(suffixes)]}").write_text("x", encoding="utf-8")
+            n += 1
+        if level < depth:
+            for j in range(fanout):
+                fill(d / ("drafts" if j == 0 else f"sub{j}"), level + 1)
+
+    for c in range(categories):
+        fill(root / f"cat{c:02d}", 1)
+    return n
+
+
+def best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--input", default=None, help="Corpus directory (default: generate a synthetic tree)")
+    ap.add_argument("--include", default="*.txt", help="Comma-separated include globs")
+    ap.add_argument("--exclude", default="", help="Comma-separated exclude globs")
+    ap.add_argument("--categories", type=int, default=10)
+    ap.add_argument("--depth", type=int, default=3)
+    ap.add_argument("--fanout", type=int, default=3)
+    ap.add_argument("--files-per-dir", type=int, default=40)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--json-out", default=None, help="Optional path for a JSON report")
+    args = ap.parse_args()
+    logging.disable(logging.INFO)
+
+    include = [p.strip() for p in args.include.split(",") if p.strip()]
+    exclude = [p.strip() for p in args.exclude.split(",") if p.strip()]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.input:
+            root = Path(args.input)
+            n_files = None
+        else:
+            root = Path(tmp)
+            n_files = build_tree(root, args.categories, args.depth, args.fanout, args.files_per_dir)
+
+        expected = legacy_list_candidate_files(root, include, exclude)
+        got = list_candidate_files(root, include, exclude)
+        if got != expected:
+            print(f"ERROR: scandir walk returned {len(got)} files, legacy rglob {len(expected)}", file=sys.stderr)
+            return 1
+
+        t_legacy = best_of(lambda: legacy_list_candidate_files(root, include, exclude), args.repeat)
+        t_scan = best_of(lambda: list_candidate_files(root, include, exclude), args.repeat)
+
+    print(f"Tree: {args.input or 'synthetic'} ({n_files if n_files is not None else '?'} files, {len(got)} selected)")
+    print(f"legacy rglob: {t_legacy:.3f}s | scandir walk: {t_scan:.3f}s | speedup x{t_legacy / t_scan:.2f}")
+
+    if args.json_out:
+        report = {
+            "input": args.input or "synthetic",
+            "files_total": n_files,
+            "files_selected": len(got),
+            "include": include,
+            "exclude": exclude,
+            "legacy_sec": round(t_legacy, 4),
+            "scandir_sec": round(t_scan, 4),
+            "speedup": round(t_legacy / t_scan, 2) if t_scan else None,
+        }
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {args.json_out}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
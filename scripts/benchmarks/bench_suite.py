@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+Benchmark every pipeline stage on a synthetic (or given) corpus and compare against a stored baseline.
+
+Stages, each timed on its own and memory-profiled (maxrss_mib: the process
+peak RSS after the stage, where the resource module exists; with
+--trace-memory also peak_mib, the tracemalloc peak within the stage, which
+covers NumPy and SciPy allocations but slows Python-heavy stages several
+times over):
+  scan          ingestion.list_candidate_files
+  ingest        ingestion.ingest_corpus (read + decode)
+  load_model    preprocessing.get_pipeline
+  preprocess    iter_content_counts (or the parallel path with --n-process > 1)
+  write         docs.csv/tokens.csv writers and the streamed DFM, as in the CLI
+  features      features.build_features (selection + per-thousand weighting)
+  write_features write_feature_artifacts (vocabulary.csv, counts_*.npz)
+  efa           efa.fit_efa on the corpus counts_norm
+  efa_nfr1      efa.fit_efa on a synthetic --nfr1-docs x --nfr1-features matrix (NFR-1: < 10 s)
+
+A stage named in --skip is not timed or reported; if a later stage that is
+still run needs its result (ingest, load_model, preprocess, write, features),
+it is run untimed.
+
+The corpus is generated with make_synthetic_corpus.py (--size 1k/20k/200k or
+--docs) in a temporary directory, or under --corpus-dir where it is reused
+if it already exists; --input times an existing corpus instead. The JSON
+report (--json-out) records seconds, memory and throughput per stage. With
+--baseline, every stage slower or larger than the baseline by more than
+--max-regression (and by more than --min-sec / --min-mib, to ignore noise) is
+reported and the script exits with status 1; compare reports taken with the
+same settings. The default --k is small because the synthetic vocabulary has
+only a few hundred lemmas (K close to the full vocabulary makes the
+per-thousand columns collinear); efa_nfr1 covers K = 1000. The spaCy model
+must be installed, as for the CLI.
+
+Usage:
+  python scripts/benchmarks/bench_suite.py --size 1k --json-out bench_1k.json --trace-memory
+  python scripts/benchmarks/bench_suite.py --size 20k --corpus-dir /tmp/synth_20k --baseline bench_20k.json
+  python scripts/benchmarks/bench_suite.py --input data/fixture_corpus --skip efa_nfr1
+"""
+
+from __future__ import annotations
+import argparse
+import gc
+import json
+import logging
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(REPO_ROOT / "poc" / "src"))
+sys.path.insert(0, str(REPO_ROOT / "scripts"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from lmda_poc.counts import LemmaPosInterner  # noqa: E402
+from lmda_poc.instrumentation import peak_rss_mib  # noqa: E402
+from lmda_poc.ingestion import ingest_corpus, list_candidate_files  # noqa: E402
+from lmda_poc.io_artifacts import DocsCsvWriter, TokensCsvWriter  # noqa: E402
+from lmda_poc.preprocessing import (  # noqa: E402
+    DEFAULT_CHUNK_CHARS,
+    get_pipeline,
+    iter_content_counts,
+    iter_content_counts_parallel,
+)
+from make_synthetic_corpus import SIZES, generate_corpus  # noqa: E402
+
+REPORT_FORMAT = 1
+STAGES = ("scan", "ingest", "load_model", "preprocess", "write", "features", "write_features", "efa", "efa_nfr1")
+NFR1_EFA_BUDGET_SEC = 10.0
+CONTENT_POS = ["NOUN", "VERB", "ADJ", "ADV"]
+
+
+class StageTimer:
+    """Run stages one by one, recording wall seconds, peak RSS and (optionally) the tracemalloc peak of each."""
+
+    def __init__(self, trace_memory: bool, skip: List[str]):
+        self.trace_memory = trace_memory
+        self.skip = set(skip)
+        self.stages: Dict[str, Dict[str, object]] = {}
+
+    def run(
+            self,
+            name: str,
+            fn: Callable[[], object],
+            items: Optional[Callable[[object], Dict[str, int]]] = None,
+            needed: bool = False,
+    ):
+        """Time fn as stage name. A skipped stage returns None, or fn() untimed if a later stage needs it."""
+        if name in self.skip:
+            if not needed:
+                return None
+            print(f"{name:<15} (skipped; run untimed for later stages)")
+            return fn()
+        gc.collect()
+        if self.trace_memory:
+            tracemalloc.start()
+        t0 = time.perf_counter()
+        try:
+            result = fn()
+        finally:
+            sec = time.perf_counter() - t0
+            peak = tracemalloc.get_traced_memory()[1] if self.trace_memory else None
+            if self.trace_memory:
+                tracemalloc.stop()
+        record: Dict[str, object] = {"sec": round(sec, 4)}
+        rss = peak_rss_mib()
+        if rss is not None:
+            record["maxrss_mib"] = rss
+        if peak is not None:
+            record["peak_mib"] = round(peak / 2 ** 20, 2)
+        for unit, n in (items(result) if items else {}).items():
+            record[unit] = n
+            record[f"{unit}_per_sec"] = round(n / sec, 1) if sec else None
+        self.stages[name] = record
+        print(f"{name:<15} {sec:9.3f}s" + (f" rss {rss:8.1f} MiB" if rss is not None else "")
+              + (f" traced {record['peak_mib']:8.1f} MiB" if peak is not None else "")
+              + "".join(f"  {record[f'{u}_per_sec']} {u}/s" for u in (items(result) if items else {})))
+        return result
+
+
+def run_suite(args: argparse.Namespace, corpus: Path, out_dir: Path) -> Dict[str, object]:
+    timer = StageTimer(args.trace_memory, args.skip)
+    run = timer.run
+
+    files = run("scan", lambda: list_candidate_files(corpus, ["*.txt"], []), lambda r: {"files": len(r)})
+    # Every later stage works on the tagged documents, so these always run (untimed when skipped)
+    docs, errors = run("ingest", lambda: ingest_corpus(corpus, read_workers=args.read_workers),
+                       lambda r: {"docs": len(r[0]), "bytes": sum(len(d.text.encode("utf-8")) for d in r[0])},
+                       needed=True)
+    nlp = run("load_model", lambda: get_pipeline("en_core_web_sm", args.pipeline_profile), needed=True) \
+        if args.n_process == 1 else None
+    interner = LemmaPosInterner()
+
+    def preprocess() -> List[tuple]:
+        if args.n_process > 1:
+            return list(iter_content_counts_parallel(
+                docs, CONTENT_POS, batch_size=args.batch_size, n_process=args.n_process,
+                profile=args.pipeline_profile, chunk_chars=args.chunk_chars, interner=interner,
+            ))
+        return list(iter_content_counts(nlp, docs, CONTENT_POS, batch_size=args.batch_size,
+                                        chunk_chars=args.chunk_chars, interner=interner))
+
+    results = run("preprocess", preprocess, lambda r: {"docs": len(r), "tokens": sum(c.n_tokens_raw for _, c in r)},
+                  needed=True)
+    docs.clear()  # texts are no longer needed
+    n_tokens = sum(c.n_tokens_raw for _, c in results)
+
+    features = None
+    dfm = None
+    try:
+        from lmda_poc.efa import fit_efa
+        from lmda_poc.features import DfmBuilder, build_features, write_feature_artifacts
+    except ImportError:
+        logging.warning("numpy/scipy not installed; feature and EFA stages skipped")
+        timer.skip.update(("features", "write_features", "efa", "efa_nfr1"))
+        DfmBuilder = None
+
+    def write():
+        nonlocal dfm
+        dfm = DfmBuilder() if DfmBuilder is not None else None
+        with DocsCsvWriter(out_dir) as docs_w, TokensCsvWriter(out_dir) as tokens_w:
+            for d, counts in results:
+                docs_w.write_row({"doc_id": d.doc_id, "category": d.category, "path": str(d.path),
+                                  "n_chars": d.n_chars, "n_sentences": counts.n_sentences,
+                                  "n_tokens_raw": counts.n_tokens_raw, "n_tokens_content": counts.n_tokens_content,
+                                  "n_types_content": counts.n_types_content, "encoding_used": d.encoding_used})
+                tokens_w.write_counts(d.doc_id, counts, interner)
+                if dfm is not None:
+                    dfm.add(counts, d.category, d.doc_id)
+        return tokens_w.rows
+
+    # write builds the DFM and features the matrices that the later stages use
+    run("write", write, lambda rows: {"rows": rows},
+        needed=not {"features", "write_features", "efa"} <= timer.skip)
+    if dfm is not None:
+        features = run("features", lambda: build_features(dfm, interner, k=args.k), lambda r: {"nnz": r.counts_raw.nnz},
+                       needed=not {"write_features", "efa"} <= timer.skip)
+        if features is not None:
+            run("write_features", lambda: write_feature_artifacts(out_dir, features, interner))
+    if features is not None and "efa" not in timer.skip:
+        try:
+            run("efa", lambda: fit_efa(features.counts_norm, args.n_factors))
+        except ValueError as e:
+            logging.warning("EFA on the corpus failed: %s", e)
+            timer.stages["efa"] = {"error": str(e)}
+    if "efa_nfr1" not in timer.skip:
+        from check_efa_reference import synthetic_dfm
+
+        X = synthetic_dfm(args.nfr1_docs, args.nfr1_features, args.n_factors, args.seed)
+        run("efa_nfr1", lambda: fit_efa(X, args.n_factors))
+
+    pipeline_sec = sum(float(s.get("sec", 0.0)) for k, s in timer.stages.items() if k not in ("efa_nfr1",))
+    nfr1 = {
+        "tokens": n_tokens,
+        "pipeline_sec": round(pipeline_sec, 3),
+        "tokens_per_sec": round(n_tokens / pipeline_sec, 1) if pipeline_sec else None,
+        "efa_shape": [args.nfr1_docs, args.nfr1_features],
+        "efa_budget_sec": NFR1_EFA_BUDGET_SEC,
+    }
+    if "efa_nfr1" in timer.stages:
+        nfr1["efa_within_budget"] = timer.stages["efa_nfr1"]["sec"] < NFR1_EFA_BUDGET_SEC
+    return {
+        "corpus": {"files": len(files) if files is not None else None, "decode_errors": len(errors),
+                   "docs": len(results), "tokens": n_tokens, "types": len(interner)},
+        "stages": timer.stages,
+        "nfr1": nfr1,
+    }
+
+
+def compare(report: Dict[str, object], baseline: Dict[str, object], args: argparse.Namespace) -> List[str]:
+    """Regressions of report against baseline: stages slower/larger by more than --max-regression and the noise floors."""
+    if baseline.get("settings") != report.get("settings"):
+        logging.warning("Baseline settings differ: %s vs %s", baseline.get("settings"), report.get("settings"))
+    regressions = []
+    print(f"{'stage':<15} {'sec':>9} {'base':>9} {'ratio':>7}   {'rss MiB':>8} {'base':>8}")
+    for name, cur in report["stages"].items():
+        base = baseline.get("stages", {}).get(name)
+        if not base or "sec" not in base or "sec" not in cur:
+            continue
+        checks: List[Tuple[str, float, float, float]] = [("sec", cur["sec"], base["sec"], args.min_sec)]
+        for metric in ("maxrss_mib", "peak_mib"):
+            if metric in cur and metric in base:
+                checks.append((metric, cur[metric], base[metric], args.min_mib))
+        ratio = cur["sec"] / base["sec"] if base["sec"] else float("inf")
+        print(f"{name:<15} {cur['sec']:9.3f} {base['sec']:9.3f} {ratio:7.2f}   "
+              f"{cur.get('maxrss_mib', float('nan')):8.1f} {base.get('maxrss_mib', float('nan')):8.1f}")
+        for metric, c, b, floor in checks:
+            if c > b * (1 + args.max_regression) and c - b > floor:
+                regressions.append(f"{name}.{metric}: {c} vs baseline {b} (+{(c / b - 1) * 100 if b else float('inf'):.0f}%)")
+    return regressions
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--input", default=None, help="Existing corpus directory (default: generate a synthetic one)")
+    ap.add_argument("--size", default="1k", choices=list(SIZES), help="Synthetic corpus preset")
+    ap.add_argument("--docs", type=int, default=None, help="Synthetic corpus size in documents (overrides --size)")
+    ap.add_argument("--words-per-doc", type=int, default=100)
+    ap.add_argument("--corpus-dir", default=None,
+                    help="Keep the synthetic corpus here and reuse it on later runs (default: a temporary directory)")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--pipeline-profile", default="full")
+    ap.add_argument("--batch-size", type=int, default=64)
+    ap.add_argument("--n-process", type=int, default=1)
+    ap.add_argument("--read-workers", type=int, default=4)
+    ap.add_argument("--chunk-chars", type=int, default=DEFAULT_CHUNK_CHARS)
+    ap.add_argument("--k", type=int, default=100)
+    ap.add_argument("--n-factors", type=int, default=6)
+    ap.add_argument("--nfr1-docs", type=int, default=20000)
+    ap.add_argument("--nfr1-features", type=int, default=1000)
+    ap.add_argument("--skip", default="", help=f"Comma-separated stages to skip ({', '.join(STAGES)})")
+    ap.add_argument("--trace-memory", action="store_true",
+                    help="Also record the tracemalloc peak per stage (slows Python-heavy stages)")
+    ap.add_argument("--json-out", default=None, help="Path for the JSON report")
+    ap.add_argument("--baseline", default=None, help="JSON report to compare against")
+    ap.add_argument("--max-regression", type=float, default=0.25, help="Allowed fractional slowdown / growth")
+    ap.add_argument("--min-sec", type=float, default=0.05, help="Ignore slowdowns smaller than this many seconds")
+    ap.add_argument("--min-mib", type=float, default=1.0, help="Ignore memory growth smaller than this many MiB")
+    args = ap.parse_args()
+    args.skip = [s.strip() for s in args.skip.split(",") if s.strip()]
+    unknown = set(args.skip) - set(STAGES)
+    if unknown:
+        ap.error(f"Unknown stages in --skip: {', '.join(sorted(unknown))}")
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s | %(message)s")
+
+    settings = {k: getattr(args, k) for k in ("pipeline_profile", "batch_size", "n_process", "chunk_chars", "k",
+                                              "n_factors", "nfr1_docs", "nfr1_features", "trace_memory")}
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.input:
+            corpus = Path(args.input)
+            settings["corpus"] = str(corpus)
+        else:
+            n_docs = args.docs or SIZES[args.size]
+            corpus = Path(args.corpus_dir) if args.corpus_dir else Path(tmp) / "corpus"
+            settings["corpus"] = {"synthetic_docs": n_docs, "words_per_doc": args.words_per_doc, "seed": args.seed}
+            if corpus.exists() and any(corpus.iterdir()):
+                print(f"Reusing corpus {corpus}")
+            else:
+                t0 = time.perf_counter()
+                summary = generate_corpus(corpus, n_docs, words_per_doc=args.words_per_doc, seed=args.seed)
+                print(f"Generated {summary['documents']} docs ({summary['words']} words) in "
+                      f"{time.perf_counter() - t0:.1f}s")
+        out_dir = Path(tmp) / "artefacts"
+        report = {
+            "format": REPORT_FORMAT,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "environment": {"python": platform.python_version(), "platform": platform.platform()},
+            "settings": settings,
+            **run_suite(args, corpus, out_dir),
+        }
+
+    nfr1 = report["nfr1"]
+    print(f"NFR-1: {nfr1['tokens']} tokens through the pipeline in {nfr1['pipeline_sec']:.2f}s "
+          f"({nfr1['tokens_per_sec']} tokens/s)"
+          + (f"; EFA {nfr1['efa_shape'][0]}x{nfr1['efa_shape'][1]} "
+             f"{'within' if nfr1['efa_within_budget'] else 'OVER'} the {nfr1['efa_budget_sec']:.0f}s budget"
+             if "efa_within_budget" in nfr1 else ""))
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {args.json_out}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args)
+        if regressions:
+            print("ERROR: regressions against " + args.baseline + ":\n  " + "\n  ".join(regressions), file=sys.stderr)
+            return 1
+        print(f"No regressions against {args.baseline} (max +{args.max_regression * 100:.0f}%)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
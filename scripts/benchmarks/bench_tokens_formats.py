@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Compare tokens.csv with tokens.parquet: file size, write time and read time.
+
+Reads an existing PoC artefacts folder (docs.csv + tokens.csv), rewrites the
+tokens table as CSV and as Parquet in a temporary directory, and times a full
+read of each plus a projected Parquet read (doc_index, lemma, count) as used
+by the feature stage. The Parquet content is checked against the CSV rows.
+Use --repeat to scale the table up (doc_ids are suffixed per copy) when the
+fixture corpus is too small to give stable timings.
+
+Usage:
+  python scripts/benchmarks/bench_tokens_formats.py --artefacts artefacts_poc
+  python scripts/benchmarks/bench_tokens_formats.py --artefacts artefacts_poc --repeat 50 --json-out tokens_formats.json
+"""
+
+from __future__ import annotations
+import argparse
+import csv
+import json
+import logging
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(REPO_ROOT / "poc" / "src"))
+
+from lmda_poc.io_artifacts import (  # noqa: E402
+    TOKENS_PARQUET_ROW_GROUP,
+    read_tokens_parquet,
+    write_tokens_csv,
+    write_tokens_parquet,
+)
+
+
+def load_rows(artefacts: Path, repeat: int):
+    with (artefacts / "docs.csv").open(encoding="utf-8", newline="") as f:
+        docs = [r for r in csv.DictReader(f)]
+    with (artefacts / "tokens.csv").open(encoding="utf-8", newline="") as f:
+        tokens = [r for r in csv.DictReader(f)]
+    if repeat <= 1:
+        return docs, tokens
+    docs_out: List[Dict[str, object]] = []
+    tokens_out: List[Dict[str, object]] = []
+    for k in range(repeat):
+        docs_out.extend({**d, "doc_id": f"{d['doc_id']}#{k}"} for d in docs)
+        tokens_out.extend({**t, "doc_id": f"{t['doc_id']}#{k}"} for t in tokens)
+    return docs_out, tokens_out
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    out = fn()
+    return out, time.perf_counter() - t0
+
+
+def read_csv_rows(path: Path) -> int:
+    n = 0
+    with path.open(encoding="utf-8", newline="") as f:
+        for r in csv.DictReader(f):
+            int(r["count"])
+            n += 1
+    return n
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--artefacts", default=str(REPO_ROOT / "artefacts_poc"), help="PoC output folder with docs.csv and tokens.csv")
+    ap.add_argument("--repeat", type=int, default=1, help="Replicate the table this many times")
+    ap.add_argument("--row-group", type=int, default=TOKENS_PARQUET_ROW_GROUP)
+    ap.add_argument("--json-out", default=None, help="Optional path for a JSON report")
+    args = ap.parse_args()
+    logging.disable(logging.INFO)
+
+    artefacts = Path(args.artefacts)
+    docs, tokens = load_rows(artefacts, args.repeat)
+    if not tokens:
+        print(f"ERROR: no token rows in {artefacts / 'tokens.csv'}", file=sys.stderr)
+        return 1
+
+    with tempfile.TemporaryDirectory() as tmp:
+        out = Path(tmp)
+        csv_path, csv_write = timed(lambda: write_tokens_csv(out, tokens))
+        (pq_path, row_groups), pq_write = timed(lambda: write_tokens_parquet(out, docs, tokens, args.row_group))
+        n_csv, csv_read = timed(lambda: read_csv_rows(csv_path))
+        table, pq_read = timed(lambda: read_tokens_parquet(pq_path))
+        proj, pq_proj = timed(lambda: read_tokens_parquet(pq_path, ["doc_index", "lemma", "count"]))
+
+        doc_ids = [str(d["doc_id"]) for d in docs]
+        cols = table.to_pydict()
+        same = n_csv == table.num_rows and all(
+            (doc_ids[i], lem, pos, int(c)) == (t["doc_id"], t["lemma"], t["pos"], int(t["count"]))
+            for i, lem, pos, c, t in zip(cols["doc_index"], cols["lemma"], cols["pos"], cols["count"], tokens)
+        )
+        csv_mb = csv_path.stat().st_size / 1e6
+        pq_mb = pq_path.stat().st_size / 1e6
+
+    if not same:
+        print("ERROR: tokens.parquet does not round-trip to the tokens.csv rows", file=sys.stderr)
+        return 1
+
+    print(f"Tokens: {len(tokens)} rows, {len(docs)} docs, {row_groups} row groups")
+    print(f"  csv:     {csv_mb:8.2f} MB | write {csv_write:.3f}s | read {csv_read:.3f}s")
+    print(f"  parquet: {pq_mb:8.2f} MB | write {pq_write:.3f}s | read {pq_read:.3f}s | "
+          f"projected read {pq_proj:.3f}s ({proj.num_columns} columns)")
+    print(f"  size ratio csv/parquet x{csv_mb / pq_mb:.1f}")
+
+    if args.json_out:
+        report = {
+            "artefacts": str(artefacts),
+            "rows": len(tokens),
+            "documents": len(docs),
+            "row_groups": row_groups,
+            "csv": {"mb": round(csv_mb, 3), "write_sec": round(csv_write, 4), "read_sec": round(csv_read, 4)},
+            "parquet": {
+                "mb": round(pq_mb, 3),
+                "write_sec": round(pq_write, 4),
+                "read_sec": round(pq_read, 4),
+                "projected_read_sec": round(pq_proj, 4),
+            },
+        }
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {args.json_out}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Generate a deterministic synthetic corpus laid out like data/fixture_corpus.
+
+Documents go to <output>/<category>/<category>_<n>.txt. Each one is a run of
+simple English sentences ("The quiet market raised the rate slowly.") whose
+content words are drawn from a Zipf-weighted vocabulary, with each category
+favouring its own topic words so keyword selection and EFA have signal.
+The same --seed, --docs and --words-per-doc always give byte-identical files.
+
+Presets: --size 1k, 20k (about 2M tokens with the default 100 words per
+document, the NFR-1 corpus size) or 200k; --docs overrides them.
+
+Usage:
+  python scripts/benchmarks/make_synthetic_corpus.py --output /tmp/synth_1k --size 1k
+  python scripts/benchmarks/make_synthetic_corpus.py --output /tmp/synth --docs 5000 --categories 8 --seed 7
+"""
+
+from __future__ import annotations
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+SIZES = {"1k": 1_000, "20k": 20_000, "200k": 200_000}
+DEFAULT_CATEGORIES = ("blogs", "news", "reports", "reviews", "science")
+TOPIC_WORDS = 40  # preferred nouns/verbs/adjectives per category
+TOPIC_WEIGHT = 4.0
+
+NOUNS = (
+    "market bank rate policy election party government report revenue cost audit committee recipe step photo "
+    "train landscape story city river school student teacher book paper result study method data model sample "
+    "team game player season coach match goal fan stadium price product customer service review quality design "
+    "screen battery camera phone system network server user file record problem solution idea plan project "
+    "budget tax law court judge case witness crime police patient doctor hospital treatment drug trial disease "
+    "cell gene protein experiment theory planet star energy climate weather storm forest animal bird garden food "
+    "dinner kitchen flavour wine coffee music song album artist film scene actor stage history war century region"
+).split()
+VERBS = (
+    "raise cut announce publish describe explain show reveal suggest improve reduce increase support oppose "
+    "review test measure build design launch release sell buy visit travel cook taste enjoy discover examine "
+    "analyse report confirm reject approve change create develop predict observe record share win lose play"
+).split()
+ADJECTIVES = (
+    "new old quiet busy strong weak rapid slow early late central local national global recent final major minor "
+    "simple complex clear difficult cheap expensive fresh bright dark warm cold careful detailed public private"
+).split()
+ADVERBS = (
+    "slowly quickly carefully clearly finally recently openly quietly strongly sharply steadily rarely often "
+    "widely closely easily"
+).split()
+
+
+def _past(verb: str) -> str:
+    if verb.endswith("e"):
+        return verb + "d"
+    if verb in ("cut", "buy", "sell", "win", "lose", "build"):
+        return {"cut": "cut", "buy": "bought", "sell": "sold", "win": "won", "lose": "lost", "build": "built"}[verb]
+    return verb + "ed"
+
+
+class _Sampler:
+    """Zipf-weighted word choice with a per-category boost for its topic words."""
+
+    def __init__(self, words: List[str], topic: List[str], rng: random.Random):
+        boost = set(topic)
+        self.words = words
+        weights = [(TOPIC_WEIGHT if w in boost else 1.0) / (i + 1) ** 0.8 for i, w in enumerate(words)]
+        total = 0.0
+        self.cum = []
+        for x in weights:
+            total += x
+            self.cum.append(total)
+        self.rng = rng
+
+    def __call__(self) -> str:
+        return self.rng.choices(self.words, cum_weights=self.cum)[0]
+
+
+def _sentence(rng: random.Random, s: Dict[str, _Sampler]) -> str:
+    words = ["The", s["adj"](), s["noun"](), _past(s["verb"]()), "the", s["noun"]()]
+    if rng.random() < 0.5:
+        words += ["of", "the", s["adj"](), s["noun"]()]
+    if rng.random() < 0.6:
+        words.append(s["adv"]())
+    return " ".join(words) + "."
+
+
+def generate_corpus(
+        output_dir: Path,
+        n_docs: int,
+        categories=DEFAULT_CATEGORIES,
+        words_per_doc: int = 100,
+        seed: int = 42,
+) -> Dict[str, object]:
+    """Write n_docs documents round-robin over the category folders; returns a summary (docs, words, bytes)."""
+    rng = random.Random(seed)
+    samplers = {}
+    for c in categories:
+        # Each category gets a reproducible topic: a shuffled slice of the noun/verb/adjective lists
+        topic_rng = random.Random(f"{seed}:{c}")
+        samplers[c] = {
+            "noun": _Sampler(NOUNS, topic_rng.sample(NOUNS, TOPIC_WORDS // 2), rng),
+            "verb": _Sampler(VERBS, topic_rng.sample(VERBS, TOPIC_WORDS // 4), rng),
+            "adj": _Sampler(ADJECTIVES, topic_rng.sample(ADJECTIVES, TOPIC_WORDS // 4), rng),
+            "adv": _Sampler(ADVERBS, [], rng),
+        }
+        (output_dir / c).mkdir(parents=True, exist_ok=True)
+    n_words = 0
+    n_bytes = 0
+    width = max(3, len(str(n_docs)))
+    for i in range(n_docs):
+        c = categories[i % len(categories)]
+        target = max(5, int(rng.gauss(words_per_doc, words_per_doc / 4)))
+        sentences = []
+        n = 0
+        while n < target:
+            sentence = _sentence(rng, samplers[c])
+            sentences.append(sentence)
+            n += sentence.count(" ") + 1
+        # Paragraph breaks every few sentences, like the fixture texts
+        paragraphs = [" ".join(sentences[j:j + 4]) for j in range(0, len(sentences), 4)]
+        data = ("\n\n".join(paragraphs) + "\n").encode("utf-8")
+        (output_dir / c / f"{c}_{i // len(categories) + 1:0{width}d}.txt").write_bytes(data)
+        n_words += n
+        n_bytes += len(data)
+    return {"documents": n_docs, "categories": list(categories), "words": n_words, "bytes": n_bytes, "seed": seed,
+            "words_per_doc": words_per_doc}
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--output", required=True, help="Corpus directory to create")
+    ap.add_argument("--size", default="1k", choices=list(SIZES), help="Preset number of documents")
+    ap.add_argument("--docs", type=int, default=None, help="Number of documents (overrides --size)")
+    ap.add_argument("--categories", type=int, default=len(DEFAULT_CATEGORIES),
+                    help="Number of category folders (named after the defaults, then cat05, cat06, ...)")
+    ap.add_argument("--words-per-doc", type=int, default=100, help="Mean words per document")
+    ap.add_argument("--seed", type=int, default=42)
+    args = ap.parse_args()
+
+    out = Path(args.output)
+    if out.exists() and any(out.iterdir()):
+        print(f"ERROR: {out} exists and is not empty", file=sys.stderr)
+        return 1
+    categories = [DEFAULT_CATEGORIES[i] if i < len(DEFAULT_CATEGORIES) else f"cat{i:02d}"
+                  for i in range(args.categories)]
+    t0 = time.perf_counter()
+    summary = generate_corpus(out, args.docs or SIZES[args.size], categories, args.words_per_doc, args.seed)
+    print(json.dumps(summary))
+    print(f"Wrote {summary['documents']} documents ({summary['words']} words) to {out} "
+          f"in {time.perf_counter() - t0:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Validate lmda_poc.efa against a straightforward reference implementation and check NFR-1.
+
+The reference uses a full np.linalg.eigh per principal axis iteration and
+Kaiser's original pairwise (planar) varimax rotations with Kaiser
+normalisation. Both are run on a synthetic docs x K matrix generated from a
+known N-factor model; after matching factor order and sign, loadings,
+communalities and explained variance must agree within --tol. factor_analyzer
+is also compared when installed (method="principal" is not iterated there,
+so only its varimax on our unrotated loadings is checked).
+
+NFR-1: fit_efa on --docs x --features (default 20k x 1k) must take < --budget seconds.
+
+Closed rows: the same kind of matrix scaled so every row sums to 1000, as
+counts_norm does when --k keeps every content type. Its correlation matrix is
+singular; regression scores must match Z R^+ L computed on the centred dense
+matrix, and EfaModel.transform (in batches) must reproduce them, within
+--score-tol.
+
+Usage:
+  python scripts/check_efa_reference.py
+  python scripts/check_efa_reference.py --docs 5000 --features 300 --factors 4 --tol 1e-5
+"""
+
+from __future__ import annotations
+import argparse
+import importlib.util
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import scipy.sparse as sp
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT / "poc" / "src"))
+
+from lmda_poc.efa import correlation_matrix, fit_efa, model_from_result, principal_axis  # noqa: E402
+
+
+def synthetic_dfm(n_docs: int, k: int, n_factors: int, seed: int) -> sp.csr_matrix:
+    """Per-thousand-like sparse matrix: a latent factor model, thresholded so most cells are zero."""
+    rng = np.random.default_rng(seed)
+    L = np.zeros((k, n_factors))
+    for j in range(n_factors):
+        rows = rng.choice(k, max(2, k // (n_factors + 2)), replace=False)
+        L[rows, j] = rng.uniform(0.4, 0.8, len(rows))
+    unique = np.sqrt(np.clip(1 - (L ** 2).sum(axis=1), 0.1, None))
+    Z = rng.standard_normal((n_docs, n_factors)) @ L.T + rng.standard_normal((n_docs, k)) * unique
+    return sp.csr_matrix(np.where(Z > 1.0, Z * 3.0, 0.0))
+
+
+def closed_dfm(n_docs: int, k: int, n_factors: int, seed: int) -> sp.csr_matrix:
+    """synthetic_dfm plus sparse background counts (no empty rows), each row scaled to sum to 1000."""
+    X = synthetic_dfm(n_docs, k, n_factors, seed)
+    X = X + sp.csr_matrix(np.where(np.random.default_rng(seed + 1).random(X.shape) < 0.02, 1.0, 0.0))
+    return sp.csr_matrix(sp.diags(1000.0 / np.asarray(X.sum(axis=1)).ravel()) @ X)
+
+
+def check_closed_rows(n_docs: int, k: int, n_factors: int, seed: int, tol: float, batch_docs: int = 500) -> int:
+    X = closed_dfm(n_docs, k, n_factors, seed)
+    result = fit_efa(X, n_factors)
+    R, mean, std = correlation_matrix(X)
+    w = np.linalg.eigvalsh(R)
+    ref = ((X.toarray() - mean) / std) @ np.linalg.pinv(R, rcond=1e-10, hermitian=True) @ result.loadings
+    model = model_from_result(result, [("x", "NOUN")] * k, {})
+    batched = np.vstack([model.transform(X[i:i + batch_docs]) for i in range(0, n_docs, batch_docs)])
+    d_ref = np.abs(result.scores - ref).max()
+    d_model = np.abs(batched - result.scores).max()
+    print(f"Closed rows ({n_docs} docs x {k} features, condition number {w[-1] / max(abs(w[0]), 1e-300):.1e}): "
+          f"max |scores - centred pinv| {d_ref:.2e}, max |transform - scores| {d_model:.2e}")
+    return int(d_ref > tol) + int(d_model > tol)
+
+
+def reference_paf(R: np.ndarray, n: int, tol: float = 1e-10, max_iter: int = 1000) -> np.ndarray:
+    h = 1 - 1 / np.diag(np.linalg.inv(R))
+    for _ in range(max_iter):
+        Rh = R.copy()
+        np.fill_diagonal(Rh, h)
+        w, V = np.linalg.eigh(Rh)
+        idx = np.argsort(w)[::-1][:n]
+        L = V[:, idx] * np.sqrt(np.maximum(w[idx], 0))
+        h_new = (L ** 2).sum(axis=1)
+        if np.max(np.abs(h_new - h)) < tol:
+            return L
+        h = h_new
+    return L
+
+
+def reference_varimax(L: np.ndarray, tol: float = 1e-12, max_sweeps: int = 1000) -> np.ndarray:
+    """Kaiser (1958): rotate each pair of factors by the angle maximising the varimax criterion."""
+    p, n = L.shape
+    h = np.sqrt((L ** 2).sum(axis=1))
+    A = L / h[:, None]
+    for _ in range(max_sweeps):
+        biggest = 0.0
+        for i in range(n - 1):
+            for j in range(i + 1, n):
+                x, y = A[:, i], A[:, j]
+                u = x * x - y * y
+                v = 2 * x * y
+                num = 2 * (u @ v) - 2 * u.sum() * v.sum() / p
+                den = (u @ u - v @ v) - (u.sum() ** 2 - v.sum() ** 2) / p
+                phi = np.arctan2(num, den) / 4
+                biggest = max(biggest, abs(phi))
+                c, s = np.cos(phi), np.sin(phi)
+                A[:, i], A[:, j] = c * x + s * y, -s * x + c * y
+        if biggest < tol:
+            break
+    return A * h[:, None]
+
+
+def align(ref: np.ndarray, ours: np.ndarray) -> np.ndarray:
+    """Reorder/flip the reference columns to best match ours (greedy on |congruence|)."""
+    out = np.empty_like(ref)
+    free = list(range(ref.shape[1]))
+    for j in range(ours.shape[1]):
+        c = [abs(ref[:, i] @ ours[:, j]) for i in free]
+        i = free.pop(int(np.argmax(c)))
+        out[:, j] = ref[:, i] * np.sign(ref[:, i] @ ours[:, j])
+    return out
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--docs", type=int, default=20000)
+    ap.add_argument("--features", type=int, default=1000)
+    ap.add_argument("--factors", type=int, default=6)
+    ap.add_argument("--tol", type=float, default=1e-4, help="Max absolute loading difference")
+    ap.add_argument("--score-tol", type=float, default=1e-8, help="Max absolute score difference (closed rows)")
+    ap.add_argument("--budget", type=float, default=10.0, help="NFR-1 limit in seconds for fit_efa")
+    ap.add_argument("--seed", type=int, default=42)
+    args = ap.parse_args()
+
+    X = synthetic_dfm(args.docs, args.features, args.factors, args.seed)
+    print(f"Synthetic DFM: {X.shape[0]} docs x {X.shape[1]} features, density {X.nnz / np.prod(X.shape):.3f}")
+    t0 = time.perf_counter()
+    result = fit_efa(X, args.factors)
+    t_fit = time.perf_counter() - t0
+
+    R, _, _ = correlation_matrix(X)
+    t0 = time.perf_counter()
+    ref = reference_varimax(reference_paf(R, args.factors))
+    t_ref = time.perf_counter() - t0
+    ref = align(ref, result.loadings)
+
+    failures = 0
+    d_load = np.abs(ref - result.loadings).max()
+    d_comm = np.abs((ref ** 2).sum(axis=1) - result.communalities).max()
+    d_ss = np.abs((ref ** 2).sum(axis=0) - result.ss_loadings).max()
+    print(f"max |loadings diff| {d_load:.2e}, communalities {d_comm:.2e}, SS loadings {d_ss:.2e}")
+    if max(d_load, d_comm) > args.tol:
+        failures += 1
+
+    if importlib.util.find_spec("factor_analyzer") is not None:
+        from factor_analyzer.rotator import Rotator
+
+        unrotated, _, _, _ = principal_axis(R, args.factors)
+        fa = align(Rotator(method="varimax").fit_transform(unrotated), result.loadings)
+        d_fa = np.abs(fa - result.loadings).max()
+        print(f"factor_analyzer varimax: max |loadings diff| {d_fa:.2e}")
+        if d_fa > args.tol:
+            failures += 1
+    else:
+        print("factor_analyzer not installed; skipped")
+
+    failures += check_closed_rows(min(args.docs, 5000), min(args.features, 300), args.factors, args.seed,
+                                  args.score_tol)
+
+    print(f"fit_efa: {t_fit:.2f}s (NFR-1 budget {args.budget:.1f}s) | reference (full eigh, pairwise varimax): {t_ref:.2f}s")
+    if t_fit > args.budget:
+        print("ERROR: fit_efa exceeds the NFR-1 budget", file=sys.stderr)
+        failures += 1
+    if failures:
+        print(f"FAILED: {failures} check(s)", file=sys.stderr)
+        return 1
+    print("EFA matches the reference")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
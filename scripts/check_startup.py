@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Measure PoC CLI startup time and check that heavy dependencies stay unloaded.
+
+Runs `lmda_poc --help` and `lmda_poc --dry-run` in fresh interpreters, reports
+wall time per command and fails if spaCy, matplotlib or PySide6 were imported
+or if a command exceeds the time budget.
+
+Usage:
+  python scripts/check_startup.py --input data/fixture_corpus --max-seconds 2.0
+"""
+
+from __future__ import annotations
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+HEAVY_MODULES = ["spacy", "matplotlib", "PySide6", "scipy"]
+
+# Runs the CLI in-process, then reports which heavy modules ended up in sys.modules.
+PROBE = """
+import json, sys
+from lmda_poc.cli import main
+try:
+    code = main(sys.argv[1:])
+except SystemExit as e:
+    code = e.code
+heavy = [m for m in {heavy!r} if m in sys.modules]
+print("STARTUP_PROBE " + json.dumps({{"exit": code, "heavy": heavy}}))
+"""
+
+
+def run_probe(argv: List[str], src_dir: str) -> Dict[str, object]:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = src_dir + os.pathsep + env.get("PYTHONPATH", "")
+    code = PROBE.format(heavy=HEAVY_MODULES)
+    t0 = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-c", code, *argv],
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    elapsed = time.perf_counter() - t0
+    line = next((ln for ln in proc.stdout.splitlines() if ln.startswith("STARTUP_PROBE ")), None)
+    if line is None:
+        raise RuntimeError(f"Probe failed for {argv}: {proc.stderr.strip()}")
+    result = json.loads(line[len("STARTUP_PROBE "):])
+    result["seconds"] = round(elapsed, 3)
+    return result
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--input", default=str(REPO_ROOT / "data" / "fixture_corpus"),
+                    help="Corpus used for the --dry-run measurement")
+    ap.add_argument("--project-root", default=str(REPO_ROOT), help="Project root (contains poc/src)")
+    ap.add_argument("--max-seconds", type=float, default=2.0, help="Wall-time budget per command")
+    args = ap.parse_args()
+
+    src_dir = os.path.abspath(os.path.join(args.project_root, "poc", "src"))
+    failures: List[str] = []
+    with tempfile.TemporaryDirectory() as tmp:
+        commands = {
+            "--help": ["--help"],
+            "--dry-run": ["--input", args.input, "--output", tmp, "--dry-run", "--log-level", "WARNING"],
+        }
+        for label, argv in commands.items():
+            result = run_probe(argv, src_dir)
+            print(f"{label}: {result['seconds']:.3f}s exit={result['exit']} heavy_imports={result['heavy']}")
+            if result["exit"] not in (0, None):
+                failures.append(f"{label} exited with {result['exit']}")
+            if result["heavy"]:
+                failures.append(f"{label} imported heavy modules: {', '.join(result['heavy'])}")
+            if result["seconds"] > args.max_seconds:
+                failures.append(f"{label} took {result['seconds']:.3f}s (budget {args.max_seconds:.3f}s)")
+
+    if failures:
+        for f in failures:
+            print(f"ERROR: {f}", file=sys.stderr)
+        return 1
+    print("Startup check passed")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -2,8 +2,15 @@
 """
 Validate Slice v0 run.json for structure, file existence, and SHA-256 hashes.
 
+Artefacts are hashed in parallel with --jobs. --quick trusts a file whose size
+and mtime match the sidecar digest file (<run-json>.digests.json, rewritten
+after every successful validation) or the size/mtime_ns recorded in run.json
+by the writers, and only rehashes files that changed. --artifacts-only skips
+the Slice v0 structure checks, e.g. for the PoC's run_poc.json.
+
 Usage:
   python scripts/validate_run.py --run-json artefacts/run.json --project-root .
+  python scripts/validate_run.py --run-json artefacts_poc/run_poc.json --artifacts-only --jobs 4 --quick
 """
 
 from __future__ import annotations
@@ -12,7 +19,10 @@ import hashlib
 import json
 import os
 import sys
-from typing import Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
+
+SIDECAR_SUFFIX = ".digests.json"
 
 REQUIRED_ARTIFACT_KEYS = [
     "vocabulary_csv",
@@ -60,25 +70,86 @@ def validate_structure(doc: Dict[str, Any]) -> None:
         require(key in timings, f"Missing timings_sec.{key}")
         require(isinstance(timings[key], (int, float)) and timings[key] >= 0, f"timings_sec.{key} must be non-negative number")
 
-def validate_artifacts(doc: Dict[str, Any], project_root: str) -> None:
+def load_sidecar(path: str) -> Dict[str, Dict[str, Any]]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f).get("files", {})
+    except (OSError, ValueError):
+        return {}
+
+
+def write_sidecar(path: str, files: Dict[str, Dict[str, Any]]) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"format": 1, "files": files}, f, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def validate_artifacts(
+        doc: Dict[str, Any],
+        project_root: str,
+        required: List[str] = REQUIRED_ARTIFACT_KEYS,
+        jobs: int = 1,
+        quick: bool = False,
+        sidecar: Optional[Dict[str, Dict[str, Any]]] = None,
+) -> Tuple[Dict[str, Dict[str, Any]], int]:
+    """
+    Check every required artefact and every other artifacts entry that records a sha256.
+
+    Returns (verified {abs_path: {size, mtime_ns, sha256}}, number of files hashed).
+    With quick, files whose size and mtime match the sidecar (or the
+    size/mtime_ns in run.json) are not reread.
+    """
     artifacts = doc["artifacts"]
-    for k in REQUIRED_ARTIFACT_KEYS:
+    sidecar = sidecar or {}
+    checks = []
+    for k in required:
         require(k in artifacts, f"Missing artifacts.{k}")
-        entry = artifacts[k]
+    for k, entry in artifacts.items():
+        if k not in required and not (isinstance(entry, dict) and entry.get("sha256")):
+            continue
         for sub in ["path", "sha256"]:
             require(sub in entry, f"Missing artifacts.{k}.{sub}")
-        abs_path = os.path.join(project_root, entry["path"])
+        abs_path = os.path.abspath(os.path.join(project_root, entry["path"]))
         require(os.path.isfile(abs_path), f"Artifact not found: {abs_path}")
-        actual = sha256_file(abs_path)
+        st = os.stat(abs_path)
+        if "size" in entry:
+            # A size change is a mismatch without reading the file
+            require(st.st_size == entry["size"], f"Size mismatch for {k}: expected {entry['size']}, got {st.st_size}")
+        trusted = None
+        if quick:
+            for known in (sidecar.get(abs_path), entry):
+                if known and (known.get("size"), known.get("mtime_ns")) == (st.st_size, st.st_mtime_ns):
+                    trusted = known["sha256"]
+                    break
+        checks.append((k, entry, abs_path, st, trusted))
+
+    to_hash = [c[2] for c in checks if c[4] is None]
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        # hashlib releases the GIL on large updates, so threads hash files concurrently
+        hashed = dict(zip(to_hash, pool.map(sha256_file, to_hash)))
+
+    verified = {}
+    for k, entry, abs_path, st, trusted in checks:
+        actual = trusted if trusted is not None else hashed[abs_path]
         require(
             actual.lower() == entry["sha256"].lower(),
             f"SHA-256 mismatch for {k}: expected {entry['sha256']}, got {actual}"
         )
+        verified[abs_path] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": actual.lower()}
+    return verified, len(to_hash)
 
 def main() -> int:
     ap = argparse.ArgumentParser()
     ap.add_argument("--run-json", required=True, help="Path to run.json")
     ap.add_argument("--project-root", default=".", help="Project root for resolving artifact paths")
+    ap.add_argument("--jobs", type=int, default=1, help="Files hashed in parallel")
+    ap.add_argument("--quick", action="store_true",
+                    help="Only rehash files whose size or mtime differ from the sidecar digests / run.json")
+    ap.add_argument("--digests", default=None,
+                    help=f"Sidecar digest file (default: <run-json>{SIDECAR_SUFFIX})")
+    ap.add_argument("--artifacts-only", action="store_true",
+                    help="Skip the Slice v0 structure and required-artifact checks (e.g. for run_poc.json)")
     args = ap.parse_args()
 
     run_json_path = args.run_json
@@ -93,14 +164,29 @@ def main() -> int:
         print(f"ERROR: Failed to read run.json: {e}", file=sys.stderr)
         return 1
 
+    sidecar_path = args.digests or run_json_path + SIDECAR_SUFFIX
     try:
-        validate_structure(doc)
-        validate_artifacts(doc, args.project_root)
+        if not args.artifacts_only:
+            validate_structure(doc)
+        require(isinstance(doc.get("artifacts"), dict), "Missing top-level key: artifacts")
+        verified, n_hashed = validate_artifacts(
+            doc,
+            args.project_root,
+            required=[] if args.artifacts_only else REQUIRED_ARTIFACT_KEYS,
+            jobs=args.jobs,
+            quick=args.quick,
+            sidecar=load_sidecar(sidecar_path) if args.quick else None,
+        )
     except AssertionError as e:
         print(f"ERROR: Validation failed: {e}", file=sys.stderr)
         return 2
 
-    print("run.json validation passed")
+    try:
+        write_sidecar(sidecar_path, verified)
+    except OSError as e:
+        print(f"WARNING: Could not write {sidecar_path}: {e}", file=sys.stderr)
+    print(f"run.json validation passed ({len(verified)} artifacts, {n_hashed} hashed, "
+          f"{len(verified) - n_hashed} trusted by size/mtime)")
     return 0
 
 if __name__ == "__main__":